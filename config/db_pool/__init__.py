@@ -0,0 +1,5 @@
+"""
+PostgreSQL backend that shares a per-process pool of connections between
+threads. Use it as the ENGINE of a database and tune the pool through
+OPTIONS["pool"], see `config.db_pool.pool.ConnectionPool`.
+"""
@@ -0,0 +1,75 @@
+from django.core.exceptions import ImproperlyConfigured
+from django.db.backends.base.base import NO_DB_ALIAS
+from django.db.backends.postgresql import base
+from django.db.backends.postgresql.psycopg_any import IsolationLevel
+
+from config.db_pool.creation import DatabaseCreation
+from config.db_pool.pool import close_pools, get_pool
+
+
+class DatabaseWrapper(base.DatabaseWrapper):
+    """
+    PostgreSQL connections checked out of a shared pool on connect and
+    given back on close, which happens at the end of every request.
+    """
+
+    creation_class = DatabaseCreation
+
+    @property
+    def pooled(self):
+        # Test database creation and removal connect without a database
+        return self.alias != NO_DB_ALIAS
+
+    def get_pool(self):
+        if self.settings_dict["CONN_MAX_AGE"] != 0:
+            raise ImproperlyConfigured(
+                "A pooled database needs CONN_MAX_AGE = 0, connections "
+                "are kept by the pool instead."
+            )
+        options = self.settings_dict["OPTIONS"].get("pool", {})
+        return get_pool(
+            (self.alias, self.settings_dict["NAME"]),
+            check=self._check if self.settings_dict["CONN_HEALTH_CHECKS"]
+            else None,
+            **options,
+        )
+
+    def close_pool(self, database_name=None):
+        database_name = database_name or self.settings_dict["NAME"]
+        close_pools(lambda key: key == (self.alias, database_name))
+
+    @staticmethod
+    def _check(connection):
+        try:
+            with connection.cursor() as cursor:
+                cursor.execute("SELECT 1")
+        except base.Database.Error:
+            return False
+        return True
+
+    def get_connection_params(self):
+        conn_params = super().get_connection_params()
+        conn_params.pop("pool", None)
+        return conn_params
+
+    def get_new_connection(self, conn_params):
+        parent = super()
+        if not self.pooled:
+            return parent.get_new_connection(conn_params)
+        connection = self.get_pool().getconn(
+            lambda: parent.get_new_connection(conn_params)
+        )
+        # Set by the parent for new connections only, reused ones keep the
+        # isolation level they were opened with
+        self.isolation_level = IsolationLevel(
+            self.settings_dict["OPTIONS"].get(
+                "isolation_level", IsolationLevel.READ_COMMITTED
+            )
+        )
+        return connection
+
+    def _close(self):
+        if self.connection is None or not self.pooled:
+            return super()._close()
+        with self.wrap_database_errors:
+            self.get_pool().putconn(self.connection)
@@ -0,0 +1,10 @@
+from django.db.backends.postgresql.creation import (
+    DatabaseCreation as PostgreSQLDatabaseCreation,
+)
+
+
+class DatabaseCreation(PostgreSQLDatabaseCreation):
+    def _destroy_test_db(self, test_database_name, verbosity):
+        # Idle pooled connections would keep the database from dropping
+        self.connection.close_pool(test_database_name)
+        super()._destroy_test_db(test_database_name, verbosity)
@@ -0,0 +1,279 @@
+import os
+import threading
+import time
+from collections import deque
+
+from django.db.utils import OperationalError
+
+
+class PoolTimeout(OperationalError):
+    pass
+
+
+class ConnectionPool:
+    """
+    Thread-safe pool of DB-API connections for one database.
+
+    Connections are opened on demand up to `max_size`. When every one is
+    in use, `getconn()` waits up to `timeout` seconds for one to come back.
+    Idle connections are reused most recently returned first. Connections
+    older than `max_lifetime`, or idle beyond `max_idle` while the pool
+    holds more than `min_size`, are closed instead of reused. Connections
+    come back rolled back to an idle transaction state, and broken ones
+    are dropped.
+    """
+
+    def __init__(
+        self,
+        min_size=0,
+        max_size=10,
+        timeout=10.0,
+        max_lifetime=1800.0,
+        max_idle=300.0,
+        check=None,
+    ):
+        self.min_size = min_size
+        self.max_size = max_size
+        self.timeout = timeout
+        self.max_lifetime = max_lifetime
+        self.max_idle = max_idle
+        # Optional liveness probe run on idle connections before reuse
+        self.check = check
+        self._condition = threading.Condition()
+        # (connection, returned at), the most recently returned last
+        self._idle = deque()
+        # {connection: opened at} for every open connection
+        self._opened_at = {}
+        self._size = 0
+        self._counters = dict.fromkeys(
+            (
+                "requests",
+                "waits",
+                "timeouts",
+                "connections_opened",
+                "connections_closed",
+            ),
+            0,
+        )
+        self._wait_total = 0.0
+        self._wait_max = 0.0
+
+    def _expired(self, connection, now):
+        return now - self._opened_at[connection] >= self.max_lifetime
+
+    def _take_idle(self, now, stale):
+        while self._idle:
+            connection, returned_at = self._idle.pop()
+            if self._expired(connection, now) or connection.closed:
+                self._forget(connection)
+                stale.append(connection)
+                continue
+            return connection
+        return None
+
+    def _forget(self, connection):
+        del self._opened_at[connection]
+        self._size -= 1
+        self._counters["connections_closed"] += 1
+        self._condition.notify()
+
+    def _trim(self, now, stale):
+        # The oldest idle connections sit at the left end
+        while (
+            self._idle
+            and self._size > self.min_size
+            and now - self._idle[0][1] >= self.max_idle
+        ):
+            connection, _ = self._idle.popleft()
+            self._forget(connection)
+            stale.append(connection)
+
+    def getconn(self, connect):
+        """A connection from the pool, opened with `connect()` if needed"""
+        started = time.monotonic()
+        deadline = started + self.timeout
+        waited = False
+        stale = []
+        try:
+            with self._condition:
+                self._counters["requests"] += 1
+                while True:
+                    now = time.monotonic()
+                    self._trim(now, stale)
+                    connection = self._take_idle(now, stale)
+                    if connection is not None or self._size < self.max_size:
+                        break
+                    remaining = deadline - now
+                    if remaining <= 0:
+                        self._counters["timeouts"] += 1
+                        raise PoolTimeout(
+                            f"No database connection became available "
+                            f"within {self.timeout} seconds "
+                            f"(pool size {self.max_size})."
+                        )
+                    waited = True
+                    self._condition.wait(remaining)
+                if connection is None:
+                    # Reserve the slot, the connection opens outside the lock
+                    self._size += 1
+                self._record_wait(time.monotonic() - started, waited)
+        finally:
+            _close_quietly(stale)
+
+        if connection is not None:
+            if self.check is None or self.check(connection):
+                return connection
+            self.putconn(connection, discard=True)
+            return self.getconn(connect)
+
+        try:
+            connection = connect()
+        except Exception:
+            with self._condition:
+                self._size -= 1
+                self._condition.notify()
+            raise
+        with self._condition:
+            self._opened_at[connection] = time.monotonic()
+            self._counters["connections_opened"] += 1
+        return connection
+
+    def _record_wait(self, seconds, waited):
+        if waited:
+            self._counters["waits"] += 1
+        self._wait_total += seconds
+        self._wait_max = max(self._wait_max, seconds)
+
+    def putconn(self, connection, discard=False):
+        """Give `connection` back, closing it if it is no longer reusable"""
+        with self._condition:
+            owned = connection in self._opened_at
+        if not owned:
+            # Not ours, e.g. inherited and detached when the process forked
+            _close_quietly([connection])
+            return
+        if not discard:
+            discard = not _reset(connection)
+        with self._condition:
+            now = time.monotonic()
+            if discard or self._expired(connection, now):
+                self._forget(connection)
+                discard = True
+            else:
+                self._idle.append((connection, now))
+                self._condition.notify()
+        if discard:
+            _close_quietly([connection])
+
+    def close(self):
+        """Close the idle connections, in-use ones close when returned"""
+        with self._condition:
+            stale = [connection for connection, _ in self._idle]
+            self._idle.clear()
+            for connection in stale:
+                self._forget(connection)
+            self.max_lifetime = 0
+        _close_quietly(stale)
+
+    def stats(self):
+        with self._condition:
+            now = time.monotonic()
+            ages = [now - opened_at for opened_at in self._opened_at.values()]
+            requests = self._counters["requests"]
+            return {
+                "max_size": self.max_size,
+                "size": self._size,
+                "idle": len(self._idle),
+                "in_use": self._size - len(self._idle),
+                **self._counters,
+                "wait_ms_mean": round(
+                    self._wait_total * 1000 / requests, 3
+                ) if requests else 0.0,
+                "wait_ms_max": round(self._wait_max * 1000, 3),
+                "connection_age_s_mean": round(
+                    sum(ages) / len(ages), 1
+                ) if ages else 0.0,
+                "connection_age_s_max": round(max(ages, default=0.0), 1),
+            }
+
+
+def _reset(connection):
+    """Roll back a returned connection, False if it is unusable"""
+    if connection.closed:
+        return False
+    try:
+        if connection.info.transaction_status != _TRANSACTION_STATUS_IDLE:
+            connection.rollback()
+    except Exception:
+        return False
+    return True
+
+
+# psycopg2.extensions.TRANSACTION_STATUS_IDLE
+_TRANSACTION_STATUS_IDLE = 0
+
+
+def _close_quietly(connections):
+    for connection in connections:
+        try:
+            connection.close()
+        except Exception:
+            pass
+
+
+_pools = {}
+_pools_lock = threading.Lock()
+
+
+def get_pool(key, **options):
+    """The pool registered under `key`, created with `options` if missing"""
+    with _pools_lock:
+        if key not in _pools:
+            _pools[key] = ConnectionPool(**options)
+        return _pools[key]
+
+
+def close_pools(match=lambda key: True):
+    with _pools_lock:
+        keys = [key for key in _pools if match(key)]
+        pools = [_pools.pop(key) for key in keys]
+    for pool in pools:
+        pool.close()
+
+
+def pool_stats():
+    with _pools_lock:
+        pools = list(_pools.items())
+    return {"/".join(map(str, key)): pool.stats() for key, pool in pools}
+
+
+def _detach(connection):
+    """
+    Point the socket of `connection` at /dev/null. Closing it then only
+    drops this process's copy, and the termination message it sends never
+    reaches the server session, which may still be in use elsewhere.
+    """
+    try:
+        devnull = os.open(os.devnull, os.O_RDWR)
+        try:
+            os.dup2(devnull, connection.fileno())
+        finally:
+            os.close(devnull)
+    except Exception:
+        pass
+
+
+def _detach_inherited():
+    # Runs in the child right after fork, where another thread of the
+    # parent may have held the locks, so they are left alone
+    for pool in _pools.values():
+        for connection in list(pool._opened_at):
+            _detach(connection)
+    _pools.clear()
+
+
+# A forked worker must not share sockets with its parent, so it starts
+# with no pools and detaches the connections it inherited, leaving them
+# to the parent
+if hasattr(os, "register_at_fork"):
+    os.register_at_fork(after_in_child=_detach_inherited)
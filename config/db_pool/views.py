@@ -0,0 +1,21 @@
+from drf_spectacular.types import OpenApiTypes
+from drf_spectacular.utils import extend_schema
+from rest_framework.permissions import IsAdminUser
+from rest_framework.response import Response
+from rest_framework.views import APIView
+
+from config.db_pool.pool import pool_stats
+
+
+class PoolStatsView(APIView):
+    """
+    Connection pool metrics of the worker process answering the request:
+    size, idle and in-use connections, checkout waits and timeouts, and
+    connection ages. Counters are cumulative since the process started.
+    """
+
+    permission_classes = (IsAdminUser,)
+
+    @extend_schema(responses=OpenApiTypes.OBJECT)
+    def get(self, request):
+        return Response(pool_stats())
@@ -0,0 +1,89 @@
+"""
+Read-replica routing. Writes always go to "default". Reads go to one of
+settings.DATABASE_REPLICAS only while ReplicaRoutingMiddleware allows it
+for the current request, i.e. for safe requests to views that set
+`replica_reads = True`. Management commands, signals outside requests and
+everything else read from the primary.
+
+A client that wrote recently reads from the primary for
+REPLICA_STICKY_SECONDS, so it sees its own writes despite replica lag.
+"""
+import contextlib
+import hashlib
+import random
+from contextvars import ContextVar
+
+from django.conf import settings
+from django.core.cache import cache
+from rest_framework.permissions import SAFE_METHODS
+
+STICKY_CACHE_KEY = "db:read-primary:{client}"
+
+_replica_reads = ContextVar("replica_reads", default=False)
+
+
+@contextlib.contextmanager
+def use_primary():
+    """Send the reads of the enclosed block to the primary"""
+    token = _replica_reads.set(False)
+    try:
+        yield
+    finally:
+        _replica_reads.reset(token)
+
+
+class ReplicaRouter:
+    def db_for_read(self, model, **hints):
+        if settings.DATABASE_REPLICAS and _replica_reads.get():
+            return random.choice(settings.DATABASE_REPLICAS)
+        return "default"
+
+    def db_for_write(self, model, **hints):
+        return "default"
+
+    def allow_relation(self, obj1, obj2, **hints):
+        # Replicas hold the same rows as the primary
+        return True
+
+    def allow_migrate(self, db, app_label, model_name=None, **hints):
+        return db == "default"
+
+
+def _sticky_cache_key(request):
+    # Clients are told apart by their credentials, anonymous ones can't
+    # write anything worth reading back
+    credentials = request.META.get("HTTP_AUTHORIZATION") or (
+        request.COOKIES.get(settings.SESSION_COOKIE_NAME)
+    )
+    if not credentials:
+        return None
+    client = hashlib.sha256(credentials.encode()).hexdigest()
+    return STICKY_CACHE_KEY.format(client=client)
+
+
+class ReplicaRoutingMiddleware:
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        with use_primary():
+            response = self.get_response(request)
+
+        if request.method not in SAFE_METHODS and response.status_code < 400:
+            key = _sticky_cache_key(request)
+            if key:
+                cache.set(key, True, settings.REPLICA_STICKY_SECONDS)
+        return response
+
+    def process_view(self, request, view_func, view_args, view_kwargs):
+        if not settings.DATABASE_REPLICAS:
+            return None
+        view_class = getattr(view_func, "cls", None)
+        if (
+            request.method in SAFE_METHODS
+            and getattr(view_class, "replica_reads", False)
+        ):
+            key = _sticky_cache_key(request)
+            if not (key and cache.get(key)):
+                _replica_reads.set(True)
+        return None
@@ -9,6 +9,7 @@ https://docs.djangoproject.com/en/4.2/topics/settings/
 For the full list of settings and their values, see
 https://docs.djangoproject.com/en/4.2/ref/settings/
 """
+import copy
 import os
 from datetime import timedelta
 from pathlib import Path
@@ -29,7 +30,9 @@ SECRET_KEY = os.getenv("DJANGO_SECRET_KEY")
 # SECURITY WARNING: don't run with debug turned on in production!
 DEBUG = os.getenv("DJANGO_DEBUG", "") != "False"
 
-ALLOWED_HOSTS = []
+ALLOWED_HOSTS = [
+    host for host in os.getenv("DJANGO_ALLOWED_HOSTS", "").split(",") if host
+]
 
 INTERNAL_IPS = [
     "127.0.0.1",
@@ -45,7 +48,6 @@ INSTALLED_APPS = [
     "django.contrib.messages",
     "django.contrib.staticfiles",
     "rest_framework",
-    "debug_toolbar",
     "drf_spectacular",
     "theatre",
     "user",
@@ -53,15 +55,20 @@ INSTALLED_APPS = [
 
 MIDDLEWARE = [
     "django.middleware.security.SecurityMiddleware",
-    "debug_toolbar.middleware.DebugToolbarMiddleware",
+    "whitenoise.middleware.WhiteNoiseMiddleware",
     "django.contrib.sessions.middleware.SessionMiddleware",
     "django.middleware.common.CommonMiddleware",
     "django.middleware.csrf.CsrfViewMiddleware",
     "django.contrib.auth.middleware.AuthenticationMiddleware",
+    "config.db_router.ReplicaRoutingMiddleware",
     "django.contrib.messages.middleware.MessageMiddleware",
     "django.middleware.clickjacking.XFrameOptionsMiddleware",
 ]
 
+if DEBUG:
+    INSTALLED_APPS.append("debug_toolbar")
+    MIDDLEWARE.insert(2, "debug_toolbar.middleware.DebugToolbarMiddleware")
+
 ROOT_URLCONF = "config.urls"
 
 TEMPLATES = [
@@ -86,13 +93,70 @@ WSGI_APPLICATION = "config.wsgi.application"
 # Database
 # https://docs.djangoproject.com/en/4.2/ref/settings/#databases
 
+# Connections persist for DB_CONN_MAX_AGE seconds and are health-checked
+# before reuse. A DB_POOL_MAX_SIZE above 0 shares a pool between the
+# threads of each process instead; connections then go back to the pool
+# at the end of every request. Pool metrics are served at /api/db-pool/.
+DB_POOL_MAX_SIZE = int(os.getenv("DB_POOL_MAX_SIZE", 0))
+
 DATABASES = {
     "default": {
-        "ENGINE": "django.db.backends.postgresql",
+        "ENGINE": (
+            "config.db_pool" if DB_POOL_MAX_SIZE
+            else "django.db.backends.postgresql"
+        ),
         "HOST": os.getenv("POSTGRES_HOST"),
         "NAME": os.getenv("POSTGRES_DB"),
         "USER": os.getenv("POSTGRES_USER"),
         "PASSWORD": os.getenv("POSTGRES_PASSWORD"),
+        "CONN_MAX_AGE": (
+            0 if DB_POOL_MAX_SIZE else int(os.getenv("DB_CONN_MAX_AGE", 60))
+        ),
+        "CONN_HEALTH_CHECKS": True,
+        "OPTIONS": {
+            "pool": {
+                "min_size": int(os.getenv("DB_POOL_MIN_SIZE", 0)),
+                "max_size": DB_POOL_MAX_SIZE,
+                "timeout": float(os.getenv("DB_POOL_TIMEOUT", 10)),
+                "max_lifetime": float(os.getenv("DB_POOL_MAX_LIFETIME", 1800)),
+                "max_idle": float(os.getenv("DB_POOL_MAX_IDLE", 300)),
+            }
+        } if DB_POOL_MAX_SIZE else {},
+    }
+}
+
+# Read replicas of "default" as comma-separated host[:port] values. Safe
+# catalog requests read from them, see config/db_router.py. Pointing one
+# at the primary's own host works for local development.
+DATABASE_REPLICAS = []
+for number, replica in enumerate(
+    filter(None, os.getenv("POSTGRES_REPLICA_HOSTS", "").split(",")), 1
+):
+    host, _, port = replica.partition(":")
+    alias = f"replica_{number}"
+    DATABASES[alias] = {
+        **copy.deepcopy(DATABASES["default"]),
+        "HOST": host,
+        "PORT": port,
+        "TEST": {"MIRROR": "default"},
+    }
+    DATABASE_REPLICAS.append(alias)
+
+DATABASE_ROUTERS = ["config.db_router.ReplicaRouter"]
+
+# Clients read from the primary this long after a write, which covers
+# replication lag for their own changes
+REPLICA_STICKY_SECONDS = int(os.getenv("REPLICA_STICKY_SECONDS", 5))
+
+# Local memory by default, for tests and a single process. Several workers
+# need a shared backend (docker-compose uses Redis) for seat maps, sticky
+# primary reads and throttle counters to hold across them.
+CACHES = {
+    "default": {
+        "BACKEND": os.getenv(
+            "CACHE_BACKEND", "django.core.cache.backends.locmem.LocMemCache"
+        ),
+        "LOCATION": os.getenv("CACHE_LOCATION", ""),
     }
 }
 
@@ -133,9 +197,22 @@ USE_TZ = True
 # https://docs.djangoproject.com/en/4.2/howto/static-files/
 
 STATIC_URL = "static/"
+# Filled by `manage.py collectstatic` and served by WhiteNoise
+STATIC_ROOT = os.getenv("DJANGO_STATIC_ROOT", BASE_DIR / "staticfiles")
+
+STORAGES = {
+    "default": {
+        "BACKEND": "django.core.files.storage.FileSystemStorage",
+    },
+    "staticfiles": {
+        "BACKEND": "whitenoise.storage.CompressedStaticFilesStorage",
+    },
+}
 
 MEDIA_URL = "/media/"
 MEDIA_ROOT = BASE_DIR / "media"
+# Set False when a proxy serves MEDIA_ROOT under MEDIA_URL
+SERVE_MEDIA = os.getenv("DJANGO_SERVE_MEDIA", "") != "False"
 
 # Default primary key field type
 # https://docs.djangoproject.com/en/4.2/ref/settings/#default-auto-field
@@ -144,9 +221,11 @@ DEFAULT_AUTO_FIELD = "django.db.models.BigAutoField"
 
 REST_FRAMEWORK = {
     "DEFAULT_SCHEMA_CLASS": "drf_spectacular.openapi.AutoSchema",
+    # Counters live in the default cache, share it between workers by
+    # pointing CACHE_BACKEND at Redis or Memcached
     "DEFAULT_THROTTLE_CLASSES": [
-        "rest_framework.throttling.AnonRateThrottle",
-        "rest_framework.throttling.UserRateThrottle",
+        "config.throttling.AnonRateThrottle",
+        "config.throttling.UserRateThrottle",
     ],
     "DEFAULT_THROTTLE_RATES": {
         "anon": "100/day",
@@ -154,7 +233,7 @@ REST_FRAMEWORK = {
         "login_throttle": "5/hour",
     },
     "DEFAULT_AUTHENTICATION_CLASSES": (
-        "rest_framework_simplejwt.authentication.JWTAuthentication",
+        "user.authentication.StatelessJWTAuthentication",
     ),
 }
 
@@ -171,7 +250,29 @@ SPECTACULAR_SETTINGS = {
     },
 }
 
+# Seat maps are updated incrementally on ticket writes, the timeout only
+# bounds how long a map can drift after a lost concurrent update. They
+# only serve display and seat picking, holds check the tickets table.
+SEAT_MAP_CACHE_TIMEOUT = int(os.getenv("SEAT_MAP_CACHE_TIMEOUT", 300))
+
+SEAT_HOLD_MINUTES = int(os.getenv("SEAT_HOLD_MINUTES", 10))
+
+IDEMPOTENCY_KEY_TTL_HOURS = int(os.getenv("IDEMPOTENCY_KEY_TTL_HOURS", 24))
+
+# Catalog responses are invalidated by version bumps on writes, counted
+# in the database so every worker sees them. The timeout only evicts
+# bodies of versions that are no longer current.
+CATALOG_CACHE_TIMEOUT = int(os.getenv("CATALOG_CACHE_TIMEOUT", 86400))
+
 SIMPLE_JWT = {
     "ACCESS_TOKEN_LIFETIME": timedelta(minutes=5),
     "REFRESH_TOKEN_LIFETIME": timedelta(days=1),
+    "TOKEN_OBTAIN_SERIALIZER": "user.serializers.TokenObtainPairSerializer",
+    "TOKEN_REFRESH_SERIALIZER": "user.serializers.TokenRefreshSerializer",
+    "TOKEN_USER_CLASS": "user.authentication.TokenUser",
 }
+
+# request.user is built from token claims; only the token version and
+# active flag of a user are read, and kept in process this long
+TOKEN_STATE_CACHE_SECONDS = int(os.getenv("TOKEN_STATE_CACHE_SECONDS", 30))
+TOKEN_STATE_CACHE_SIZE = 10000
@@ -0,0 +1,160 @@
+import os
+import socket
+import threading
+from types import SimpleNamespace
+from unittest import mock
+
+from django.contrib.auth import get_user_model
+from django.test import SimpleTestCase, TestCase
+from django.urls import reverse
+from rest_framework import status
+from rest_framework.test import APIClient
+
+from config.db_pool import pool
+from config.db_pool.pool import ConnectionPool, PoolTimeout
+
+
+class FakeConnection:
+    def __init__(self):
+        self.closed = 0
+        self.info = SimpleNamespace(transaction_status=0)
+        self.rollbacks = 0
+
+    def rollback(self):
+        self.rollbacks += 1
+        self.info.transaction_status = 0
+
+    def close(self):
+        self.closed = 1
+
+
+class ConnectionPoolTests(SimpleTestCase):
+    def setUp(self) -> None:
+        self.pool = ConnectionPool(max_size=2, timeout=0.05)
+
+    def test_returned_connections_are_reused(self):
+        first = self.pool.getconn(FakeConnection)
+        self.pool.putconn(first)
+
+        self.assertIs(self.pool.getconn(FakeConnection), first)
+        self.assertEqual(self.pool.stats()["connections_opened"], 1)
+
+    def test_open_transaction_rolled_back_on_return(self):
+        connection = self.pool.getconn(FakeConnection)
+        connection.info.transaction_status = 2
+
+        self.pool.putconn(connection)
+
+        self.assertEqual(connection.rollbacks, 1)
+        self.assertIs(self.pool.getconn(FakeConnection), connection)
+
+    def test_broken_connections_are_dropped(self):
+        connection = self.pool.getconn(FakeConnection)
+        connection.closed = 2
+
+        self.pool.putconn(connection)
+
+        self.assertIsNot(self.pool.getconn(FakeConnection), connection)
+        self.assertEqual(self.pool.stats()["connections_closed"], 1)
+
+    def test_failed_check_opens_a_new_connection(self):
+        self.pool.check = lambda connection: False
+        connection = self.pool.getconn(FakeConnection)
+        self.pool.putconn(connection)
+
+        self.assertIsNot(self.pool.getconn(FakeConnection), connection)
+        self.assertTrue(connection.closed)
+
+    def test_old_connections_are_recycled(self):
+        connection = self.pool.getconn(FakeConnection)
+        self.pool.putconn(connection)
+        self.pool.max_lifetime = 0
+
+        self.assertIsNot(self.pool.getconn(FakeConnection), connection)
+        self.assertTrue(connection.closed)
+
+    def test_exhausted_pool_times_out(self):
+        self.pool.getconn(FakeConnection)
+        self.pool.getconn(FakeConnection)
+
+        with self.assertRaises(PoolTimeout):
+            self.pool.getconn(FakeConnection)
+
+        stats = self.pool.stats()
+        self.assertEqual(stats["timeouts"], 1)
+        self.assertEqual(stats["in_use"], 2)
+
+    def test_waiting_checkout_gets_returned_connection(self):
+        self.pool.timeout = 5
+        connection = self.pool.getconn(FakeConnection)
+        self.pool.getconn(FakeConnection)
+        timer = threading.Timer(0.05, self.pool.putconn, [connection])
+        timer.start()
+
+        self.assertIs(self.pool.getconn(FakeConnection), connection)
+        timer.join()
+        stats = self.pool.stats()
+        self.assertEqual(stats["waits"], 1)
+        self.assertGreater(stats["wait_ms_max"], 0)
+
+    def test_failed_connect_frees_its_slot(self):
+        def connect():
+            raise OSError
+
+        with self.assertRaises(OSError):
+            self.pool.getconn(connect)
+
+        self.assertEqual(self.pool.stats()["size"], 0)
+
+    def test_inherited_connections_detached_after_fork(self):
+        client_socket, server_socket = socket.socketpair()
+        self.addCleanup(client_socket.close)
+        self.addCleanup(server_socket.close)
+        # The copy of the socket the parent keeps using
+        parent = socket.socket(fileno=os.dup(client_socket.fileno()))
+        self.addCleanup(parent.close)
+        connection = FakeConnection()
+        connection.fileno = client_socket.fileno
+        with mock.patch.dict(pool._pools, {"default": self.pool}):
+            self.pool.getconn(lambda: connection)
+
+            pool._detach_inherited()
+
+            self.assertEqual(pool._pools, {})
+        # What the child sends on closing never reaches the server
+        os.write(client_socket.fileno(), b"X")
+        server_socket.setblocking(False)
+        with self.assertRaises(BlockingIOError):
+            server_socket.recv(1)
+        parent.send(b"Q")
+        self.assertEqual(server_socket.recv(1), b"Q")
+
+
+class PoolStatsApiTests(TestCase):
+    def setUp(self) -> None:
+        self.client = APIClient()
+
+    def test_stats_of_registered_pools(self):
+        self.client.force_authenticate(
+            get_user_model().objects.create_superuser(
+                "admin@test.com", "testpassword"
+            )
+        )
+        with mock.patch.dict(pool._pools, clear=True):
+            pool.get_pool(("default", "theatre"), max_size=4)
+
+            response = self.client.get(reverse("db-pool"))
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data["default/theatre"]["max_size"], 4)
+
+    def test_admin_required(self):
+        self.client.force_authenticate(
+            get_user_model().objects.create_user(
+                "test@test.com", "testpassword"
+            )
+        )
+
+        response = self.client.get(reverse("db-pool"))
+
+        self.assertEqual(response.status_code, status.HTTP_403_FORBIDDEN)
@@ -0,0 +1,73 @@
+from unittest import mock
+
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.test import TestCase, override_settings
+from django.urls import reverse
+from rest_framework.test import APIClient
+
+from config.db_router import ReplicaRouter
+from theatre.models import Play, TheatreHall, Performance
+
+PERFORMANCE_URL = reverse("theatre:performance-list")
+RESERVATION_URL = reverse("theatre:reservation-list")
+
+
+# The test database stands in for the replica, picks are recorded
+@override_settings(DATABASE_REPLICAS=["default"])
+class ReplicaRoutingTests(TestCase):
+    def setUp(self) -> None:
+        cache.clear()
+        self.client = APIClient()
+        self.client.force_authenticate(
+            get_user_model().objects.create_user(
+                "test@test.com", "testpassword"
+            )
+        )
+        self.client.credentials(HTTP_AUTHORIZATION="Bearer test-token")
+        self.performance = Performance.objects.create(
+            play=Play.objects.create(title="Hamlet"),
+            theatre_hall=TheatreHall.objects.create(
+                name="Main", rows=10, seats_in_row=10
+            ),
+            show_time="2024-06-01T19:00:00+03:00",
+        )
+        patcher = mock.patch(
+            "config.db_router.random.choice",
+            side_effect=lambda aliases: aliases[0],
+        )
+        self.replica_choice = patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def test_catalog_reads_use_replica(self):
+        self.client.get(PERFORMANCE_URL)
+
+        self.assertTrue(self.replica_choice.called)
+
+    def test_reservation_reads_use_primary(self):
+        self.client.get(RESERVATION_URL)
+
+        self.replica_choice.assert_not_called()
+
+    def test_reads_after_write_stick_to_primary(self):
+        self.client.post(
+            RESERVATION_URL,
+            {
+                "tickets": [
+                    {"row": 1, "seat": 1, "performance": self.performance.id}
+                ]
+            },
+            format="json",
+        )
+        self.client.get(PERFORMANCE_URL)
+
+        self.replica_choice.assert_not_called()
+
+        self.client.credentials(HTTP_AUTHORIZATION="Bearer other-token")
+        self.client.get(PERFORMANCE_URL)
+
+        self.assertTrue(self.replica_choice.called)
+
+    def test_reads_outside_requests_use_primary(self):
+        self.assertEqual(ReplicaRouter().db_for_read(Play), "default")
+        self.replica_choice.assert_not_called()
@@ -0,0 +1,74 @@
+from django.core.cache import cache
+from django.test import SimpleTestCase, TestCase
+from django.urls import reverse
+from rest_framework import status
+from rest_framework.test import APIClient
+from rest_framework.throttling import SimpleRateThrottle
+
+from config.throttling import SlidingWindowThrottleMixin
+
+TOKEN_URL = reverse("user:token_obtain_pair")
+
+
+class MinuteThrottle(SlidingWindowThrottleMixin, SimpleRateThrottle):
+    rate = "4/m"
+
+    def get_cache_key(self, request, view):
+        return "throttle_test_client"
+
+
+class SlidingWindowThrottleTests(SimpleTestCase):
+    def setUp(self) -> None:
+        cache.clear()
+
+    def check(self, now):
+        throttle = MinuteThrottle()
+        throttle.timer = lambda: now
+        return throttle.allow_request(None, None), throttle.wait()
+
+    def test_limit_within_window(self):
+        for _ in range(4):
+            self.assertTrue(self.check(600 + 30)[0])
+
+        allowed, wait = self.check(600 + 30)
+
+        self.assertFalse(allowed)
+        self.assertEqual(wait, 30)
+
+    def test_previous_window_weighs_in(self):
+        for _ in range(4):
+            self.check(600 + 30)
+
+        # A quarter into the next window, 3 of the 4 requests still count
+        self.assertTrue(self.check(660 + 15)[0])
+        allowed, wait = self.check(660 + 15)
+        self.assertFalse(allowed)
+        self.assertEqual(wait, 15)
+        self.assertTrue(self.check(660 + 30)[0])
+
+    def test_rejected_requests_are_not_counted(self):
+        for _ in range(10):
+            self.check(600 + 30)
+
+        self.assertTrue(self.check(720)[0])
+        self.assertEqual(cache.get("throttle_test_client:10"), 4)
+
+
+class LoginThrottleTests(TestCase):
+    def setUp(self) -> None:
+        cache.clear()
+        self.client = APIClient()
+
+    def test_password_attempts_are_limited(self):
+        credentials = {"email": "test@test.com", "password": "wrong"}
+        for _ in range(5):
+            response = self.client.post(TOKEN_URL, credentials)
+            self.assertEqual(
+                response.status_code, status.HTTP_401_UNAUTHORIZED
+            )
+
+        response = self.client.post(TOKEN_URL, credentials)
+
+        self.assertEqual(
+            response.status_code, status.HTTP_429_TOO_MANY_REQUESTS
+        )
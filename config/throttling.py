@@ -0,0 +1,82 @@
+"""
+Sliding-window throttles. DRF's throttles keep a list with the timestamp
+of every request in the window and rewrite it on each check, so their
+cost grows with the rate. These keep one counter per client and fixed
+window instead, and estimate the sliding window from the current and
+previous counters. A check is an atomic increment plus one read, and
+the counters are shared by every worker using the same cache.
+"""
+from rest_framework import throttling
+
+
+class SlidingWindowThrottleMixin:
+    def _window_key(self, window):
+        return f"{self.key}:{window}"
+
+    def _increment(self, key):
+        try:
+            return self.cache.incr(key)
+        except ValueError:
+            # Kept through the next window, which reads it as the previous
+            if self.cache.add(key, 1, self.duration * 2):
+                return 1
+            return self.cache.incr(key)
+
+    def allow_request(self, request, view):
+        if self.rate is None:
+            return True
+
+        self.key = self.get_cache_key(request, view)
+        if self.key is None:
+            return True
+
+        self.now = self.timer()
+        window, elapsed = divmod(self.now, self.duration)
+        self.elapsed = elapsed
+        current_key = self._window_key(int(window))
+        self.current = self._increment(current_key)
+        self.previous = self.cache.get(self._window_key(int(window) - 1), 0)
+
+        weight = 1 - elapsed / self.duration
+        if self.previous * weight + self.current <= self.num_requests:
+            return True
+        # Rejected requests don't count against the client
+        self.cache.decr(current_key)
+        self.current -= 1
+        return False
+
+    def wait(self):
+        remaining = self.duration - self.elapsed
+        room = self.num_requests - self.current - 1
+        if room < 0 or not self.previous:
+            return remaining
+        # Until the previous window weighs little enough for one request
+        return max(
+            self.duration * (1 - room / self.previous) - self.elapsed, 0
+        )
+
+
+class AnonRateThrottle(
+    SlidingWindowThrottleMixin, throttling.AnonRateThrottle
+):
+    pass
+
+
+class UserRateThrottle(
+    SlidingWindowThrottleMixin, throttling.UserRateThrottle
+):
+    pass
+
+
+class LoginRateThrottle(
+    SlidingWindowThrottleMixin, throttling.SimpleRateThrottle
+):
+    """Limit password attempts per client address"""
+
+    scope = "login_throttle"
+
+    def get_cache_key(self, request, view):
+        return self.cache_format % {
+            "scope": self.scope,
+            "ident": self.get_ident(request),
+        }
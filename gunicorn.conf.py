@@ -0,0 +1,56 @@
+"""
+Gunicorn settings for `manage.py serve` and `gunicorn config.wsgi`,
+tunable through GUNICORN_* environment variables.
+
+Reloading:
+- `kill -HUP <master pid>` rereads this file and replaces the workers
+  gracefully, letting in-flight requests finish.
+- With GUNICORN_PRELOAD on, the code is loaded once in the master.
+  To deploy new code, start a new master with `kill -USR2`, then stop
+  the old one with `kill -TERM`. Otherwise, restart the container.
+"""
+import multiprocessing
+import os
+
+wsgi_app = "config.wsgi:application"
+bind = os.getenv("GUNICORN_BIND", "0.0.0.0:8000")
+
+workers = int(
+    os.getenv("GUNICORN_WORKERS", multiprocessing.cpu_count() * 2 + 1)
+)
+# More than one thread switches the workers to gthread, which also keeps
+# client connections alive
+threads = int(os.getenv("GUNICORN_THREADS", 4))
+keepalive = int(os.getenv("GUNICORN_KEEPALIVE", 5))
+timeout = int(os.getenv("GUNICORN_TIMEOUT", 30))
+graceful_timeout = int(os.getenv("GUNICORN_GRACEFUL_TIMEOUT", 30))
+# Recycle workers now and then to contain memory growth. A recycled worker
+# drops its keep-alive connections and in-process caches, so not too often
+max_requests = int(os.getenv("GUNICORN_MAX_REQUESTS", 10000))
+max_requests_jitter = int(os.getenv("GUNICORN_MAX_REQUESTS_JITTER", 1000))
+
+# Import Django once in the master so workers fork ready to serve
+preload_app = os.getenv("GUNICORN_PRELOAD", "True") != "False"
+pidfile = os.getenv("GUNICORN_PIDFILE") or None
+
+accesslog = os.getenv("GUNICORN_ACCESS_LOG", "-") or None
+errorlog = "-"
+
+
+def post_fork(server, worker):
+    # Database connections opened while preloading belong to the master
+    from django.db import connections
+
+    connections.close_all()
+
+
+def when_ready(server):
+    from django.conf import settings
+
+    backend = settings.CACHES["default"]["BACKEND"]
+    if server.cfg.workers > 1 and backend.endswith("LocMemCache"):
+        server.log.warning(
+            "%s workers with a per-process cache: seat maps, sticky reads "
+            "and throttle limits are not shared, set CACHE_BACKEND",
+            server.cfg.workers,
+        )
@@ -8,6 +8,12 @@ from theatre.models import (
     Performance,
     Reservation,
     Ticket,
+    SeatHold,
+    HeldSeat,
+    IdempotencyKey,
+    ChangeLogEntry,
+    OccupancyRollup,
+    CacheVersion,
 )
 
 admin.site.register(Genre)
@@ -17,3 +23,9 @@ admin.site.register(TheatreHall)
 admin.site.register(Performance)
 admin.site.register(Reservation)
 admin.site.register(Ticket)
+admin.site.register(SeatHold)
+admin.site.register(HeldSeat)
+admin.site.register(IdempotencyKey)
+admin.site.register(ChangeLogEntry)
+admin.site.register(OccupancyRollup)
+admin.site.register(CacheVersion)
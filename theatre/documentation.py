@@ -4,12 +4,33 @@ from drf_spectacular.types import OpenApiTypes
 from drf_spectacular.utils import OpenApiParameter, OpenApiExample
 
 
+sparse_fieldset_doc_parameters = [
+    OpenApiParameter(
+        "fields",
+        type=str,
+        description="Only return these fields, dotted paths select nested "
+        "ones (e.g. ?fields=id,title,genres.name)",
+    ),
+    OpenApiParameter(
+        "expand",
+        type=str,
+        description="Nest related objects returned as ids by default "
+        "(e.g. ?expand=tickets.performance)",
+    ),
+]
+
 play_doc_params = [
     OpenApiParameter(
         "title",
         type=str,
         description="Filter by title name (e.g. ?title=name_of_the_play)",
     ),
+    OpenApiParameter(
+        "search",
+        type=str,
+        description="Search titles, descriptions and actor names, most "
+        "relevant first (e.g. ?search=hamlet)",
+    ),
     OpenApiParameter(
         "genres",
         type={"type": "list", "items": {"type": "number"}},
@@ -20,6 +41,15 @@ play_doc_params = [
         type={"type": "list", "items": {"type": "number"}},
         description="Filter by actor id (e.g. ?actors=1,2,5)",
     ),
+    OpenApiParameter(
+        "match",
+        type=str,
+        enum=["any", "all"],
+        default="any",
+        description="Whether plays need any (default) or all of the listed "
+        "genres and actors (e.g. ?genres=1,2&match=all)",
+    ),
+    *sparse_fieldset_doc_parameters,
 ]
 
 play_doc_examples = [
@@ -28,6 +58,11 @@ play_doc_examples = [
         description="Get plays with title containing 'Hamlet'.",
         value="?title=Hamlet",
     ),
+    OpenApiExample(
+        name="Search plays",
+        description="Get plays mentioning 'Olivier' ranked by relevance.",
+        value="?search=Olivier",
+    ),
     OpenApiExample(
         name="Filter by genres",
         description="Get plays with specific genre IDs.",
@@ -38,6 +73,11 @@ play_doc_examples = [
         description="Get plays with specific actor IDs.",
         value="?actors=1,2,3",
     ),
+    OpenApiExample(
+        name="Filter by all genres",
+        description="Get plays that have every one of the genre IDs.",
+        value="?genres=1,2&match=all",
+    ),
 ]
 
 performance_doc_parameters = [
@@ -46,11 +86,36 @@ performance_doc_parameters = [
         type=OpenApiTypes.DATE,
         description="Filter by date (e.g. ?date=2024-10-08)",
     ),
+    OpenApiParameter(
+        "date_from",
+        type=OpenApiTypes.DATE,
+        description="Performances on or after the date, Kyiv time "
+        "(e.g. ?date_from=2024-10-08)",
+    ),
+    OpenApiParameter(
+        "date_to",
+        type=OpenApiTypes.DATE,
+        description="Performances on or before the date, Kyiv time "
+        "(e.g. ?date_to=2024-10-13)",
+    ),
     OpenApiParameter(
         "play",
         type=str,
         description="Filter by play title (e.g. ?play=macbeth)",
     ),
+    *sparse_fieldset_doc_parameters,
+]
+
+performance_detail_doc_parameters = [
+    OpenApiParameter(
+        "seat_format",
+        type=str,
+        enum=["list", "bitmap", "rle"],
+        description="Format of taken places: list of seats (default), "
+        "base64 bitmap with one bit per seat in row-major order, or "
+        "run lengths of alternating free and taken seats "
+        "(e.g. ?seat_format=bitmap)",
+    ),
 ]
 
 performance_doc_examples = [
@@ -59,9 +124,126 @@ performance_doc_examples = [
         description="Get performances on a specific date.",
         value="?date=2024-10-08",
     ),
+    OpenApiExample(
+        name="Filter by date range",
+        description="Get performances within a range of days.",
+        value="?date_from=2024-10-11&date_to=2024-10-13",
+    ),
     OpenApiExample(
         name="Filter by play title",
         description="Get performances for a specific play.",
         value="?play=Macbeth",
     ),
 ]
+
+performance_schedule_doc_examples = [
+    OpenApiExample(
+        name="Weekly schedule",
+        description="Hamlet in hall 1 at 19:00 on Fridays and Saturdays "
+        "for the autumn.",
+        value={
+            "play": 1,
+            "theatre_hall": 1,
+            "date_from": "2024-09-01",
+            "date_to": "2024-11-30",
+            "times": ["19:00"],
+            "frequency": "weekly",
+            "weekdays": ["fri", "sat"],
+        },
+        request_only=True,
+    ),
+    OpenApiExample(
+        name="Daily matinee and evening show",
+        description="Two shows every day for a week, checked without "
+        "creating anything.",
+        value={
+            "play": 1,
+            "theatre_hall": 1,
+            "date_from": "2024-12-23",
+            "date_to": "2024-12-29",
+            "times": ["13:00", "19:00"],
+            "frequency": "daily",
+            "dry_run": True,
+        },
+        request_only=True,
+    ),
+]
+
+change_feed_doc_parameters = [
+    OpenApiParameter(
+        "since",
+        type=int,
+        description="Cursor returned by the previous call, 0 or omitted "
+        "for a full sync (e.g. ?since=1520)",
+    ),
+    OpenApiParameter(
+        "limit",
+        type=int,
+        description="Maximum number of log entries to read (e.g. ?limit=200)",
+    ),
+]
+
+reservation_export_doc_parameters = [
+    OpenApiParameter(
+        "output",
+        type=str,
+        enum=["csv", "ndjson"],
+        default="csv",
+        description="File format, one ticket per line (e.g. ?output=ndjson)",
+    ),
+    OpenApiParameter(
+        "compression",
+        type=str,
+        enum=["none", "gzip"],
+        default="none",
+        description="Gzip the file (e.g. ?compression=gzip)",
+    ),
+    OpenApiParameter(
+        "date_from",
+        type=OpenApiTypes.DATE,
+        description="Tickets for performances on or after the date, Kyiv "
+        "time (e.g. ?date_from=2024-09-01)",
+    ),
+    OpenApiParameter(
+        "date_to",
+        type=OpenApiTypes.DATE,
+        description="Tickets for performances on or before the date, Kyiv "
+        "time (e.g. ?date_to=2025-06-30)",
+    ),
+]
+
+catalog_import_doc_examples = [
+    OpenApiExample(
+        name="Import a season",
+        description="One record per line. Plays refer to genres and actors "
+        "by name, performances to plays by title and to theatre halls by "
+        "name.",
+        value='{"type": "genre", "name": "Drama"}\n'
+        '{"type": "actor", "first_name": "Laurence", "last_name": "Olivier"}\n'
+        '{"type": "play", "title": "Hamlet", "description": "Prince", '
+        '"genres": ["Drama"], "actors": ["Laurence Olivier"]}\n'
+        '{"type": "performance", "play": "Hamlet", "theatre_hall": "Main", '
+        '"show_time": "2024-10-08T19:00:00"}\n',
+        request_only=True,
+    ),
+]
+
+occupancy_doc_parameters = [
+    OpenApiParameter(
+        "group_by",
+        type=str,
+        default="day",
+        description="Comma separated grouping of day, play and theatre_hall "
+        "(e.g. ?group_by=play,day)",
+    ),
+    OpenApiParameter(
+        "date_from",
+        type=OpenApiTypes.DATE,
+        description="First day, Kyiv time (e.g. ?date_from=2024-09-01)",
+    ),
+    OpenApiParameter(
+        "date_to",
+        type=OpenApiTypes.DATE,
+        description="Last day, Kyiv time (e.g. ?date_to=2024-09-30)",
+    ),
+]
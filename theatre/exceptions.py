@@ -0,0 +1,26 @@
+from rest_framework import status
+from rest_framework.exceptions import APIException, ErrorDetail
+
+
+class SeatConflict(APIException):
+    status_code = status.HTTP_409_CONFLICT
+    default_detail = "Some of the requested seats are already taken."
+    default_code = "seat_conflict"
+
+    def __init__(self, seats):
+        self.detail = {
+            "detail": ErrorDetail(self.default_detail, self.default_code),
+            "taken_seats": seats,
+        }
+
+
+class NoAdjacentSeats(APIException):
+    status_code = status.HTTP_409_CONFLICT
+    default_detail = "Not enough adjacent seats are available."
+    default_code = "no_adjacent_seats"
+
+
+class HallConflict(APIException):
+    status_code = status.HTTP_409_CONFLICT
+    default_detail = "The theatre hall is already booked at this time."
+    default_code = "hall_conflict"
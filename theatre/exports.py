@@ -0,0 +1,93 @@
+import csv
+import io
+import zlib
+from datetime import datetime
+
+import orjson
+
+from theatre.models import Ticket
+
+EXPORT_FORMATS = ("csv", "ndjson")
+CONTENT_TYPES = {"csv": "text/csv", "ndjson": "application/x-ndjson"}
+
+# (column name, Ticket lookup), one row per ticket
+EXPORT_COLUMNS = (
+    ("reservation_id", "reservation_id"),
+    ("reserved_at", "reservation__created_at"),
+    ("user", "reservation__user__email"),
+    ("ticket_id", "id"),
+    ("performance_id", "performance_id"),
+    ("play", "performance__play__title"),
+    ("show_time", "performance__show_time"),
+    ("theatre_hall", "performance__theatre_hall__name"),
+    ("row", "row"),
+    ("seat", "seat"),
+)
+COLUMN_NAMES = [name for name, _ in EXPORT_COLUMNS]
+
+
+def export_rows(show_time_from=None, show_time_to=None, chunk_size=2000):
+    """
+    Stream ticket rows through a server-side cursor in primary key order,
+    which follows the ticket index instead of sorting the table.
+    """
+    tickets = Ticket.objects.order_by("id")
+    if show_time_from:
+        tickets = tickets.filter(performance__show_time__gte=show_time_from)
+    if show_time_to:
+        tickets = tickets.filter(performance__show_time__lt=show_time_to)
+    return tickets.values_list(
+        *(lookup for _, lookup in EXPORT_COLUMNS)
+    ).iterator(chunk_size=chunk_size)
+
+
+def _plain(row):
+    return [
+        value.isoformat() if isinstance(value, datetime) else value
+        for value in row
+    ]
+
+
+def csv_chunks(rows, batch_size=1000):
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    writer.writerow(COLUMN_NAMES)
+    # The header goes out before the first query returns
+    yield buffer.getvalue().encode()
+    buffer.seek(0)
+    buffer.truncate()
+
+    for index, row in enumerate(rows, 1):
+        writer.writerow(_plain(row))
+        if index % batch_size == 0:
+            yield buffer.getvalue().encode()
+            buffer.seek(0)
+            buffer.truncate()
+    if buffer.tell():
+        yield buffer.getvalue().encode()
+
+
+def ndjson_chunks(rows, batch_size=1000):
+    lines = []
+    for row in rows:
+        lines.append(orjson.dumps(dict(zip(COLUMN_NAMES, row))))
+        if len(lines) == batch_size:
+            yield b"\n".join(lines) + b"\n"
+            lines = []
+    if lines:
+        yield b"\n".join(lines) + b"\n"
+
+
+def gzip_chunks(chunks):
+    """Compress a byte stream, flushing each chunk so it reaches clients"""
+    compressor = zlib.compressobj(wbits=zlib.MAX_WBITS | 16)
+    for chunk in chunks:
+        yield compressor.compress(chunk) + compressor.flush(zlib.Z_SYNC_FLUSH)
+    yield compressor.flush()
+
+
+def export_chunks(output, compress=False, **options):
+    """Encoded export stream of the given format, gzipped on request"""
+    encode = csv_chunks if output == "csv" else ndjson_chunks
+    chunks = encode(export_rows(**options))
+    return gzip_chunks(chunks) if compress else chunks
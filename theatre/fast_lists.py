@@ -0,0 +1,171 @@
+from collections import defaultdict
+
+from rest_framework.fields import DateTimeField
+from rest_framework.renderers import BrowsableAPIRenderer
+from rest_framework.response import Response
+
+from theatre.models import Play
+from theatre.renderers import ORJSONRenderer
+
+
+class ValuesListSerializer:
+    """
+    Build list representations from values() rows in one pass, skipping
+    the per-object field machinery of ModelSerializer. Subclasses must
+    produce exactly what the serializer they stand in for produces.
+    """
+
+    # {output key: columns it is built from}
+    columns = {}
+
+    def __init__(self, request, sparse_fields=None):
+        self.request = request
+        self.keys = [
+            key
+            for key in self.columns
+            if sparse_fields is None or key in sparse_fields
+        ]
+
+    def prepare(self, queryset):
+        columns = {"id"}
+        for key in self.keys:
+            columns.update(self.columns[key])
+        # Pagination reads the ordering fields, which may be annotations
+        ordering = queryset.query.order_by or queryset.model._meta.ordering
+        columns.update(field.lstrip("-") for field in ordering)
+        columns.update(queryset.query.annotations)
+        return queryset.prefetch_related(None).values(*columns)
+
+    def prune(self, items):
+        if len(self.keys) == len(self.columns):
+            return items
+        return [{key: item[key] for key in self.keys} for item in items]
+
+    def image_url(self, name):
+        if not name:
+            return None
+        url = Play._meta.get_field("image").storage.url(name)
+        return self.request.build_absolute_uri(url)
+
+    def to_representation(self, rows):
+        raise NotImplementedError
+
+
+class PlayListValuesSerializer(ValuesListSerializer):
+    """Stands in for PlayListSerializer"""
+
+    columns = {
+        "id": ("id",),
+        "title": ("title",),
+        "description": ("description",),
+        "genres": (),
+        "actors": (),
+        "image": ("image",),
+    }
+
+    def _names(self, relation, play_ids, order_by, *name_columns):
+        names = defaultdict(list)
+        if relation not in self.keys:
+            return names
+        for play_id, *parts in (
+            getattr(Play, relation).through.objects.filter(
+                play_id__in=play_ids
+            )
+            .order_by(order_by)
+            .values_list("play_id", *name_columns)
+        ):
+            names[play_id].append(" ".join(parts))
+        return names
+
+    def to_representation(self, rows):
+        play_ids = [row["id"] for row in rows]
+        genres = self._names("genres", play_ids, "genre__name", "genre__name")
+        actors = self._names(
+            "actors",
+            play_ids,
+            "actor_id",
+            "actor__first_name",
+            "actor__last_name",
+        )
+        return self.prune(
+            [
+                {
+                    "id": row["id"],
+                    "title": row.get("title"),
+                    "description": row.get("description"),
+                    "genres": genres[row["id"]],
+                    "actors": actors[row["id"]],
+                    "image": self.image_url(row.get("image")),
+                }
+                for row in rows
+            ]
+        )
+
+
+class PerformanceListValuesSerializer(ValuesListSerializer):
+    """Stands in for PerformanceListSerializer"""
+
+    columns = {
+        "id": ("id",),
+        "show_time": ("show_time",),
+        "play_title": ("play__title",),
+        "play_image": ("play__image",),
+        "theatre_hall_name": ("theatre_hall__name",),
+        "theatre_hall_capacity": (
+            "theatre_hall__rows",
+            "theatre_hall__seats_in_row",
+        ),
+        "tickets_available": (),
+    }
+
+    def to_representation(self, rows):
+        show_time = DateTimeField()
+        capacity = "theatre_hall_capacity" in self.keys
+        return self.prune(
+            [
+                {
+                    "id": row["id"],
+                    "show_time": show_time.to_representation(
+                        row["show_time"]
+                    ),
+                    "play_title": row.get("play__title"),
+                    "play_image": self.image_url(row.get("play__image")),
+                    "theatre_hall_name": row.get("theatre_hall__name"),
+                    "theatre_hall_capacity": (
+                        row["theatre_hall__rows"]
+                        * row["theatre_hall__seats_in_row"]
+                        if capacity
+                        else None
+                    ),
+                    "tickets_available": row["tickets_available"],
+                }
+                for row in rows
+            ]
+        )
+
+
+class FastListMixin:
+    """
+    Opt-in list path: the viewset names a `fast_list_serializer` and list
+    responses are built from values() rows and rendered with orjson.
+    """
+
+    fast_list_serializer = None
+    renderer_classes = (ORJSONRenderer, BrowsableAPIRenderer)
+
+    def list(self, request, *args, **kwargs):
+        if self.fast_list_serializer is None:
+            return super().list(request, *args, **kwargs)
+
+        serializer = self.fast_list_serializer(
+            request, getattr(self, "sparse_fields", None)
+        )
+        queryset = serializer.prepare(
+            self.filter_queryset(self.get_queryset())
+        )
+        page = self.paginate_queryset(queryset)
+        if page is not None:
+            return self.get_paginated_response(
+                serializer.to_representation(page)
+            )
+        return Response(serializer.to_representation(list(queryset)))
@@ -0,0 +1,294 @@
+from collections import defaultdict
+
+import orjson
+from django.db import transaction
+from rest_framework.exceptions import ValidationError
+
+from theatre.models import (
+    Genre,
+    Actor,
+    Play,
+    TheatreHall,
+    Performance,
+    ChangeLogEntry,
+    OccupancyRollup,
+    rollup_key,
+)
+from theatre.exceptions import HallConflict
+from theatre.response_cache import bump_version
+from theatre.scheduling import split_conflicts
+from theatre.search import build_search_document
+from theatre.serializers import CATALOG_IMPORT_SERIALIZERS
+
+IMPORT_TYPES = tuple(CATALOG_IMPORT_SERIALIZERS)
+
+
+def _ids_by_key(rows):
+    """{key: id} from (key, id) rows, the lowest id wins for duplicates"""
+    ids = {}
+    for key, object_id in rows:
+        ids.setdefault(key, object_id)
+    return ids
+
+
+def _resolve(ids, names, field, errors):
+    """Distinct ids of `names`, recording the unknown ones in `errors`"""
+    resolved = {}
+    for name in names:
+        if name in ids:
+            resolved[ids[name]] = None
+        else:
+            errors.setdefault(field, []).append(f"Unknown name: {name}.")
+    return list(resolved)
+
+
+class CatalogImport:
+    """
+    Upsert genres, actors, plays and performances from NDJSON lines such
+    as {"type": "play", "title": ..., "genres": [...], "actors": [...]}.
+
+    Records refer to each other by name: genres by name, actors by
+    "first_name last_name", plays by title and theatre halls by name.
+    Names resolve through in-memory maps loaded once, so an import costs
+    a handful of bulk statements however many lines it has. A play line
+    is the full record, its description, genres and actors replace the
+    stored ones. Performances that already exist are left alone, and
+    ones that would overlap another in their hall are rejected.
+    Invalid lines are reported with their line number and skipped.
+    """
+
+    def __init__(self, batch_size=1000):
+        self.batch_size = batch_size
+        self.records = {record_type: [] for record_type in IMPORT_TYPES}
+        self.created = dict.fromkeys(IMPORT_TYPES, 0)
+        self.updated = dict.fromkeys(IMPORT_TYPES, 0)
+        self.errors = []
+
+    def run(self, lines):
+        self.read(lines)
+        with transaction.atomic():
+            genres = self.import_genres()
+            actors = self.import_actors()
+            plays = self.import_plays(genres, actors)
+            self.import_performances(plays)
+            for model in (Genre, Actor, Play):
+                name = model._meta.model_name
+                if self.created[name] or self.updated[name]:
+                    bump_version(model)
+        return self.report()
+
+    def report(self):
+        return {
+            "created": self.created,
+            "updated": self.updated,
+            "errors": sorted(self.errors, key=lambda error: error["line"]),
+        }
+
+    def _error(self, line, errors):
+        self.errors.append({"line": line, "errors": errors})
+
+    def read(self, lines):
+        # One serializer per type, reused through run_validation()
+        validators = {
+            record_type: serializer_class()
+            for record_type, serializer_class
+            in CATALOG_IMPORT_SERIALIZERS.items()
+        }
+        for number, line in enumerate(lines, 1):
+            if not line.strip():
+                continue
+            try:
+                record = orjson.loads(line)
+            except orjson.JSONDecodeError:
+                self._error(number, {"non_field_errors": ["Invalid JSON."]})
+                continue
+
+            record_type = (
+                record.get("type") if isinstance(record, dict) else None
+            )
+            if record_type not in validators:
+                self._error(
+                    number,
+                    {"type": [f"Must be one of: {', '.join(IMPORT_TYPES)}."]},
+                )
+                continue
+            try:
+                data = validators[record_type].run_validation(record)
+            except ValidationError as error:
+                self._error(number, error.detail)
+                continue
+            self.records[record_type].append((number, data))
+
+    def _log(self, model, object_ids, action):
+        object_ids = list(object_ids)
+        if not object_ids:
+            return
+        counts = (
+            self.created if action == ChangeLogEntry.Action.CREATED
+            else self.updated
+        )
+        counts[model._meta.model_name] += len(object_ids)
+        # bulk_create sends no signals, so do what the receivers would
+        ChangeLogEntry.objects.record(model, object_ids, action)
+
+    def import_genres(self):
+        genres = dict(Genre.objects.values_list("name", "id"))
+        new = {
+            data["name"] for _, data in self.records["genre"]
+        } - genres.keys()
+        if new:
+            # Names are unique, a concurrent import may have added some
+            Genre.objects.bulk_create(
+                [Genre(name=name) for name in new],
+                batch_size=self.batch_size,
+                ignore_conflicts=True,
+            )
+            created = dict(
+                Genre.objects.filter(name__in=new).values_list("name", "id")
+            )
+            genres.update(created)
+            self._log(Genre, created.values(), ChangeLogEntry.Action.CREATED)
+        return genres
+
+    def import_actors(self):
+        actors = _ids_by_key(
+            (f"{first_name} {last_name}", actor_id)
+            for first_name, last_name, actor_id in Actor.objects.order_by(
+                "id"
+            ).values_list("first_name", "last_name", "id")
+        )
+        new = {}
+        for _, data in self.records["actor"]:
+            name = f"{data['first_name']} {data['last_name']}"
+            if name not in actors:
+                new[name] = Actor(**data)
+        Actor.objects.bulk_create(new.values(), batch_size=self.batch_size)
+
+        actors.update((name, actor.id) for name, actor in new.items())
+        self._log(
+            Actor,
+            (actor.id for actor in new.values()),
+            ChangeLogEntry.Action.CREATED,
+        )
+        return actors
+
+    def import_plays(self, genres, actors):
+        plays = _ids_by_key(
+            Play.objects.order_by("id").values_list("title", "id")
+        )
+        rows = {}
+        for number, data in self.records["play"]:
+            errors = {}
+            genre_ids = _resolve(genres, data["genres"], "genres", errors)
+            actor_ids = _resolve(actors, data["actors"], "actors", errors)
+            if errors:
+                self._error(number, errors)
+                continue
+            play = Play(
+                id=plays.get(data["title"]),
+                title=data["title"],
+                description=data["description"],
+                search_document=build_search_document(
+                    data["title"], data["description"], data["actors"]
+                ),
+            )
+            # A title repeated in the file keeps its last line
+            rows[play.title] = (play, genre_ids, actor_ids)
+
+        created = [play for play, _, _ in rows.values() if play.id is None]
+        updated = [play for play, _, _ in rows.values() if play.id]
+        Play.objects.bulk_create(created, batch_size=self.batch_size)
+        Play.objects.bulk_create(
+            updated,
+            batch_size=self.batch_size,
+            update_conflicts=True,
+            unique_fields=["id"],
+            update_fields=["description", "search_document"],
+        )
+
+        updated_ids = [play.id for play in updated]
+        for through, column, position in (
+            (Play.genres.through, "genre_id", 1),
+            (Play.actors.through, "actor_id", 2),
+        ):
+            through.objects.filter(play_id__in=updated_ids).delete()
+            through.objects.bulk_create(
+                (
+                    through(play_id=row[0].id, **{column: related_id})
+                    for row in rows.values()
+                    for related_id in row[position]
+                ),
+                batch_size=self.batch_size,
+            )
+
+        plays.update((play.title, play.id) for play in created)
+        self._log(
+            Play,
+            (play.id for play in created),
+            ChangeLogEntry.Action.CREATED,
+        )
+        self._log(Play, updated_ids, ChangeLogEntry.Action.UPDATED)
+        return plays
+
+    def import_performances(self, plays):
+        halls = _ids_by_key(
+            TheatreHall.objects.order_by("id").values_list("name", "id")
+        )
+        keys = {}
+        for number, data in self.records["performance"]:
+            errors = {}
+            play_id = plays.get(data["play"])
+            hall_id = halls.get(data["theatre_hall"])
+            if play_id is None:
+                errors["play"] = [f"Unknown play: {data['play']}."]
+            if hall_id is None:
+                errors["theatre_hall"] = [
+                    f"Unknown theatre hall: {data['theatre_hall']}."
+                ]
+            if errors:
+                self._error(number, errors)
+                continue
+            keys[(play_id, hall_id, data["show_time"])] = number
+
+        play_ids = {play_id for play_id, _, _ in keys}
+        existing = set(
+            Performance.objects.filter(play_id__in=play_ids).values_list(
+                "play_id", "theatre_hall_id", "show_time"
+            )
+        )
+        durations = dict(
+            Play.objects.filter(id__in=play_ids).values_list("id", "duration")
+        )
+        slots_by_hall = defaultdict(list)
+        for (play_id, hall_id, show_time), number in keys.items():
+            if (play_id, hall_id, show_time) not in existing:
+                end_time = show_time + durations[play_id]
+                slots_by_hall[hall_id].append(
+                    (show_time, end_time, play_id, number)
+                )
+
+        new = []
+        for hall_id, slots in slots_by_hall.items():
+            free, conflicts = split_conflicts(hall_id, sorted(slots))
+            for slot, _ in conflicts:
+                self._error(
+                    slot[3], {"show_time": [HallConflict.default_detail]}
+                )
+            new += [
+                Performance(
+                    play_id=play_id,
+                    theatre_hall_id=hall_id,
+                    show_time=show_time,
+                    end_time=end_time,
+                )
+                for show_time, end_time, play_id, _ in free
+            ]
+        Performance.objects.bulk_create(new, batch_size=self.batch_size)
+        OccupancyRollup.objects.refresh(
+            rollup_key(performance) for performance in new
+        )
+        self._log(
+            Performance,
+            (performance.id for performance in new),
+            ChangeLogEntry.Action.CREATED,
+        )
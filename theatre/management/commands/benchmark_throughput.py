@@ -0,0 +1,100 @@
+import http.client
+import time
+from concurrent.futures import ThreadPoolExecutor
+from statistics import quantiles
+from urllib.parse import urlsplit
+
+from django.core.management import BaseCommand, CommandError
+
+
+class Command(BaseCommand):
+    """
+    Measure the throughput and latency of a running server over
+    keep-alive connections, e.g. runserver against `manage.py serve`
+    """
+
+    def add_arguments(self, parser):
+        parser.add_argument("url")
+        parser.add_argument("--concurrency", type=int, default=16)
+        parser.add_argument(
+            "--duration", type=float, default=10, help="Seconds"
+        )
+        parser.add_argument(
+            "--header",
+            action="append",
+            default=[],
+            help='Request header, e.g. "Authorization: Bearer <token>"',
+        )
+
+    @staticmethod
+    def _client(url, headers, deadline):
+        parts = urlsplit(url)
+        path = parts.path + (f"?{parts.query}" if parts.query else "")
+        connection = None
+        latencies = []
+        errors = 0
+        while time.perf_counter() < deadline:
+            if connection is None:
+                connection = http.client.HTTPConnection(
+                    parts.hostname, parts.port or 80, timeout=30
+                )
+            started = time.perf_counter()
+            try:
+                connection.request("GET", path, headers=headers)
+                response = connection.getresponse()
+                response.read()
+            except (OSError, http.client.HTTPException):
+                errors += 1
+                connection.close()
+                connection = None
+                continue
+
+            if response.status == 200:
+                latencies.append(time.perf_counter() - started)
+            else:
+                errors += 1
+            if response.will_close:
+                connection.close()
+                connection = None
+        if connection is not None:
+            connection.close()
+        return latencies, errors
+
+    def handle(self, *args, **options):
+        try:
+            headers = dict(
+                (name.strip(), value.strip())
+                for name, value in (
+                    header.split(":", 1) for header in options["header"]
+                )
+            )
+        except ValueError:
+            raise CommandError("Headers must look like 'Name: value'")
+
+        deadline = time.perf_counter() + options["duration"]
+        with ThreadPoolExecutor(options["concurrency"]) as executor:
+            results = list(
+                executor.map(
+                    lambda _: self._client(options["url"], headers, deadline),
+                    range(options["concurrency"]),
+                )
+            )
+
+        latencies = sorted(
+            latency for client_latencies, _ in results
+            for latency in client_latencies
+        )
+        errors = sum(client_errors for _, client_errors in results)
+        if len(latencies) < 2:
+            raise CommandError(
+                f"Too few successful requests ({errors} failed)"
+            )
+
+        percentiles = quantiles(latencies, n=100)
+        self.stdout.write(
+            f"{len(latencies)} requests, {errors} errors, "
+            f"{len(latencies) / options['duration']:.1f} requests/s, "
+            f"latency p50 {percentiles[49] * 1000:.1f} ms, "
+            f"p95 {percentiles[94] * 1000:.1f} ms, "
+            f"p99 {percentiles[98] * 1000:.1f} ms"
+        )
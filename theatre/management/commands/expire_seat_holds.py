@@ -0,0 +1,16 @@
+from django.core.management import BaseCommand
+from django.utils import timezone
+
+from theatre.models import SeatHold
+
+
+class Command(BaseCommand):
+    """Delete seat holds past their expiry time"""
+
+    def handle(self, *args, **options):
+        deleted, _ = SeatHold.objects.filter(
+            expires_at__lte=timezone.now()
+        ).delete()
+        self.stdout.write(
+            self.style.SUCCESS(f"Deleted {deleted} expired hold row(s)")
+        )
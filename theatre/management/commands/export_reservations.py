@@ -0,0 +1,61 @@
+import sys
+from datetime import date, datetime, time, timedelta
+
+from django.core.management import BaseCommand
+from django.utils import timezone
+
+from theatre.exports import EXPORT_FORMATS, export_chunks
+
+
+def local_midnight(day):
+    return timezone.make_aware(datetime.combine(day, time.min))
+
+
+class Command(BaseCommand):
+    """
+    Stream the tickets of all reservations to a file as CSV or NDJSON,
+    reading them through a server-side cursor
+    """
+
+    def add_arguments(self, parser):
+        parser.add_argument("path", help="Output file, - for stdout")
+        parser.add_argument("--output", choices=EXPORT_FORMATS, default="csv")
+        parser.add_argument("--gzip", action="store_true")
+        parser.add_argument(
+            "--date-from",
+            type=date.fromisoformat,
+            help="First performance day (YYYY-MM-DD)",
+        )
+        parser.add_argument(
+            "--date-to",
+            type=date.fromisoformat,
+            help="Last performance day (YYYY-MM-DD)",
+        )
+        parser.add_argument("--chunk-size", type=int, default=2000)
+
+    def handle(self, *args, **options):
+        date_from = options["date_from"]
+        date_to = options["date_to"]
+        chunks = export_chunks(
+            options["output"],
+            options["gzip"],
+            show_time_from=local_midnight(date_from) if date_from else None,
+            show_time_to=(
+                local_midnight(date_to + timedelta(days=1))
+                if date_to
+                else None
+            ),
+            chunk_size=options["chunk_size"],
+        )
+
+        if options["path"] == "-":
+            self._write(sys.stdout.buffer, chunks)
+        else:
+            with open(options["path"], "wb") as export_file:
+                self._write(export_file, chunks)
+
+    @staticmethod
+    def _write(stream, chunks):
+        for chunk in chunks:
+            stream.write(chunk)
+        stream.flush()
@@ -0,0 +1,37 @@
+import sys
+
+from django.core.management import BaseCommand
+
+from theatre.imports import CatalogImport
+
+
+class Command(BaseCommand):
+    """
+    Upsert genres, actors, plays and performances from an NDJSON file,
+    one {"type": ...} record per line
+    """
+
+    def add_arguments(self, parser):
+        parser.add_argument("path", help="NDJSON file, - for stdin")
+        parser.add_argument("--batch-size", type=int, default=1000)
+
+    def handle(self, *args, **options):
+        catalog_import = CatalogImport(batch_size=options["batch_size"])
+        if options["path"] == "-":
+            report = catalog_import.run(sys.stdin.buffer)
+        else:
+            with open(options["path"], "rb") as import_file:
+                report = catalog_import.run(import_file)
+
+        for error in report["errors"]:
+            self.stderr.write(f"Line {error['line']}: {error['errors']}")
+        for record_type, count in report["created"].items():
+            updated = report["updated"][record_type]
+            self.stdout.write(
+                f"{record_type}: {count} created, {updated} updated"
+            )
+        self.stdout.write(
+            self.style.SUCCESS(
+                f"Imported with {len(report['errors'])} invalid line(s)"
+            )
+        )
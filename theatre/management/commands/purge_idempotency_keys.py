@@ -0,0 +1,16 @@
+from django.core.management import BaseCommand
+from django.utils import timezone
+
+from theatre.models import IdempotencyKey
+
+
+class Command(BaseCommand):
+    """Delete stored idempotency keys past their expiry time"""
+
+    def handle(self, *args, **options):
+        deleted, _ = IdempotencyKey.objects.filter(
+            expires_at__lte=timezone.now()
+        ).delete()
+        self.stdout.write(
+            self.style.SUCCESS(f"Deleted {deleted} expired key(s)")
+        )
@@ -0,0 +1,23 @@
+from django.core.management import BaseCommand
+from django.db import transaction
+
+from theatre.models import OccupancyRollup
+
+
+class Command(BaseCommand):
+    """
+    Rebuild the occupancy rollups from the performance counters, e.g.
+    after restoring a backup or changing performances outside the ORM
+    """
+
+    def add_arguments(self, parser):
+        parser.add_argument("--batch-size", type=int, default=1000)
+
+    def handle(self, *args, **options):
+        with transaction.atomic():
+            rollups = OccupancyRollup.objects.rebuild(
+                batch_size=options["batch_size"]
+            )
+        self.stdout.write(
+            self.style.SUCCESS(f"Rebuilt {len(rollups)} rollup row(s)")
+        )
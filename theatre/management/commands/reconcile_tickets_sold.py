@@ -0,0 +1,47 @@
+from django.core.management import BaseCommand
+from django.db.models import Count, F
+from django.utils import timezone
+
+from theatre.models import Performance, OccupancyRollup, rollup_key
+
+
+class Command(BaseCommand):
+    """Recount Performance.tickets_sold from the ticket table"""
+
+    def add_arguments(self, parser):
+        parser.add_argument("--batch-size", type=int, default=1000)
+
+    def handle(self, *args, **options):
+        drifted = (
+            Performance.objects.annotate(actual=Count("tickets"))
+            .exclude(tickets_sold=F("actual"))
+            .only(
+                "id",
+                "play_id",
+                "theatre_hall_id",
+                "show_time",
+                "tickets_sold",
+                "updated_at",
+            )
+        )
+        fixed = []
+        for performance in drifted.iterator(chunk_size=options["batch_size"]):
+            self.stdout.write(
+                f"Performance {performance.id}: "
+                f"{performance.tickets_sold} -> {performance.actual}"
+            )
+            performance.tickets_sold = performance.actual
+            performance.updated_at = timezone.now()
+            fixed.append(performance)
+
+        Performance.objects.bulk_update(
+            fixed,
+            ["tickets_sold", "updated_at"],
+            batch_size=options["batch_size"],
+        )
+        OccupancyRollup.objects.refresh(
+            rollup_key(performance) for performance in fixed
+        )
+        self.stdout.write(
+            self.style.SUCCESS(f"Reconciled {len(fixed)} performance(s)")
+        )
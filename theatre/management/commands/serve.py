@@ -0,0 +1,38 @@
+import os
+import sys
+
+from django.conf import settings
+from django.core.management import BaseCommand
+
+
+class Command(BaseCommand):
+    """
+    Run the production server: gunicorn with the settings of
+    gunicorn.conf.py, which reads workers, threads and keep-alive from
+    GUNICORN_* environment variables
+    """
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "gunicorn_options",
+            nargs="*",
+            help="Extra gunicorn options after --, e.g. -- --workers 4",
+        )
+
+    def handle(self, *args, **options):
+        if settings.DEBUG:
+            self.stderr.write(
+                "DEBUG is on, set DJANGO_DEBUG=False outside development"
+            )
+        argv = [
+            sys.executable,
+            "-m",
+            "gunicorn",
+            "--config",
+            str(settings.BASE_DIR / "gunicorn.conf.py"),
+            *options["gunicorn_options"],
+        ]
+        self.stdout.write(f"Starting {' '.join(argv[2:])}")
+        self.stdout.flush()
+        # Replace this process, so signals reach the gunicorn master
+        os.execv(sys.executable, argv)
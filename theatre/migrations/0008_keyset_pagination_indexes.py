@@ -0,0 +1,31 @@
+# Generated by Django 4.2.4 on 2026-10-18 02:35
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("theatre", "0007_idempotencykey"),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name="performance",
+            index=models.Index(
+                fields=["show_time", "id"], name="theatre_per_show_ti_32e341_idx"
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="play",
+            index=models.Index(
+                fields=["title", "id"], name="theatre_pla_title_97f6e4_idx"
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="reservation",
+            index=models.Index(
+                fields=["user", "created_at", "id"],
+                name="theatre_res_user_id_1c2592_idx",
+            ),
+        ),
+    ]
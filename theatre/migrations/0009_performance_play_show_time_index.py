@@ -0,0 +1,18 @@
+# Generated by Django 4.2.4 on 2026-10-18 02:37
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("theatre", "0008_keyset_pagination_indexes"),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name="performance",
+            index=models.Index(
+                fields=["play", "show_time"], name="theatre_per_play_id_1e3e93_idx"
+            ),
+        ),
+    ]
@@ -0,0 +1,63 @@
+# Generated by Django 4.2.4 on 2026-10-18 02:38
+
+from collections import defaultdict
+
+from django.contrib.postgres.operations import TrigramExtension
+from django.db import migrations, models
+
+TRIGRAM_INDEXES = {
+    "theatre_play_title_trgm_idx": "UPPER(title) gin_trgm_ops",
+    "theatre_play_search_document_trgm_idx": "search_document gin_trgm_ops",
+}
+
+
+def fill_search_documents(apps, schema_editor):
+    Play = apps.get_model("theatre", "Play")
+    actor_names = defaultdict(list)
+    for play_id, first_name, last_name in Play.actors.through.objects.values_list(
+        "play_id", "actor__first_name", "actor__last_name"
+    ):
+        actor_names[play_id].append(f"{first_name} {last_name}")
+
+    plays = list(Play.objects.only("id", "title", "description"))
+    for play in plays:
+        play.search_document = " ".join(
+            part
+            for part in (play.title, play.description, *actor_names[play.id])
+            if part
+        ).lower()
+    Play.objects.bulk_update(plays, ["search_document"], batch_size=1000)
+
+
+def create_trigram_indexes(apps, schema_editor):
+    if schema_editor.connection.vendor != "postgresql":
+        return
+    for name, expression in TRIGRAM_INDEXES.items():
+        schema_editor.execute(
+            f"CREATE INDEX IF NOT EXISTS {name} "
+            f"ON theatre_play USING gin ({expression})"
+        )
+
+
+def drop_trigram_indexes(apps, schema_editor):
+    if schema_editor.connection.vendor != "postgresql":
+        return
+    for name in TRIGRAM_INDEXES:
+        schema_editor.execute(f"DROP INDEX IF EXISTS {name}")
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("theatre", "0009_performance_play_show_time_index"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="play",
+            name="search_document",
+            field=models.TextField(blank=True, default="", editable=False),
+        ),
+        migrations.RunPython(fill_search_documents, migrations.RunPython.noop),
+        TrigramExtension(),
+        migrations.RunPython(create_trigram_indexes, drop_trigram_indexes),
+    ]
@@ -0,0 +1,20 @@
+from django.db import migrations
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("theatre", "0010_play_search"),
+    ]
+
+    operations = [
+        migrations.RunSQL(
+            "CREATE INDEX theatre_play_genres_genre_play_idx "
+            "ON theatre_play_genres (genre_id, play_id)",
+            "DROP INDEX theatre_play_genres_genre_play_idx",
+        ),
+        migrations.RunSQL(
+            "CREATE INDEX theatre_play_actors_actor_play_idx "
+            "ON theatre_play_actors (actor_id, play_id)",
+            "DROP INDEX theatre_play_actors_actor_play_idx",
+        ),
+    ]
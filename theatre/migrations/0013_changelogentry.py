@@ -0,0 +1,64 @@
+# Generated by Django 4.2.4 on 2026-10-18 02:51
+
+from django.db import migrations, models
+
+LOGGED_MODELS = ["genre", "actor", "play", "theatrehall", "performance"]
+
+
+def seed_change_log(apps, schema_editor):
+    """Log existing rows as created so a sync from zero sees them"""
+    ChangeLogEntry = apps.get_model("theatre", "ChangeLogEntry")
+    for model_name in LOGGED_MODELS:
+        Model = apps.get_model("theatre", model_name)
+        ChangeLogEntry.objects.bulk_create(
+            (
+                ChangeLogEntry(
+                    model=model_name, object_id=object_id, action="created"
+                )
+                for object_id in Model.objects.order_by("id").values_list(
+                    "id", flat=True
+                )
+            ),
+            batch_size=1000,
+        )
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("theatre", "0012_performance_updated_at"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="ChangeLogEntry",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                ("model", models.CharField(max_length=32)),
+                ("object_id", models.BigIntegerField()),
+                (
+                    "action",
+                    models.CharField(
+                        choices=[
+                            ("created", "Created"),
+                            ("updated", "Updated"),
+                            ("deleted", "Deleted"),
+                        ],
+                        max_length=7,
+                    ),
+                ),
+                ("created_at", models.DateTimeField(auto_now_add=True)),
+            ],
+            options={
+                "ordering": ["id"],
+            },
+        ),
+        migrations.RunPython(seed_change_log, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,101 @@
+# Generated by Django 4.2.4 on 2026-10-18 03:12
+
+import datetime
+
+from django.contrib.postgres.operations import BtreeGistExtension
+from django.db import migrations, models
+from django.db.models import ExpressionWrapper, F, OuterRef, Subquery
+
+HALL_OVERLAP_CONSTRAINT = "theatre_performance_hall_no_overlap"
+
+
+def fill_end_times(apps, schema_editor):
+    Performance = apps.get_model("theatre", "Performance")
+    Play = apps.get_model("theatre", "Play")
+    duration = Play.objects.filter(pk=OuterRef("play_id")).values(
+        "duration"
+    )[:1]
+    Performance.objects.update(
+        end_time=ExpressionWrapper(
+            F("show_time") + Subquery(duration),
+            output_field=models.DateTimeField(),
+        )
+    )
+
+
+def create_hall_overlap_constraint(apps, schema_editor):
+    if schema_editor.connection.vendor != "postgresql":
+        return
+    with schema_editor.connection.cursor() as cursor:
+        cursor.execute(
+            "SELECT earlier.theatre_hall_id, earlier.id, later.id "
+            "FROM theatre_performance earlier "
+            "JOIN theatre_performance later "
+            "ON later.theatre_hall_id = earlier.theatre_hall_id "
+            "AND later.id > earlier.id "
+            "AND later.show_time < earlier.end_time "
+            "AND later.end_time > earlier.show_time "
+            "ORDER BY 1, 2, 3 LIMIT 100"
+        )
+        overlaps = cursor.fetchall()
+    if overlaps:
+        # The constraint cannot be added over them, and which performance
+        # to move or cancel is not ours to decide
+        raise RuntimeError(
+            "Performances overlap in their theatre hall, reschedule or "
+            "delete one of each pair and migrate again: "
+            + ", ".join(
+                f"hall {hall_id}: performances {first_id} and {second_id}"
+                for hall_id, first_id, second_id in overlaps
+            )
+        )
+    schema_editor.execute(
+        f"ALTER TABLE theatre_performance "
+        f"ADD CONSTRAINT {HALL_OVERLAP_CONSTRAINT} EXCLUDE USING gist "
+        f"(theatre_hall_id WITH =, tstzrange(show_time, end_time) WITH &&)"
+    )
+
+
+def drop_hall_overlap_constraint(apps, schema_editor):
+    if schema_editor.connection.vendor != "postgresql":
+        return
+    schema_editor.execute(
+        f"ALTER TABLE theatre_performance "
+        f"DROP CONSTRAINT IF EXISTS {HALL_OVERLAP_CONSTRAINT}"
+    )
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("theatre", "0013_changelogentry"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="play",
+            name="duration",
+            field=models.DurationField(default=datetime.timedelta(seconds=7200)),
+        ),
+        migrations.AddField(
+            model_name="performance",
+            name="end_time",
+            field=models.DateTimeField(editable=False, null=True),
+        ),
+        migrations.RunPython(fill_end_times, migrations.RunPython.noop),
+        migrations.AlterField(
+            model_name="performance",
+            name="end_time",
+            field=models.DateTimeField(editable=False),
+        ),
+        migrations.AddIndex(
+            model_name="performance",
+            index=models.Index(
+                fields=["theatre_hall", "show_time"],
+                name="theatre_per_theatre_2b9613_idx",
+            ),
+        ),
+        BtreeGistExtension(),
+        migrations.RunPython(
+            create_hall_overlap_constraint, drop_hall_overlap_constraint
+        ),
+    ]
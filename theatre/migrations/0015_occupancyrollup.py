@@ -0,0 +1,83 @@
+# Generated by Django 4.2.4 on 2026-10-18 03:16
+
+from django.db import migrations, models
+from django.db.models import Count, F, Sum
+from django.db.models.functions import TruncDate
+from django.utils import timezone
+import django.db.models.deletion
+
+
+def build_rollups(apps, schema_editor):
+    Performance = apps.get_model("theatre", "Performance")
+    OccupancyRollup = apps.get_model("theatre", "OccupancyRollup")
+    rows = (
+        Performance.objects.order_by()
+        .annotate(
+            day=TruncDate("show_time", tzinfo=timezone.get_current_timezone())
+        )
+        .values("day", "play_id", "theatre_hall_id")
+        .annotate(
+            performances=Count("id"),
+            capacity=Sum(
+                F("theatre_hall__rows") * F("theatre_hall__seats_in_row")
+            ),
+            tickets_sold=Sum("tickets_sold"),
+        )
+    )
+    OccupancyRollup.objects.bulk_create(
+        (OccupancyRollup(**row) for row in rows), batch_size=1000
+    )
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("theatre", "0014_performance_end_time"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="OccupancyRollup",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                ("day", models.DateField()),
+                ("performances", models.PositiveIntegerField(default=0)),
+                ("capacity", models.PositiveIntegerField(default=0)),
+                ("tickets_sold", models.PositiveIntegerField(default=0)),
+                (
+                    "play",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="+",
+                        to="theatre.play",
+                    ),
+                ),
+                (
+                    "theatre_hall",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="+",
+                        to="theatre.theatrehall",
+                    ),
+                ),
+            ],
+            options={
+                "ordering": ["day"],
+            },
+        ),
+        migrations.AddConstraint(
+            model_name="occupancyrollup",
+            constraint=models.UniqueConstraint(
+                fields=("day", "play", "theatre_hall"),
+                name="theatre_occupancy_rollup_unique_key",
+            ),
+        ),
+        migrations.RunPython(build_rollups, migrations.RunPython.noop),
+    ]
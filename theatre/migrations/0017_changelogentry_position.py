@@ -0,0 +1,35 @@
+# Generated by Django 4.2.4 on 2026-10-18 04:23
+
+from django.db import migrations, models
+from django.db.models import F
+
+
+def number_existing_entries(apps, schema_editor):
+    # Positions continue the ids, so cursors handed out before stay valid
+    ChangeLogEntry = apps.get_model("theatre", "ChangeLogEntry")
+    ChangeLogEntry.objects.update(position=F("id"))
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("theatre", "0016_cacheversion"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="changelogentry",
+            name="position",
+            field=models.BigIntegerField(null=True, unique=True),
+        ),
+        migrations.RunPython(
+            number_existing_entries, migrations.RunPython.noop
+        ),
+        migrations.AddIndex(
+            model_name="changelogentry",
+            index=models.Index(
+                condition=models.Q(("position__isnull", True)),
+                fields=["id"],
+                name="theatre_changelog_unnumbered",
+            ),
+        ),
+    ]
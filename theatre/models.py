@@ -1,9 +1,15 @@
 import os
 import uuid
+from datetime import datetime, time, timedelta
 
 from django.conf import settings
 from django.core.exceptions import ValidationError
-from django.db import models
+from django.db import connections, models, transaction
+from django.db.models import (
+    F, Q, Count, Exists, Max, OuterRef, Subquery, Sum
+)
+from django.db.models.functions import Coalesce, Greatest, Now, TruncDate
+from django.utils import timezone
 from django.utils.text import slugify
 
 
@@ -36,15 +42,53 @@ def play_image_file_path(instance, filename):
     return os.path.join("uploads/plays/", filename)
 
 
+class PlayQuerySet(models.QuerySet):
+    def _with_related(self, through, column, ids, match_all=False):
+        """
+        Semi-join on a many-to-many through table: plays linked to any of
+        `ids`, or to all of them with `match_all`, without duplicate rows.
+        """
+        ids = set(ids)
+        linked = through.objects.filter(**{f"{column}__in": ids})
+        if not match_all:
+            return self.filter(Exists(linked.filter(play_id=OuterRef("pk"))))
+        return self.filter(
+            pk__in=linked.order_by()
+            .values("play_id")
+            .annotate(matched=Count(column))
+            .filter(matched=len(ids))
+            .values("play_id")
+        )
+
+    def with_genres(self, ids, match_all=False):
+        return self._with_related(
+            Play.genres.through, "genre_id", ids, match_all
+        )
+
+    def with_actors(self, ids, match_all=False):
+        return self._with_related(
+            Play.actors.through, "actor_id", ids, match_all
+        )
+
+
 class Play(models.Model):
     title = models.CharField(max_length=255)
     description = models.TextField(null=True, blank=True)
     genres = models.ManyToManyField(Genre, blank=True, related_name="plays")
     actors = models.ManyToManyField(Actor, blank=True, related_name="plays")
     image = models.ImageField(null=True, upload_to=play_image_file_path)
+    duration = models.DurationField(default=timedelta(hours=2))
+    # Lowercased title, description and actor names kept in sync by
+    # signals, trigram-indexed on PostgreSQL for search
+    search_document = models.TextField(blank=True,
+                                       default="",
+                                       editable=False)
+
+    objects = PlayQuerySet.as_manager()
 
     class Meta:
         ordering = ["title"]
+        indexes = [models.Index(fields=["title", "id"])]
 
     def __str__(self):
         return self.title
@@ -63,6 +107,70 @@ class TheatreHall(models.Model):
         return self.name
 
 
+class PerformanceQuerySet(models.QuerySet):
+    def with_tickets_available(self):
+        seats_held = (
+            HeldSeat.objects.active()
+            .filter(performance=OuterRef("pk"))
+            .order_by()
+            .values("performance")
+            .annotate(count=Count("id"))
+            .values("count")
+        )
+        return self.annotate(
+            tickets_available=(
+                F("theatre_hall__rows") * F("theatre_hall__seats_in_row")
+                - F("tickets_sold")
+                - Coalesce(Subquery(seats_held), 0)
+            )
+        )
+
+    def adjust_tickets_sold(self, performance_id, delta):
+        updated = self.filter(pk=performance_id).update(
+            tickets_sold=Greatest(F("tickets_sold") + delta, 0),
+            updated_at=Now(),
+        )
+        OccupancyRollup.objects.adjust_tickets_sold(performance_id, delta)
+        return updated
+
+    def touch(self, performance_id):
+        return self.filter(pk=performance_id).update(updated_at=Now())
+
+    def overlapping(self, theatre_hall, start, end):
+        """Performances in the hall running at any time in [start, end)"""
+        return self.filter(
+            theatre_hall=theatre_hall, show_time__lt=end, end_time__gt=start
+        )
+
+    def _ending_after(self, duration):
+        return models.ExpressionWrapper(
+            F("show_time") + models.Value(duration),
+            output_field=models.DateTimeField(),
+        )
+
+    def overlapping_with_duration(self, play, duration):
+        """
+        Performances of `play` that would run into the next performance
+        of their hall if the play lasted `duration`
+        """
+        followers = Performance.objects.filter(
+            theatre_hall=OuterRef("theatre_hall"),
+            show_time__gte=OuterRef("show_time"),
+            show_time__lt=OuterRef("new_end_time"),
+        ).exclude(pk=OuterRef("pk"))
+        return (
+            self.filter(play=play)
+            .annotate(new_end_time=self._ending_after(duration))
+            .filter(Exists(followers))
+        )
+
+    def set_duration(self, play):
+        """Recompute end_time of the performances of `play`"""
+        return self.filter(play=play).update(
+            end_time=self._ending_after(play.duration), updated_at=Now()
+        )
+
+
 class Performance(models.Model):
     play = models.ForeignKey(Play,
                              related_name="performances",
@@ -71,14 +179,39 @@ class Performance(models.Model):
                                      related_name="performances",
                                      on_delete=models.CASCADE)
     show_time = models.DateTimeField()
+    # show_time plus the play's duration, set on save. PostgreSQL keeps
+    # [show_time, end_time) of one hall from overlapping
+    end_time = models.DateTimeField(editable=False)
+    tickets_sold = models.PositiveIntegerField(default=0, editable=False)
+    # Bumped on every change including ticket sales, feeds list ETags
+    updated_at = models.DateTimeField(auto_now=True)
+
+    objects = PerformanceQuerySet.as_manager()
 
     class Meta:
         ordering = ["-show_time"]
+        indexes = [
+            models.Index(fields=["show_time", "id"]),
+            models.Index(fields=["play", "show_time"]),
+            models.Index(fields=["theatre_hall", "show_time"]),
+        ]
+
+    def save(self, *args, **kwargs):
+        self.show_time = self._meta.get_field("show_time").to_python(
+            self.show_time
+        )
+        self.end_time = self.show_time + self.play.duration
+        super().save(*args, **kwargs)
 
     def __str__(self):
         return f"{self.play.title} {self.show_time}"
 
 
+class ExpiringQuerySet(models.QuerySet):
+    def active(self):
+        return self.filter(expires_at__gt=Now())
+
+
 class Reservation(models.Model):
     created_at = models.DateTimeField(auto_now_add=True)
     user = models.ForeignKey(settings.AUTH_USER_MODEL,
@@ -87,11 +220,36 @@ class Reservation(models.Model):
 
     class Meta:
         ordering = ["-created_at"]
+        indexes = [models.Index(fields=["user", "created_at", "id"])]
 
     def __str__(self):
         return str(self.created_at)
 
 
+class IdempotencyKey(models.Model):
+    key = models.CharField(max_length=255)
+    user = models.ForeignKey(settings.AUTH_USER_MODEL,
+                             related_name="idempotency_keys",
+                             on_delete=models.CASCADE)
+    request_hash = models.CharField(max_length=64)
+    reservation = models.ForeignKey(Reservation,
+                                    null=True,
+                                    related_name="+",
+                                    on_delete=models.SET_NULL)
+    response_status = models.PositiveSmallIntegerField(null=True)
+    response_body = models.JSONField(null=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+    expires_at = models.DateTimeField(db_index=True)
+
+    objects = ExpiringQuerySet.as_manager()
+
+    class Meta:
+        unique_together = ("user", "key")
+
+    def __str__(self):
+        return self.key
+
+
 class Ticket(models.Model):
     row = models.IntegerField()
     seat = models.IntegerField()
@@ -140,3 +298,263 @@ class Ticket(models.Model):
 
     def __str__(self):
         return f"{str(self.performance)} (row: {self.row}, seat: {self.seat})"
+
+
+class SeatHold(models.Model):
+    user = models.ForeignKey(settings.AUTH_USER_MODEL,
+                             related_name="seat_holds",
+                             on_delete=models.CASCADE)
+    performance = models.ForeignKey(Performance,
+                                    related_name="seat_holds",
+                                    on_delete=models.CASCADE)
+    created_at = models.DateTimeField(auto_now_add=True)
+    expires_at = models.DateTimeField(db_index=True)
+
+    objects = ExpiringQuerySet.as_manager()
+
+    class Meta:
+        ordering = ["-created_at"]
+
+    def __str__(self):
+        return f"{str(self.performance)} (until {self.expires_at})"
+
+
+class HeldSeat(models.Model):
+    hold = models.ForeignKey(SeatHold,
+                             related_name="seats",
+                             on_delete=models.CASCADE)
+    performance = models.ForeignKey(Performance,
+                                    related_name="held_seats",
+                                    on_delete=models.CASCADE)
+    row = models.IntegerField()
+    seat = models.IntegerField()
+    # Copy of hold.expires_at, so active seats are found by index alone
+    expires_at = models.DateTimeField()
+
+    objects = ExpiringQuerySet.as_manager()
+
+    class Meta:
+        unique_together = ("performance", "row", "seat")
+        indexes = [models.Index(fields=["performance", "expires_at"])]
+        ordering = ["row", "seat"]
+
+    def __str__(self):
+        return f"{str(self.performance)} (row: {self.row}, seat: {self.seat})"
+
+
+# Key of the advisory lock taken while positions are assigned
+CHANGE_LOG_POSITION_LOCK = 0x7468656174726501
+
+
+class ChangeLogQuerySet(models.QuerySet):
+    def record(self, model, object_ids, action):
+        return self.bulk_create(
+            self.model(
+                model=model._meta.model_name,
+                object_id=object_id,
+                action=action,
+            )
+            for object_id in object_ids
+        )
+
+    def assign_positions(self):
+        """
+        Number the entries that became visible since the last call after
+        every numbered one. Entries become visible when their transaction
+        commits, so positions follow commit order, unlike ids, which are
+        taken on insert and can commit long after higher ones.
+        """
+        with transaction.atomic(using=self.db):
+            connection = connections[self.db]
+            if connection.vendor == "postgresql":
+                # Concurrent calls would hand out the same positions
+                with connection.cursor() as cursor:
+                    cursor.execute(
+                        "SELECT pg_advisory_xact_lock(%s)",
+                        [CHANGE_LOG_POSITION_LOCK],
+                    )
+            pending = list(
+                self.filter(position__isnull=True).order_by("id").only("id")
+            )
+            if not pending:
+                return
+            last = self.aggregate(last=Max("position"))["last"] or 0
+            for position, entry in enumerate(pending, start=last + 1):
+                entry.position = position
+            self.bulk_update(pending, ["position"], batch_size=1000)
+
+
+class ChangeLogEntry(models.Model):
+    """
+    Append-only log of catalog writes that the changes feed pages by
+    position, assigned once the writing transaction has committed
+    """
+
+    class Action(models.TextChoices):
+        CREATED = "created"
+        UPDATED = "updated"
+        DELETED = "deleted"
+
+    model = models.CharField(max_length=32)
+    object_id = models.BigIntegerField()
+    action = models.CharField(max_length=7, choices=Action.choices)
+    created_at = models.DateTimeField(auto_now_add=True)
+    position = models.BigIntegerField(null=True, unique=True)
+
+    objects = ChangeLogQuerySet.as_manager()
+
+    class Meta:
+        ordering = ["id"]
+        indexes = [
+            models.Index(
+                fields=["id"],
+                condition=Q(position__isnull=True),
+                name="theatre_changelog_unnumbered",
+            )
+        ]
+
+    def __str__(self):
+        return f"{self.model} {self.object_id} {self.action}"
+
+
+def local_day(show_time):
+    """Day of a show time in the project time zone"""
+    if timezone.is_naive(show_time):
+        return show_time.date()
+    return timezone.localdate(show_time)
+
+
+def rollup_key(performance):
+    return (
+        local_day(performance.show_time),
+        performance.play_id,
+        performance.theatre_hall_id,
+    )
+
+
+class OccupancyRollupQuerySet(models.QuerySet):
+    @staticmethod
+    def _rows(performances):
+        """Rollup rows aggregated from the performance counters"""
+        return (
+            performances.order_by()
+            .annotate(
+                day=TruncDate(
+                    "show_time", tzinfo=timezone.get_current_timezone()
+                )
+            )
+            .values("day", "play_id", "theatre_hall_id")
+            .annotate(
+                performances=Count("id"),
+                capacity=Sum(
+                    F("theatre_hall__rows") * F("theatre_hall__seats_in_row")
+                ),
+                tickets_sold=Sum("tickets_sold"),
+            )
+        )
+
+    def refresh(self, keys):
+        """
+        Recompute the rows of (day, play id, theatre hall id) keys from
+        their performances and drop the keys no performance is left in
+        """
+        keys = set(keys)
+        if not keys:
+            return
+        days = [day for day, _, _ in keys]
+        performances = Performance.objects.filter(
+            play_id__in={play_id for _, play_id, _ in keys},
+            theatre_hall_id__in={hall_id for _, _, hall_id in keys},
+            show_time__gte=timezone.make_aware(
+                datetime.combine(min(days), time.min)
+            ),
+            show_time__lt=timezone.make_aware(
+                datetime.combine(max(days) + timedelta(days=1), time.min)
+            ),
+        )
+        rollups = [OccupancyRollup(**row) for row in self._rows(performances)]
+        self.bulk_create(
+            rollups,
+            update_conflicts=True,
+            unique_fields=["day", "play", "theatre_hall"],
+            update_fields=["performances", "capacity", "tickets_sold"],
+        )
+
+        stale = keys - {
+            (rollup.day, rollup.play_id, rollup.theatre_hall_id)
+            for rollup in rollups
+        }
+        if stale:
+            query = Q()
+            for day, play_id, hall_id in stale:
+                query |= Q(day=day, play_id=play_id, theatre_hall_id=hall_id)
+            self.filter(query).delete()
+
+    def rebuild(self, batch_size=1000):
+        """Replace all rows with ones aggregated from every performance"""
+        self.all().delete()
+        return self.bulk_create(
+            (
+                OccupancyRollup(**row)
+                for row in self._rows(Performance.objects.all())
+            ),
+            batch_size=batch_size,
+        )
+
+    def adjust_tickets_sold(self, performance_id, delta):
+        performance = (
+            Performance.objects.filter(pk=performance_id)
+            .only("show_time", "play_id", "theatre_hall_id")
+            .first()
+        )
+        if performance is None:
+            return 0
+        day, play_id, hall_id = rollup_key(performance)
+        return self.filter(
+            day=day, play_id=play_id, theatre_hall_id=hall_id
+        ).update(tickets_sold=Greatest(F("tickets_sold") + delta, 0))
+
+
+class OccupancyRollup(models.Model):
+    """
+    Performances, seats and tickets sold per local day, play and theatre
+    hall. Ticket sales adjust it in place and performance changes
+    recompute the rows they touch, so analytics never scan tickets.
+    """
+
+    day = models.DateField()
+    play = models.ForeignKey(Play, related_name="+", on_delete=models.CASCADE)
+    theatre_hall = models.ForeignKey(TheatreHall,
+                                     related_name="+",
+                                     on_delete=models.CASCADE)
+    performances = models.PositiveIntegerField(default=0)
+    capacity = models.PositiveIntegerField(default=0)
+    tickets_sold = models.PositiveIntegerField(default=0)
+
+    objects = OccupancyRollupQuerySet.as_manager()
+
+    class Meta:
+        ordering = ["day"]
+        constraints = [
+            models.UniqueConstraint(
+                fields=["day", "play", "theatre_hall"],
+                name="theatre_occupancy_rollup_unique_key",
+            )
+        ]
+
+    def __str__(self):
+        return f"{self.day} {self.play_id} {self.theatre_hall_id}"
+
+
+class CacheVersion(models.Model):
+    """
+    Change counter of a model, bumped by every write to it. Kept in the
+    database so all worker processes see the same version as soon as the
+    write commits.
+    """
+
+    model = models.CharField(max_length=100, unique=True)
+    version = models.BigIntegerField()
+
+    def __str__(self):
+        return f"{self.model} {self.version}"
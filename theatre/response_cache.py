@@ -0,0 +1,163 @@
+import hashlib
+import time
+
+from django.conf import settings
+from django.core.cache import cache
+from django.core.exceptions import FieldDoesNotExist, ValidationError
+from django.db import transaction, IntegrityError
+from django.db.models import Count, F, Max
+from django.utils.http import parse_etags
+from rest_framework import status
+from rest_framework.response import Response
+
+from config.db_router import use_primary
+from theatre.models import CacheVersion
+
+RESPONSE_CACHE_KEY = "theatre:response:{view}:{versions}:{url}"
+
+
+def _label(model):
+    return model._meta.label_lower
+
+
+def _initial_version():
+    # Counters created after their rows were lost, e.g. rolled back, start
+    # above any value they could have had before, so old bodies are never
+    # addressed again
+    return time.time_ns()
+
+
+def get_versions(models):
+    labels = [_label(model) for model in models]
+    versions = dict(
+        CacheVersion.objects.filter(model__in=labels).values_list(
+            "model", "version"
+        )
+    )
+    return [versions.get(label, 0) for label in labels]
+
+
+def bump_version(model):
+    """
+    Invalidate cached responses built from `model`. The counter is bumped
+    in the database within the write's transaction, so every process
+    moves to the new version exactly when the write commits.
+    """
+    label = _label(model)
+    if CacheVersion.objects.filter(model=label).update(
+        version=F("version") + 1
+    ):
+        return
+    try:
+        with transaction.atomic():
+            CacheVersion.objects.create(
+                model=label, version=_initial_version()
+            )
+    except IntegrityError:
+        # Created by a concurrent first write
+        bump_version(model)
+
+
+class CachedResponseMixin:
+    """
+    Serve list and retrieve responses from the cache. Keys include the
+    version of every model in `cache_dependencies`, which signals bump
+    on writes, so stale bodies are simply never looked up again.
+    Versions are read from the primary the bodies are built from.
+    """
+
+    cache_dependencies = ()
+
+    def _response_cache_key(self, request):
+        versions = get_versions(self.cache_dependencies)
+        url = hashlib.sha256(
+            request.build_absolute_uri().encode()
+        ).hexdigest()
+        return RESPONSE_CACHE_KEY.format(
+            view=self.basename,
+            versions=".".join(str(version) for version in versions),
+            url=url,
+        )
+
+    def _cached(self, handler, request, *args, **kwargs):
+        # A lagging replica would cache rows older than the version
+        with use_primary():
+            key = self._response_cache_key(request)
+            data = cache.get(key)
+            if data is not None:
+                return Response(data)
+            response = handler(request, *args, **kwargs)
+        if response.status_code == status.HTTP_200_OK:
+            cache.set(key, response.data, settings.CATALOG_CACHE_TIMEOUT)
+        return response
+
+    def list(self, request, *args, **kwargs):
+        return self._cached(super().list, request, *args, **kwargs)
+
+    def retrieve(self, request, *args, **kwargs):
+        return self._cached(super().retrieve, request, *args, **kwargs)
+
+
+class ConditionalGetMixin:
+    """
+    Answer list and retrieve requests whose If-None-Match matches with 304
+    before anything is serialized. ETags come from the database version
+    counters of `cache_dependencies` and, for models with an `updated_at`
+    field, the latest change and row count of the requested rows, all
+    read from the database that serves the rows. Every worker therefore
+    computes the same ETag for the same data.
+    """
+
+    cache_dependencies = ()
+
+    def get_etag_queryset(self):
+        return self.filter_queryset(self.get_queryset())
+
+    def get_etag_parts(self):
+        request = self.request
+        parts = [
+            self.basename,
+            request.build_absolute_uri(),
+            request.accepted_renderer.format,
+            *get_versions(self.cache_dependencies),
+        ]
+        try:
+            self.queryset.model._meta.get_field("updated_at")
+        except FieldDoesNotExist:
+            return parts
+
+        queryset = self.get_etag_queryset().order_by()
+        if self.action == "retrieve":
+            lookup_url_kwarg = self.lookup_url_kwarg or self.lookup_field
+            queryset = queryset.filter(
+                **{self.lookup_field: self.kwargs[lookup_url_kwarg]}
+            )
+        changes = queryset.aggregate(
+            latest=Max("updated_at"), count=Count("pk")
+        )
+        return parts + [changes["latest"], changes["count"]]
+
+    def _conditional(self, handler, request, *args, **kwargs):
+        try:
+            parts = self.get_etag_parts()
+        except (ValueError, ValidationError):
+            # Malformed lookups are left to the handler to reject
+            return handler(request, *args, **kwargs)
+        etag = '"%s"' % hashlib.sha256(repr(parts).encode()).hexdigest()[:32]
+
+        if_none_match = parse_etags(request.headers.get("If-None-Match", ""))
+        if etag in (tag.removeprefix("W/") for tag in if_none_match):
+            return Response(
+                status=status.HTTP_304_NOT_MODIFIED, headers={"ETag": etag}
+            )
+
+        response = handler(request, *args, **kwargs)
+        if response.status_code == status.HTTP_200_OK:
+            response["ETag"] = etag
+        return response
+
+    def list(self, request, *args, **kwargs):
+        return self._conditional(super().list, request, *args, **kwargs)
+
+    def retrieve(self, request, *args, **kwargs):
+        return self._conditional(super().retrieve, request, *args, **kwargs)
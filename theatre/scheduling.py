@@ -0,0 +1,136 @@
+from bisect import bisect_left
+from datetime import datetime, timedelta
+from itertools import islice
+
+from django.db import transaction, IntegrityError
+from django.utils import timezone
+
+from theatre.exceptions import HallConflict
+from theatre.models import (
+    Performance,
+    ChangeLogEntry,
+    OccupancyRollup,
+    rollup_key,
+)
+
+WEEKDAYS = ("mon", "tue", "wed", "thu", "fri", "sat", "sun")
+FREQUENCIES = ("daily", "weekly")
+MAX_SCHEDULED_PERFORMANCES = 1000
+
+
+def _recurring_days(date_from, date_to, frequency, interval, weekdays):
+    days = (
+        date_from + timedelta(days=offset)
+        for offset in range((date_to - date_from).days + 1)
+    )
+    if frequency == "daily":
+        return (
+            day for day in days if (day - date_from).days % interval == 0
+        )
+
+    weekdays = (
+        {WEEKDAYS.index(weekday) for weekday in weekdays}
+        if weekdays
+        else {date_from.weekday()}
+    )
+    first_monday = date_from - timedelta(days=date_from.weekday())
+    return (
+        day
+        for day in days
+        if day.weekday() in weekdays
+        and (day - first_monday).days // 7 % interval == 0
+    )
+
+
+def expand_show_times(date_from, date_to, times, frequency="weekly",
+                      interval=1, weekdays=None,
+                      limit=MAX_SCHEDULED_PERFORMANCES):
+    """
+    Show times of a recurrence between two days, both included, at the
+    given local times. Weekly rules run on `weekdays`, or on the weekday
+    of `date_from`, every `interval` weeks. At most `limit` + 1 show
+    times are returned, so callers can tell a rule that is too long.
+    """
+    days = _recurring_days(date_from, date_to, frequency, interval, weekdays)
+    show_times = (
+        timezone.make_aware(datetime.combine(day, show_time))
+        for day in days
+        for show_time in sorted(set(times))
+    )
+    return list(islice(show_times, limit + 1))
+
+
+def split_conflicts(theatre_hall, slots):
+    """
+    Split slots, tuples starting with show_time and end_time sorted by
+    show time, into the ones the hall is free for and (slot, performance
+    id) pairs clashing with a booked performance, or with an earlier slot
+    when the id is None. Bookings come from a single range query.
+    """
+    if not slots:
+        return [], []
+    booked = list(
+        Performance.objects.overlapping(
+            theatre_hall, slots[0][0], max(slot[1] for slot in slots)
+        )
+        .order_by("show_time")
+        .values_list("show_time", "end_time", "id")
+    )
+    starts = [show_time for show_time, _, _ in booked]
+    # (end_time, id) of the latest ending booking up to each position
+    latest = []
+    for _, end_time, performance_id in booked:
+        if not latest or end_time > latest[-1][0]:
+            latest.append((end_time, performance_id))
+        else:
+            latest.append(latest[-1])
+
+    free, conflicts = [], []
+    for slot in slots:
+        show_time, end_time = slot[:2]
+        index = bisect_left(starts, end_time) - 1
+        if index >= 0 and latest[index][0] > show_time:
+            conflicts.append((slot, latest[index][1]))
+        elif free and free[-1][1] > show_time:
+            conflicts.append((slot, None))
+        else:
+            free.append(slot)
+    return free, conflicts
+
+
+def schedule_performances(play, theatre_hall, show_times, dry_run=False):
+    """
+    Create performances of the play at the sorted show times the hall is
+    free for, in one insert. Returns them with the clashing slots.
+    """
+    slots = [
+        (show_time, show_time + play.duration) for show_time in show_times
+    ]
+    free, conflicts = split_conflicts(theatre_hall, slots)
+    performances = [
+        Performance(
+            play=play,
+            theatre_hall=theatre_hall,
+            show_time=show_time,
+            end_time=end_time,
+        )
+        for show_time, end_time in free
+    ]
+    if dry_run:
+        return performances, conflicts
+
+    try:
+        with transaction.atomic():
+            Performance.objects.bulk_create(performances)
+            ChangeLogEntry.objects.record(
+                Performance,
+                [performance.id for performance in performances],
+                ChangeLogEntry.Action.CREATED,
+            )
+            OccupancyRollup.objects.refresh(
+                rollup_key(performance) for performance in performances
+            )
+    except IntegrityError:
+        # The exclusion constraint caught a booking made meanwhile
+        raise HallConflict()
+    return performances, conflicts
@@ -0,0 +1,67 @@
+from collections import defaultdict
+
+from django.contrib.postgres.search import TrigramWordSimilarity
+from django.db import connections
+from django.db.models import Case, When, Value, IntegerField
+
+from theatre.models import Play
+
+
+def build_search_document(title, description, actor_names):
+    """Lowercased text the play search matches against"""
+    return " ".join(
+        part for part in (title, description, *actor_names) if part
+    ).lower()
+
+
+def refresh_search_documents(play_ids):
+    plays = list(
+        Play.objects.filter(id__in=play_ids).only("id", "title", "description")
+    )
+    actor_names = defaultdict(list)
+    for play_id, first_name, last_name in Play.actors.through.objects.filter(
+        play_id__in=play_ids
+    ).values_list("play_id", "actor__first_name", "actor__last_name"):
+        actor_names[play_id].append(f"{first_name} {last_name}")
+
+    for play in plays:
+        play.search_document = build_search_document(
+            play.title, play.description, actor_names[play.id]
+        )
+    Play.objects.bulk_update(plays, ["search_document"])
+
+
+def _is_postgresql(queryset):
+    return connections[queryset.db].vendor == "postgresql"
+
+
+def filter_by_title(queryset, title, field="title"):
+    """
+    Substring match on a play title. On PostgreSQL the UPPER(title)
+    trigram index serves this lookup, so it does not scan the table.
+    """
+    return queryset.filter(**{f"{field}__icontains": title})
+
+
+def search_plays(queryset, query):
+    """
+    Match plays by title, description and actor names, most relevant
+    first. PostgreSQL ranks with trigram word similarity over indexed
+    columns; other backends fall back to a simple title-first ranking.
+    """
+    query = query.strip()
+    queryset = queryset.filter(search_document__contains=query.lower())
+
+    if _is_postgresql(queryset):
+        rank = TrigramWordSimilarity(query, "title") * 2 + (
+            TrigramWordSimilarity(query, "search_document")
+        )
+    else:
+        rank = Case(
+            When(title__istartswith=query, then=Value(3)),
+            When(title__icontains=query, then=Value(2)),
+            default=Value(1),
+            output_field=IntegerField(),
+        )
+    # The id keeps equally ranked plays in a stable order across pages
+    return queryset.annotate(search_rank=rank).order_by("-search_rank", "id")
@@ -0,0 +1,196 @@
+import base64
+
+from django.conf import settings
+from django.core.cache import cache
+
+from config.db_router import use_primary
+from theatre.models import Ticket, HeldSeat
+
+SEAT_MAP_CACHE_KEY = "theatre:seat-map:{performance_id}"
+
+
+class SeatMap:
+    """Bitmap of taken seats, one bit per seat in row-major order"""
+
+    def __init__(self, rows, seats_in_row, data=None):
+        self.rows = rows
+        self.seats_in_row = seats_in_row
+        size = (rows * seats_in_row + 7) // 8
+        self.data = bytearray(data) if data is not None else bytearray(size)
+
+    def _position(self, row, seat):
+        index = (row - 1) * self.seats_in_row + seat - 1
+        return index >> 3, 0x80 >> (index & 7)
+
+    def contains(self, row, seat):
+        return 1 <= row <= self.rows and 1 <= seat <= self.seats_in_row
+
+    def is_taken(self, row, seat):
+        if not self.contains(row, seat):
+            return False
+        byte, mask = self._position(row, seat)
+        return bool(self.data[byte] & mask)
+
+    # Tickets outside a hall that was made smaller have no bit to flip
+    def take(self, row, seat):
+        if self.contains(row, seat):
+            byte, mask = self._position(row, seat)
+            self.data[byte] |= mask
+
+    def release(self, row, seat):
+        if self.contains(row, seat):
+            byte, mask = self._position(row, seat)
+            self.data[byte] &= ~mask
+
+    def taken_places(self):
+        """Yield (row, seat) pairs of taken seats, skipping empty bytes"""
+        capacity = self.rows * self.seats_in_row
+        for byte, value in enumerate(self.data):
+            if not value:
+                continue
+            for bit in range(8):
+                index = (byte << 3) + bit
+                if index < capacity and value & (0x80 >> bit):
+                    row, seat = divmod(index, self.seats_in_row)
+                    yield row + 1, seat + 1
+
+    def free_runs(self, row_from=1, row_to=None):
+        """Yield (row, [(first_seat, length), ...]) for runs of free seats"""
+        row_to = min(row_to or self.rows, self.rows)
+        capacity = self.rows * self.seats_in_row
+        bits = int.from_bytes(self.data, "big") >> (
+            len(self.data) * 8 - capacity
+        )
+        row_mask = (1 << self.seats_in_row) - 1
+        for row in range(max(row_from, 1), row_to + 1):
+            row_bits = (
+                bits >> ((self.rows - row) * self.seats_in_row)
+            ) & row_mask
+            if row_bits == row_mask:
+                continue
+            if not row_bits:
+                yield row, [(1, self.seats_in_row)]
+                continue
+
+            runs = []
+            first = None
+            for seat in range(1, self.seats_in_row + 1):
+                taken = row_bits >> (self.seats_in_row - seat) & 1
+                if not taken and first is None:
+                    first = seat
+                elif taken and first is not None:
+                    runs.append((first, seat - first))
+                    first = None
+            if first is not None:
+                runs.append((first, self.seats_in_row + 1 - first))
+            yield row, runs
+
+    def to_base64(self):
+        return base64.b64encode(bytes(self.data)).decode()
+
+    def to_rle(self):
+        """Alternating run lengths of free and taken seats, free first"""
+        runs = []
+        current, length = False, 0
+        for index in range(self.rows * self.seats_in_row):
+            taken = bool(self.data[index >> 3] & (0x80 >> (index & 7)))
+            if taken != current:
+                runs.append(length)
+                current, length = taken, 0
+            length += 1
+        runs.append(length)
+        return runs
+
+
+def _store(performance_id, seat_map):
+    cache.set(
+        SEAT_MAP_CACHE_KEY.format(performance_id=performance_id),
+        (seat_map.rows, seat_map.seats_in_row, bytes(seat_map.data)),
+        settings.SEAT_MAP_CACHE_TIMEOUT,
+    )
+
+
+def _load(performance_id):
+    cached = cache.get(
+        SEAT_MAP_CACHE_KEY.format(performance_id=performance_id)
+    )
+    if cached is None:
+        return None
+    return SeatMap(*cached)
+
+
+def get_seat_map(performance):
+    """Return the seat map of a performance, building it on a cache miss"""
+    theatre_hall = performance.theatre_hall
+    seat_map = _load(performance.id)
+    if seat_map is not None and (seat_map.rows, seat_map.seats_in_row) == (
+        theatre_hall.rows,
+        theatre_hall.seats_in_row,
+    ):
+        return seat_map
+
+    seat_map = SeatMap(theatre_hall.rows, theatre_hall.seats_in_row)
+    # The map outlives the request, so it must not miss lagging tickets
+    with use_primary():
+        for row, seat in Ticket.objects.filter(
+            performance_id=performance.id
+        ).values_list("row", "seat"):
+            seat_map.take(row, seat)
+    _store(performance.id, seat_map)
+    return seat_map
+
+
+def get_occupancy_map(performance):
+    """Return the seat map with seats on active holds marked as taken"""
+    seat_map = get_seat_map(performance)
+    for row, seat in (
+        HeldSeat.objects.active()
+        .filter(performance_id=performance.id)
+        .values_list("row", "seat")
+    ):
+        seat_map.take(row, seat)
+    return seat_map
+
+
+def find_adjacent_seats(seat_map, count, row_from=1, row_to=None):
+    """
+    Pick `count` adjacent free seats closest to the centre of the hall.
+    Return a list of (row, seat) pairs or None if no run is long enough.
+    """
+    middle_row = (seat_map.rows + 1) / 2
+    middle_seat = (seat_map.seats_in_row + 1) / 2
+    ideal_start = round(middle_seat - (count - 1) / 2)
+    best = None
+    for row, runs in seat_map.free_runs(row_from, row_to):
+        for first, length in runs:
+            if length < count:
+                continue
+            start = min(max(first, ideal_start), first + length - count)
+            score = (
+                abs(row - middle_row),
+                abs(start + (count - 1) / 2 - middle_seat),
+            )
+            if best is None or score < best[0]:
+                best = (score, row, start)
+
+    if best is None:
+        return None
+    _, row, start = best
+    return [(row, seat) for seat in range(start, start + count)]
+
+
+def update_seat_map(performance_id, seats, taken=True):
+    """Flip seats of an already cached map, missing maps are built lazily"""
+    seat_map = _load(performance_id)
+    if seat_map is None:
+        return
+    for row, seat in seats:
+        if taken:
+            seat_map.take(row, seat)
+        else:
+            seat_map.release(row, seat)
+    _store(performance_id, seat_map)
+
+
+def invalidate_seat_map(performance_id):
+    cache.delete(SEAT_MAP_CACHE_KEY.format(performance_id=performance_id))
@@ -1,4 +1,11 @@
-from django.db import transaction
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import transaction, IntegrityError
+from django.db.models import Q
+from django.utils import timezone
+from drf_spectacular.types import OpenApiTypes
+from drf_spectacular.utils import extend_schema_field
 from rest_framework import serializers
 from rest_framework.exceptions import ValidationError
 
@@ -10,28 +17,81 @@ from theatre.models import (
     Performance,
     Reservation,
     Ticket,
+    SeatHold,
+    HeldSeat,
+    ChangeLogEntry,
 )
+from theatre.exceptions import SeatConflict, HallConflict
+from theatre.scheduling import (
+    WEEKDAYS,
+    FREQUENCIES,
+    MAX_SCHEDULED_PERFORMANCES,
+    expand_show_times,
+)
+from theatre.sparse_fields import SparseFieldsModelSerializer
+from theatre.seat_map import (
+    get_occupancy_map,
+    invalidate_seat_map,
+    update_seat_map,
+)
+
+SEAT_FORMATS = ("list", "bitmap", "rle")
+
+
+def seats_query(seats):
+    """Build a filter matching (performance, row, seat) triples"""
+    query = Q()
+    for performance, row, seat in seats:
+        query |= Q(performance=performance, row=row, seat=seat)
+    return query
+
 
+def validate_unique_seats(seats):
+    if len(set(seats)) != len(seats):
+        raise ValidationError("Each seat can be requested only once.")
 
-class GenreSerializer(serializers.ModelSerializer):
+
+class GenreSerializer(SparseFieldsModelSerializer):
     class Meta:
         model = Genre
         fields = ("id", "name")
 
 
-class ActorSerializer(serializers.ModelSerializer):
+class ActorSerializer(SparseFieldsModelSerializer):
     class Meta:
         model = Actor
         fields = ("id", "first_name", "last_name", "full_name")
 
 
-class PlaySerializer(serializers.ModelSerializer):
+class PlaySerializer(SparseFieldsModelSerializer):
     class Meta:
         model = Play
-        fields = ("id", "title", "description", "genres", "actors")
-
-
-class PlayListSerializer(serializers.ModelSerializer):
+        fields = ("id", "title", "description", "duration", "genres", "actors")
+
+    def validate_duration(self, duration):
+        if (
+            self.instance is not None
+            and duration > self.instance.duration
+            and Performance.objects.overlapping_with_duration(
+                self.instance, duration
+            ).exists()
+        ):
+            raise ValidationError(
+                "Performances of this play would overlap the next ones "
+                "in their theatre hall."
+            )
+        return duration
+
+    def update(self, instance, validated_data):
+        # Longer performances may now overlap, which PostgreSQL rejects
+        try:
+            with transaction.atomic():
+                return super().update(instance, validated_data)
+        except IntegrityError:
+            raise HallConflict()
+
+
+class PlayListSerializer(SparseFieldsModelSerializer):
     genres = serializers.SlugRelatedField(many=True,
                                           read_only=True,
                                           slug_field="name")
@@ -44,31 +104,74 @@ class PlayListSerializer(serializers.ModelSerializer):
         fields = ("id", "title", "description", "genres", "actors", "image")
 
 
-class PlayDetailSerializer(serializers.ModelSerializer):
+class PlayDetailSerializer(SparseFieldsModelSerializer):
     genres = GenreSerializer(many=True, read_only=True)
     actors = ActorSerializer(many=True, read_only=True)
 
     class Meta:
         model = Play
-        fields = ("id", "title", "description", "genres", "actors", "image")
+        fields = (
+            "id",
+            "title",
+            "description",
+            "duration",
+            "genres",
+            "actors",
+            "image",
+        )
 
 
-class PlayImageSerializer(serializers.ModelSerializer):
+class PlayImageSerializer(SparseFieldsModelSerializer):
     class Meta:
         model = Play
         fields = ("id", "image")
 
 
-class TheatreHallSerializer(serializers.ModelSerializer):
+class TheatreHallSerializer(SparseFieldsModelSerializer):
     class Meta:
         model = TheatreHall
         fields = ("id", "name", "rows", "seats_in_row", "capacity")
 
 
-class PerformanceSerializer(serializers.ModelSerializer):
+class PerformanceSerializer(SparseFieldsModelSerializer):
     class Meta:
         model = Performance
-        fields = ("id", "show_time", "play", "theatre_hall")
+        fields = ("id", "show_time", "end_time", "play", "theatre_hall")
+
+    def validate(self, attrs):
+        data = super().validate(attrs)
+        play = attrs.get("play", getattr(self.instance, "play", None))
+        theatre_hall = attrs.get(
+            "theatre_hall", getattr(self.instance, "theatre_hall", None)
+        )
+        show_time = attrs.get(
+            "show_time", getattr(self.instance, "show_time", None)
+        )
+        if play and theatre_hall and show_time:
+            overlapping = Performance.objects.overlapping(
+                theatre_hall, show_time, show_time + play.duration
+            )
+            if self.instance is not None:
+                overlapping = overlapping.exclude(pk=self.instance.pk)
+            if overlapping.exists():
+                raise ValidationError(
+                    {"show_time": HallConflict.default_detail}
+                )
+        return data
+
+    def create(self, validated_data):
+        try:
+            with transaction.atomic():
+                return super().create(validated_data)
+        except IntegrityError:
+            raise HallConflict()
+
+    def update(self, instance, validated_data):
+        try:
+            with transaction.atomic():
+                return super().update(instance, validated_data)
+        except IntegrityError:
+            raise HallConflict()
 
 
 class PerformanceListSerializer(PerformanceSerializer):
@@ -95,7 +198,62 @@ class PerformanceListSerializer(PerformanceSerializer):
         )
 
 
-class TicketSerializer(serializers.ModelSerializer):
+class SharedPerformanceListSerializer(PerformanceListSerializer):
+    """
+    Performance nested in tickets. Tickets of one performance share the
+    prefetched instance, so its representation is built only once.
+    """
+
+    def to_representation(self, instance):
+        representations = self.__dict__.setdefault("_representations", {})
+        if instance.pk not in representations:
+            representations[instance.pk] = super().to_representation(
+                instance
+            )
+        return representations[instance.pk]
+
+
+class PerformancePrimaryKeyRelatedField(serializers.PrimaryKeyRelatedField):
+    """Resolve performances from a batch loaded once per request"""
+
+    def __init__(self, **kwargs):
+        super().__init__(**kwargs)
+        self.preloaded = {}
+
+    def preload(self, pks):
+        self.preloaded = self.get_queryset().in_bulk(pks)
+
+    def to_internal_value(self, data):
+        try:
+            return self.preloaded[int(data)]
+        except (KeyError, TypeError, ValueError):
+            return super().to_internal_value(data)
+
+
+class TicketBatchSerializer(serializers.ListSerializer):
+    def to_internal_value(self, data):
+        performance_field = self.child.fields.get("performance")
+        if isinstance(data, list) and isinstance(
+            performance_field, PerformancePrimaryKeyRelatedField
+        ):
+            pks = set()
+            for ticket_data in data:
+                try:
+                    pks.add(int(ticket_data["performance"]))
+                except (KeyError, TypeError, ValueError):
+                    continue
+            performance_field.preload(pks)
+        return super().to_internal_value(data)
+
+
+class TicketSerializer(SparseFieldsModelSerializer):
+    performance = PerformancePrimaryKeyRelatedField(
+        queryset=Performance.objects.select_related("theatre_hall")
+    )
+    expandable_fields = {
+        "performance": (SharedPerformanceListSerializer, {})
+    }
+
     def validate(self, attrs):
         data = super(TicketSerializer, self).validate(attrs=attrs)
         Ticket.validate_ticket(
@@ -109,10 +267,14 @@ class TicketSerializer(serializers.ModelSerializer):
     class Meta:
         model = Ticket
         fields = ("id", "row", "seat", "performance")
+        list_serializer_class = TicketBatchSerializer
+        # Seat uniqueness is enforced by the database constraint in a single
+        # insert instead of a lookup query per ticket.
+        validators = []
 
 
 class TicketListSerializer(TicketSerializer):
-    performance = PerformanceListSerializer(many=False, read_only=True)
+    performance = SharedPerformanceListSerializer(many=False, read_only=True)
 
 
 class TicketSeatsSerializer(TicketSerializer):
@@ -124,30 +286,342 @@ class TicketSeatsSerializer(TicketSerializer):
 class PerformanceDetailSerializer(PerformanceSerializer):
     play = PlayListSerializer(many=False, read_only=True)
     theatre_hall = TheatreHallSerializer(many=False, read_only=True)
-    taken_places = TicketSeatsSerializer(source="tickets",
-                                         many=True,
-                                         read_only=True)
+    taken_places = serializers.SerializerMethodField()
 
     class Meta:
         model = Performance
-        fields = ("id", "show_time", "play", "theatre_hall", "taken_places")
+        fields = (
+            "id",
+            "show_time",
+            "end_time",
+            "play",
+            "theatre_hall",
+            "taken_places",
+        )
 
+    @extend_schema_field(TicketSeatsSerializer(many=True))
+    def get_taken_places(self, performance):
+        request = self.context.get("request")
+        seat_format = (
+            request.query_params.get("seat_format", "list")
+            if request
+            else "list"
+        )
+        if seat_format not in SEAT_FORMATS:
+            raise ValidationError(
+                {"seat_format": f"Must be one of: {', '.join(SEAT_FORMATS)}"}
+            )
+
+        seat_map = get_occupancy_map(performance)
+        if seat_format == "list":
+            return [
+                {"row": row, "seat": seat}
+                for row, seat in seat_map.taken_places()
+            ]
+
+        data = {
+            "format": seat_format,
+            "rows": seat_map.rows,
+            "seats_in_row": seat_map.seats_in_row,
+        }
+        if seat_format == "bitmap":
+            data["bitmap"] = seat_map.to_base64()
+        else:
+            data["runs"] = seat_map.to_rle()
+        return data
 
-class ReservationSerializer(serializers.ModelSerializer):
+
+class ReservationSerializer(SparseFieldsModelSerializer):
     tickets = TicketSerializer(many=True, read_only=False, allow_empty=False)
 
     class Meta:
         model = Reservation
         fields = ("id", "tickets", "created_at")
 
+    @staticmethod
+    def _seats(tickets_data):
+        return [
+            (ticket_data["performance"].id, ticket_data["row"],
+             ticket_data["seat"])
+            for ticket_data in tickets_data
+        ]
+
+    def validate_tickets(self, tickets):
+        validate_unique_seats(self._seats(tickets))
+        return tickets
+
+    def validate(self, attrs):
+        data = super().validate(attrs)
+        if "tickets" not in attrs:
+            # Partial updates may leave the tickets out
+            return data
+        request = self.context.get("request")
+        held_by_others = (
+            HeldSeat.objects.active()
+            .filter(seats_query(self._seats(attrs["tickets"])))
+            .exclude(hold__user_id=request.user.id if request else None)
+            .values("performance", "row", "seat")
+        )
+        if held_by_others:
+            raise SeatConflict(list(held_by_others))
+        return data
+
     def create(self, validated_data):
-        with transaction.atomic():
-            tickets_data = validated_data.pop("tickets")
-            reservation = Reservation.objects.create(**validated_data)
-            for ticket_data in tickets_data:
-                Ticket.objects.create(reservation=reservation, **ticket_data)
-            return reservation
+        tickets_data = validated_data.pop("tickets")
+        seats_by_performance = {}
+        for ticket_data in tickets_data:
+            seats_by_performance.setdefault(
+                ticket_data["performance"].id, []
+            ).append((ticket_data["row"], ticket_data["seat"]))
+
+        try:
+            with transaction.atomic():
+                reservation = Reservation.objects.create(**validated_data)
+                HeldSeat.objects.filter(
+                    seats_query(self._seats(tickets_data)),
+                    hold__user_id=reservation.user_id,
+                ).delete()
+                Ticket.objects.bulk_create(
+                    Ticket(reservation=reservation, **ticket_data)
+                    for ticket_data in tickets_data
+                )
+                for performance_id in sorted(seats_by_performance):
+                    Performance.objects.adjust_tickets_sold(
+                        performance_id,
+                        len(seats_by_performance[performance_id]),
+                    )
+        except IntegrityError:
+            raise SeatConflict(
+                list(
+                    Ticket.objects.filter(
+                        seats_query(self._seats(tickets_data))
+                    ).values("performance", "row", "seat")
+                )
+            )
+
+        def update_seat_maps():
+            for performance_id, seats in seats_by_performance.items():
+                update_seat_map(performance_id, seats)
+
+        transaction.on_commit(update_seat_maps)
+        return reservation
 
 
 class ReservationListSerializer(ReservationSerializer):
     tickets = TicketListSerializer(many=True, read_only=True)
+
+
+class HeldSeatSerializer(SparseFieldsModelSerializer):
+    class Meta:
+        model = HeldSeat
+        fields = ("row", "seat")
+
+
+class SeatHoldSerializer(SparseFieldsModelSerializer):
+    performance = serializers.PrimaryKeyRelatedField(
+        queryset=Performance.objects.select_related("theatre_hall")
+    )
+    seats = HeldSeatSerializer(many=True, allow_empty=False)
+    expandable_fields = {"performance": (PerformanceSerializer, {})}
+
+    class Meta:
+        model = SeatHold
+        fields = ("id", "performance", "seats", "created_at", "expires_at")
+        read_only_fields = ("created_at", "expires_at")
+
+    def validate(self, attrs):
+        data = super().validate(attrs)
+        performance = attrs["performance"]
+        for seat_data in attrs["seats"]:
+            Ticket.validate_ticket(
+                seat_data["row"],
+                seat_data["seat"],
+                performance.theatre_hall,
+                ValidationError,
+            )
+        validate_unique_seats(
+            [
+                (seat_data["row"], seat_data["seat"])
+                for seat_data in attrs["seats"]
+            ]
+        )
+        return data
+
+    def create(self, validated_data):
+        performance = validated_data["performance"]
+        seats = [
+            (performance.id, seat_data["row"], seat_data["seat"])
+            for seat_data in validated_data.pop("seats")
+        ]
+
+        # The cached seat map may miss a concurrent sale, so sold seats
+        # are checked against the tickets themselves
+        sold = list(
+            Ticket.objects.filter(seats_query(seats)).values(
+                "performance", "row", "seat"
+            )
+        )
+        if sold:
+            invalidate_seat_map(performance.id)
+            raise SeatConflict(sold)
+
+        now = timezone.now()
+        expires_at = now + timedelta(minutes=settings.SEAT_HOLD_MINUTES)
+        try:
+            with transaction.atomic():
+                HeldSeat.objects.filter(
+                    seats_query(seats), expires_at__lte=now
+                ).delete()
+                hold = SeatHold.objects.create(
+                    expires_at=expires_at, **validated_data
+                )
+                HeldSeat.objects.bulk_create(
+                    HeldSeat(
+                        hold=hold,
+                        performance=performance,
+                        row=row,
+                        seat=seat,
+                        expires_at=expires_at,
+                    )
+                    for _, row, seat in seats
+                )
+        except IntegrityError:
+            raise SeatConflict(
+                list(
+                    HeldSeat.objects.active()
+                    .filter(seats_query(seats))
+                    .values("performance", "row", "seat")
+                )
+            )
+        return hold
+
+
+class SeatAllocationSerializer(serializers.Serializer):
+    seats = serializers.IntegerField(min_value=1)
+    row_from = serializers.IntegerField(min_value=1, required=False)
+    row_to = serializers.IntegerField(min_value=1, required=False)
+
+    def validate(self, attrs):
+        data = super().validate(attrs)
+        row_from = attrs.get("row_from")
+        row_to = attrs.get("row_to")
+        if row_from and row_to and row_from > row_to:
+            raise ValidationError(
+                {"row_to": "row_to must not be less than row_from"}
+            )
+        return data
+
+
+class PerformanceScheduleSerializer(serializers.Serializer):
+    play = serializers.PrimaryKeyRelatedField(queryset=Play.objects.all())
+    theatre_hall = serializers.PrimaryKeyRelatedField(
+        queryset=TheatreHall.objects.all()
+    )
+    date_from = serializers.DateField()
+    date_to = serializers.DateField()
+    times = serializers.ListField(
+        child=serializers.TimeField(), allow_empty=False
+    )
+    frequency = serializers.ChoiceField(choices=FREQUENCIES, default="weekly")
+    interval = serializers.IntegerField(min_value=1, default=1)
+    weekdays = serializers.ListField(
+        child=serializers.ChoiceField(choices=WEEKDAYS), required=False
+    )
+    dry_run = serializers.BooleanField(default=False)
+
+    def validate(self, attrs):
+        data = super().validate(attrs)
+        if attrs["date_from"] > attrs["date_to"]:
+            raise ValidationError(
+                {"date_to": "date_to must not be before date_from"}
+            )
+        data["show_times"] = expand_show_times(
+            attrs["date_from"],
+            attrs["date_to"],
+            attrs["times"],
+            attrs["frequency"],
+            attrs["interval"],
+            attrs.get("weekdays"),
+        )
+        if len(data["show_times"]) > MAX_SCHEDULED_PERFORMANCES:
+            raise ValidationError(
+                f"A schedule may create at most "
+                f"{MAX_SCHEDULED_PERFORMANCES} performances."
+            )
+        return data
+
+
+class ScheduleConflictSerializer(serializers.Serializer):
+    show_time = serializers.DateTimeField()
+    end_time = serializers.DateTimeField()
+    performance = serializers.IntegerField(
+        allow_null=True,
+        help_text="Booked performance in the way, null for a clash "
+        "between show times of the schedule itself",
+    )
+
+
+class PerformanceScheduleResultSerializer(serializers.Serializer):
+    created = PerformanceSerializer(many=True)
+    conflicts = ScheduleConflictSerializer(many=True)
+
+
+class ChangeLogEntrySerializer(serializers.ModelSerializer):
+    data = serializers.SerializerMethodField()
+
+    class Meta:
+        model = ChangeLogEntry
+        fields = ("model", "object_id", "action", "data")
+
+    @extend_schema_field(OpenApiTypes.OBJECT)
+    def get_data(self, entry):
+        """Current state of the record, null for deletions"""
+        if entry.instance is None:
+            return None
+        serializer_class = CHANGE_FEED_SERIALIZERS[entry.model]
+        return serializer_class(entry.instance, context=self.context).data
+
+
+CHANGE_FEED_SERIALIZERS = {
+    "genre": GenreSerializer,
+    "actor": ActorSerializer,
+    "play": PlaySerializer,
+    "theatrehall": TheatreHallSerializer,
+    "performance": PerformanceSerializer,
+}
+
+
+class GenreImportSerializer(serializers.Serializer):
+    name = serializers.CharField(max_length=255)
+
+
+class ActorImportSerializer(serializers.Serializer):
+    first_name = serializers.CharField(max_length=255)
+    last_name = serializers.CharField(max_length=255)
+
+
+class PlayImportSerializer(serializers.Serializer):
+    title = serializers.CharField(max_length=255)
+    description = serializers.CharField(
+        allow_blank=True, allow_null=True, default=None
+    )
+    genres = serializers.ListField(
+        child=serializers.CharField(max_length=255), default=list
+    )
+    actors = serializers.ListField(
+        child=serializers.CharField(max_length=511), default=list
+    )
+
+
+class PerformanceImportSerializer(serializers.Serializer):
+    play = serializers.CharField(max_length=255)
+    theatre_hall = serializers.CharField(max_length=255)
+    show_time = serializers.DateTimeField()
+
+
+CATALOG_IMPORT_SERIALIZERS = {
+    "genre": GenreImportSerializer,
+    "actor": ActorImportSerializer,
+    "play": PlayImportSerializer,
+    "performance": PerformanceImportSerializer,
+}
@@ -0,0 +1,230 @@
+from django.db import transaction
+from django.db.models.signals import (
+    pre_save,
+    post_save,
+    post_delete,
+    pre_delete,
+    m2m_changed,
+)
+from django.dispatch import receiver
+
+from theatre.models import (
+    Genre,
+    Actor,
+    Play,
+    TheatreHall,
+    Performance,
+    Ticket,
+    ChangeLogEntry,
+    OccupancyRollup,
+    rollup_key,
+)
+from theatre.response_cache import bump_version
+from theatre.search import refresh_search_documents
+from theatre.seat_map import update_seat_map, invalidate_seat_map
+
+
+@receiver(pre_save, sender=Ticket)
+def ticket_saving(sender, instance, raw=False, **kwargs):
+    # A ticket moved to another performance leaves the previous one
+    instance._previous_performance_id = (
+        Ticket.objects.filter(pk=instance.pk)
+        .values_list("performance_id", flat=True)
+        .first()
+        if instance.pk and not raw
+        else None
+    )
+
+
+@receiver(post_save, sender=Ticket)
+def ticket_saved(sender, instance, created, raw=False, **kwargs):
+    if raw:
+        return
+    performance_id = instance.performance_id
+    previous_id = instance._previous_performance_id
+    if created:
+        Performance.objects.adjust_tickets_sold(performance_id, 1)
+        seats = [(instance.row, instance.seat)]
+        transaction.on_commit(lambda: update_seat_map(performance_id, seats))
+    elif previous_id is not None and previous_id != performance_id:
+        # In id order like reservations, so concurrent updates cannot deadlock
+        for moved_id, delta in sorted(
+            [(previous_id, -1), (performance_id, 1)]
+        ):
+            Performance.objects.adjust_tickets_sold(moved_id, delta)
+        transaction.on_commit(lambda: invalidate_seat_map(previous_id))
+        transaction.on_commit(lambda: invalidate_seat_map(performance_id))
+    else:
+        Performance.objects.touch(performance_id)
+        transaction.on_commit(lambda: invalidate_seat_map(performance_id))
+
+
+@receiver(post_delete, sender=Ticket)
+def ticket_deleted(sender, instance, **kwargs):
+    performance_id = instance.performance_id
+    Performance.objects.adjust_tickets_sold(performance_id, -1)
+    seats = [(instance.row, instance.seat)]
+    transaction.on_commit(
+        lambda: update_seat_map(performance_id, seats, taken=False)
+    )
+
+
+@receiver(pre_save, sender=Play)
+def play_saving(sender, instance, raw=False, **kwargs):
+    instance._previous_duration = (
+        Play.objects.filter(pk=instance.pk)
+        .values_list("duration", flat=True)
+        .first()
+        if instance.pk and not raw
+        else None
+    )
+
+
+@receiver(post_save, sender=Play)
+def play_saved(sender, instance, raw=False, **kwargs):
+    refresh_search_documents([instance.id])
+    previous = getattr(instance, "_previous_duration", None)
+    if raw or previous is None or previous == instance.duration:
+        return
+    # Performances keep their show_time and end with the new duration
+    performance_ids = list(
+        instance.performances.values_list("id", flat=True)
+    )
+    Performance.objects.set_duration(instance)
+    ChangeLogEntry.objects.record(
+        Performance, performance_ids, ChangeLogEntry.Action.UPDATED
+    )
+
+
+@receiver(m2m_changed, sender=Play.actors.through)
+def play_actors_changed(sender, instance, action, reverse, pk_set, **kwargs):
+    if reverse and action == "pre_clear":
+        instance._search_play_ids = list(
+            instance.plays.values_list("id", flat=True)
+        )
+    elif action in ("post_add", "post_remove"):
+        refresh_search_documents(pk_set if reverse else [instance.id])
+    elif action == "post_clear":
+        refresh_search_documents(
+            instance._search_play_ids if reverse else [instance.id]
+        )
+
+
+@receiver(post_save, sender=Actor)
+def actor_saved(sender, instance, created, **kwargs):
+    if not created:
+        refresh_search_documents(
+            list(instance.plays.values_list("id", flat=True))
+        )
+
+
+@receiver(pre_delete, sender=Actor)
+def actor_deleting(sender, instance, **kwargs):
+    instance._search_play_ids = list(
+        instance.plays.values_list("id", flat=True)
+    )
+
+
+@receiver(post_delete, sender=Actor)
+def actor_deleted(sender, instance, **kwargs):
+    refresh_search_documents(instance._search_play_ids)
+
+
+@receiver(post_save, sender=Genre)
+@receiver(post_delete, sender=Genre)
+@receiver(post_save, sender=Actor)
+@receiver(post_delete, sender=Actor)
+@receiver(post_save, sender=Play)
+@receiver(post_delete, sender=Play)
+@receiver(post_save, sender=TheatreHall)
+@receiver(post_delete, sender=TheatreHall)
+def catalog_changed(sender, **kwargs):
+    bump_version(sender)
+
+
+@receiver(post_save, sender=Genre)
+@receiver(post_save, sender=Actor)
+@receiver(post_save, sender=Play)
+@receiver(post_save, sender=TheatreHall)
+@receiver(post_save, sender=Performance)
+def log_saved(sender, instance, created, **kwargs):
+    action = (
+        ChangeLogEntry.Action.CREATED
+        if created
+        else ChangeLogEntry.Action.UPDATED
+    )
+    ChangeLogEntry.objects.record(sender, [instance.id], action)
+
+
+@receiver(post_delete, sender=Genre)
+@receiver(post_delete, sender=Actor)
+@receiver(post_delete, sender=Play)
+@receiver(post_delete, sender=TheatreHall)
+@receiver(post_delete, sender=Performance)
+def log_deleted(sender, instance, **kwargs):
+    ChangeLogEntry.objects.record(
+        sender, [instance.id], ChangeLogEntry.Action.DELETED
+    )
+
+
+@receiver(m2m_changed, sender=Play.genres.through)
+@receiver(m2m_changed, sender=Play.actors.through)
+def play_relations_changed(sender, instance, action, reverse, pk_set,
+                           **kwargs):
+    if reverse and action == "pre_clear":
+        instance._changed_play_ids = list(
+            instance.plays.values_list("id", flat=True)
+        )
+    if not action.startswith("post_"):
+        return
+
+    bump_version(Play)
+    if not reverse:
+        play_ids = [instance.id]
+    elif action == "post_clear":
+        play_ids = instance._changed_play_ids
+    else:
+        play_ids = pk_set
+    ChangeLogEntry.objects.record(
+        Play, play_ids, ChangeLogEntry.Action.UPDATED
+    )
+
+
+@receiver(pre_save, sender=Performance)
+def performance_saving(sender, instance, raw=False, **kwargs):
+    # A moved performance leaves its previous rollup row behind
+    instance._previous_rollup_keys = (
+        {
+            rollup_key(performance)
+            for performance in Performance.objects.filter(pk=instance.pk)
+        }
+        if instance.pk and not raw
+        else set()
+    )
+
+
+@receiver(post_save, sender=Performance)
+def performance_saved(sender, instance, raw=False, **kwargs):
+    if raw:
+        return
+    OccupancyRollup.objects.refresh(
+        instance._previous_rollup_keys | {rollup_key(instance)}
+    )
+
+
+@receiver(post_delete, sender=Performance)
+def performance_deleted(sender, instance, **kwargs):
+    OccupancyRollup.objects.refresh([rollup_key(instance)])
+
+
+@receiver(post_save, sender=TheatreHall)
+def theatre_hall_saved(sender, instance, created, raw=False, **kwargs):
+    if created or raw:
+        return
+    # Rows and seats may have changed the capacity of its performances
+    OccupancyRollup.objects.refresh(
+        rollup_key(performance)
+        for performance in instance.performances.only(
+            "show_time", "play_id", "theatre_hall_id"
+        )
+    )
@@ -0,0 +1,163 @@
+from rest_framework.permissions import SAFE_METHODS
+from rest_framework.serializers import ModelSerializer
+
+
+def parse_paths(value):
+    """
+    Turn "id,play.title,play.genres" into {"id": {}, "play": {"title": {},
+    "genres": {}}}. An empty node stands for the whole field.
+    """
+    tree = {}
+    for path in value.split(","):
+        node = tree
+        for name in path.strip().split("."):
+            if name:
+                node = node.setdefault(name, {})
+    return tree
+
+
+def subtree(tree, name):
+    """Requested fields below `name`, None when all of them are wanted"""
+    if tree is None:
+        return None
+    return tree.get(name) or None
+
+
+def includes(tree, path):
+    """Whether `path` is rendered under a field tree, None means all"""
+    node = tree
+    for name in path.split("."):
+        if not node:
+            return True
+        if name not in node:
+            return False
+        node = node[name]
+    return True
+
+
+def contains(tree, path):
+    """Whether every name of `path` was listed, as expand trees need"""
+    node = tree
+    for name in path.split("."):
+        if name not in node:
+            return False
+        node = node[name]
+    return True
+
+
+class SparseFieldsSerializerMixin:
+    """
+    Keep only the fields in `sparse_fields` and swap the fields named in
+    `sparse_expand` for the nested serializers of `expandable_fields`.
+    Both trees come from parse_paths and are handed down to nested
+    serializers, so dotted paths reach any depth.
+    """
+
+    # {field name: (serializer class, keyword arguments)}
+    expandable_fields = {}
+
+    def __init__(self, *args, sparse_fields=None, sparse_expand=None,
+                 **kwargs):
+        self.sparse_fields = sparse_fields
+        self.sparse_expand = sparse_expand or {}
+        super().__init__(*args, **kwargs)
+
+    def get_fields(self):
+        fields = super().get_fields()
+        if self.sparse_fields is not None:
+            fields = {
+                name: field
+                for name, field in fields.items()
+                if name in self.sparse_fields
+            }
+
+        for name in fields:
+            nested_fields = subtree(self.sparse_fields, name)
+            nested_expand = self.sparse_expand.get(name, {})
+            if name in self.sparse_expand and name in self.expandable_fields:
+                serializer_class, kwargs = self.expandable_fields[name]
+                fields[name] = serializer_class(
+                    read_only=True,
+                    sparse_fields=nested_fields,
+                    sparse_expand=nested_expand,
+                    **kwargs,
+                )
+                continue
+
+            nested = getattr(fields[name], "child", fields[name])
+            if isinstance(nested, SparseFieldsSerializerMixin):
+                nested.sparse_fields = nested_fields
+                nested.sparse_expand = nested_expand
+        return fields
+
+
+class SparseFieldsModelSerializer(SparseFieldsSerializerMixin,
+                                  ModelSerializer):
+    pass
+
+
+class SparseFieldsViewMixin:
+    """
+    Read `?fields=` and `?expand=` on GET requests, prune the serializer
+    accordingly and only join or prefetch relations whose fields are
+    rendered. `select_related_fields` and `prefetch_related_fields` map
+    dotted field paths to the lookups they need, `expand_related_fields`
+    does the same for relations only loaded when expanded.
+    """
+
+    select_related_fields = {}
+    prefetch_related_fields = {}
+    expand_related_fields = {}
+
+    def _sparse_param(self, name):
+        if self.request.method not in SAFE_METHODS:
+            return None
+        value = self.request.query_params.get(name)
+        return parse_paths(value) if value else None
+
+    @property
+    def sparse_fields(self):
+        return self._sparse_param("fields")
+
+    @property
+    def sparse_expand(self):
+        return self._sparse_param("expand") or {}
+
+    def _related_lookups(self, lookups_by_path, expanded_only=False):
+        fields = self.sparse_fields
+        expand = self.sparse_expand
+        lookups = []
+        for path, path_lookups in lookups_by_path.items():
+            if expanded_only and not contains(expand, path):
+                continue
+            if includes(fields, path):
+                lookups += [
+                    lookup for lookup in path_lookups if lookup not in lookups
+                ]
+        return lookups
+
+    def filter_queryset(self, queryset):
+        queryset = super().filter_queryset(queryset)
+        if self.select_related_fields:
+            queryset = queryset.select_related(None)
+            select_related = self._related_lookups(self.select_related_fields)
+            if select_related:
+                queryset = queryset.select_related(*select_related)
+        if self.prefetch_related_fields:
+            queryset = queryset.prefetch_related(None).prefetch_related(
+                *self._related_lookups(self.prefetch_related_fields)
+            )
+        if self.expand_related_fields:
+            queryset = queryset.prefetch_related(
+                *self._related_lookups(
+                    self.expand_related_fields, expanded_only=True
+                )
+            )
+        return queryset
+
+    def get_serializer(self, *args, **kwargs):
+        serializer_class = self.get_serializer_class()
+        if issubclass(serializer_class, SparseFieldsSerializerMixin):
+            kwargs.setdefault("sparse_fields", self.sparse_fields)
+            kwargs.setdefault("sparse_expand", self.sparse_expand)
+        return super().get_serializer(*args, **kwargs)
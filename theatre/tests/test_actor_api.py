@@ -46,7 +46,7 @@ class AuthenticatedActorApiTests(TestCase):
         serializer = ActorSerializer(actors, many=True)
 
         self.assertEqual(response.status_code, status.HTTP_200_OK)
-        self.assertEqual(response.data, serializer.data)
+        self.assertEqual(response.data["results"], serializer.data)
 
     def test_create_actor_forbidden(self):
         payload = {
@@ -76,7 +76,7 @@ class AdminActorApiTests(TestCase):
         serializer = ActorSerializer(actors, many=True)
 
         self.assertEqual(response.status_code, status.HTTP_200_OK)
-        self.assertEqual(response.data, serializer.data)
+        self.assertEqual(response.data["results"], serializer.data)
 
     def test_create_actor_permitted(self):
         payload = {
@@ -0,0 +1,178 @@
+import tempfile
+from io import StringIO
+
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.core.management import call_command
+from django.test import TestCase
+from django.urls import reverse
+from rest_framework import status
+from rest_framework.test import APIClient
+
+from theatre.models import (
+    Genre,
+    Actor,
+    Play,
+    TheatreHall,
+    Performance,
+    ChangeLogEntry,
+)
+
+IMPORT_URL = reverse("theatre:catalog-import-list")
+
+SEASON = (
+    '{"type": "genre", "name": "Drama"}\n'
+    '{"type": "genre", "name": "Tragedy"}\n'
+    '{"type": "actor", "first_name": "Laurence", "last_name": "Olivier"}\n'
+    '{"type": "actor", "first_name": "Deborah", "last_name": "Kerr"}\n'
+    '{"type": "play", "title": "Hamlet", "description": "Prince", '
+    '"genres": ["Drama", "Tragedy"], "actors": ["Laurence Olivier"]}\n'
+    '{"type": "play", "title": "Arcadia"}\n'
+    '{"type": "performance", "play": "Hamlet", "theatre_hall": "Main", '
+    '"show_time": "2024-06-02T19:00:00+00:00"}\n'
+)
+
+
+class CatalogImportPermissionTests(TestCase):
+    def setUp(self) -> None:
+        self.client = APIClient()
+        self.user = get_user_model().objects.create_user(
+            "test@test.com",
+            "testpassword",
+        )
+        self.client.force_authenticate(self.user)
+
+    def test_admin_required(self):
+        response = self.client.post(
+            IMPORT_URL, SEASON, content_type="application/x-ndjson"
+        )
+
+        self.assertEqual(response.status_code, status.HTTP_403_FORBIDDEN)
+        self.assertFalse(Genre.objects.exists())
+
+
+class CatalogImportApiTests(TestCase):
+    def setUp(self) -> None:
+        cache.clear()
+        self.client = APIClient()
+        self.admin = get_user_model().objects.create_superuser(
+            "admin@test.com",
+            "testpassword",
+        )
+        self.client.force_authenticate(self.admin)
+        self.hall = TheatreHall.objects.create(
+            name="Main", rows=10, seats_in_row=12
+        )
+
+    def post(self, body):
+        return self.client.post(
+            IMPORT_URL, body, content_type="application/x-ndjson"
+        )
+
+    def test_import_creates_records_with_relations(self):
+        response = self.post(SEASON)
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(
+            response.data["created"],
+            {"genre": 2, "actor": 2, "play": 2, "performance": 1},
+        )
+        self.assertEqual(response.data["errors"], [])
+        hamlet = Play.objects.get(title="Hamlet")
+        self.assertEqual(
+            set(hamlet.genres.values_list("name", flat=True)),
+            {"Drama", "Tragedy"},
+        )
+        self.assertEqual(
+            list(hamlet.actors.values_list("last_name", flat=True)),
+            ["Olivier"],
+        )
+        self.assertEqual(hamlet.search_document, "hamlet prince laurence olivier")
+        self.assertEqual(
+            Performance.objects.get().theatre_hall_id, self.hall.id
+        )
+        self.assertEqual(
+            ChangeLogEntry.objects.filter(model="play", action="created").count(),
+            2,
+        )
+
+    def test_reimport_updates_plays_without_duplicates(self):
+        self.post(SEASON)
+        hamlet = Play.objects.get(title="Hamlet")
+
+        response = self.post(
+            SEASON.replace('"Prince"', '"Prince of Denmark"').replace(
+                '["Drama", "Tragedy"]', '["Drama"]'
+            )
+        )
+
+        self.assertEqual(
+            response.data["created"],
+            {"genre": 0, "actor": 0, "play": 0, "performance": 0},
+        )
+        self.assertEqual(response.data["updated"]["play"], 2)
+        hamlet.refresh_from_db()
+        self.assertEqual(hamlet.description, "Prince of Denmark")
+        self.assertEqual(
+            list(hamlet.genres.values_list("name", flat=True)), ["Drama"]
+        )
+        self.assertEqual(Play.objects.count(), 2)
+        self.assertEqual(Actor.objects.count(), 2)
+        self.assertEqual(Performance.objects.count(), 1)
+
+    def test_invalid_lines_are_reported_and_skipped(self):
+        response = self.post(
+            '{"type": "genre", "name": "Drama"}\n'
+            "not json\n"
+            '{"type": "theatre_hall", "name": "Small"}\n'
+            '{"type": "play", "genres": ["Drama"]}\n'
+            '{"type": "play", "title": "Hamlet", "genres": ["Comedy"]}\n'
+            '{"type": "performance", "play": "Macbeth", '
+            '"theatre_hall": "Main", "show_time": "2024-06-02T19:00:00"}\n'
+        )
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(
+            [error["line"] for error in response.data["errors"]],
+            [2, 3, 4, 5, 6],
+        )
+        self.assertIn("title", response.data["errors"][2]["errors"])
+        self.assertEqual(
+            response.data["errors"][3]["errors"],
+            {"genres": ["Unknown name: Comedy."]},
+        )
+        self.assertEqual(response.data["created"]["genre"], 1)
+        self.assertFalse(Play.objects.exists())
+
+    def test_overlapping_performance_rejected(self):
+        response = self.post(
+            SEASON
+            + '{"type": "performance", "play": "Arcadia", '
+            '"theatre_hall": "Main", "show_time": "2024-06-02T20:00:00+00:00"}\n'
+        )
+
+        self.assertEqual(
+            response.data["errors"],
+            [
+                {
+                    "line": 8,
+                    "errors": {
+                        "show_time": [
+                            "The theatre hall is already booked at this time."
+                        ]
+                    },
+                }
+            ],
+        )
+        self.assertEqual(Performance.objects.count(), 1)
+
+    def test_import_command(self):
+        with tempfile.NamedTemporaryFile(suffix=".ndjson") as import_file:
+            import_file.write(SEASON.encode())
+            import_file.flush()
+            call_command(
+                "import_catalog", import_file.name, stdout=StringIO()
+            )
+
+        self.assertEqual(Play.objects.count(), 2)
+        self.assertEqual(Performance.objects.count(), 1)
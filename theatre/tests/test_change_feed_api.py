@@ -0,0 +1,133 @@
+from django.contrib.auth import get_user_model
+from django.test import TestCase
+from django.urls import reverse
+from rest_framework import status
+from rest_framework.test import APIClient
+
+from theatre.models import Genre, Actor, Play, ChangeLogEntry
+
+CHANGES_URL = reverse("theatre:changelogentry-list")
+
+
+class UnauthenticatedChangeFeedApiTests(TestCase):
+    def setUp(self) -> None:
+        self.client = APIClient()
+
+    def test_auth_required(self):
+        response = self.client.get(CHANGES_URL)
+        self.assertEqual(response.status_code, status.HTTP_401_UNAUTHORIZED)
+
+
+class ChangeFeedApiTests(TestCase):
+    def setUp(self) -> None:
+        self.client = APIClient()
+        self.user = get_user_model().objects.create_user(
+            "test@test.com",
+            "testpassword",
+        )
+        self.client.force_authenticate(self.user)
+
+    def sync(self, since=0, **params):
+        return self.client.get(CHANGES_URL, {"since": since, **params})
+
+    def test_full_sync_lists_created_records(self):
+        genre = Genre.objects.create(name="Drama")
+        play = Play.objects.create(title="Hamlet")
+
+        response = self.sync()
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(
+            [
+                (change["model"], change["object_id"], change["action"])
+                for change in response.data["changes"]
+            ],
+            [("genre", genre.id, "created"), ("play", play.id, "created")],
+        )
+        self.assertEqual(response.data["changes"][1]["data"]["title"], "Hamlet")
+        self.assertFalse(response.data["has_more"])
+
+    def test_incremental_sync_returns_only_churn(self):
+        Genre.objects.create(name="Drama")
+        play = Play.objects.create(title="Hamlet")
+        cursor = self.sync().data["cursor"]
+
+        play.title = "Macbeth"
+        play.save()
+        play.title = "Othello"
+        play.save()
+        response = self.sync(cursor)
+
+        self.assertEqual(len(response.data["changes"]), 1)
+        change = response.data["changes"][0]
+        self.assertEqual(change["action"], "updated")
+        self.assertEqual(change["data"]["title"], "Othello")
+        self.assertEqual(self.sync(response.data["cursor"]).data["changes"], [])
+
+    def test_deletion_returns_tombstone(self):
+        actor = Actor.objects.create(first_name="Laurence", last_name="Olivier")
+        actor_id = actor.id
+        cursor = self.sync().data["cursor"]
+
+        actor.delete()
+        response = self.sync(cursor)
+
+        self.assertEqual(
+            response.data["changes"],
+            [
+                {
+                    "model": "actor",
+                    "object_id": actor_id,
+                    "action": "deleted",
+                    "data": None,
+                }
+            ],
+        )
+
+    def test_relation_change_marks_play_updated(self):
+        play = Play.objects.create(title="Hamlet")
+        genre = Genre.objects.create(name="Drama")
+        cursor = self.sync().data["cursor"]
+
+        play.genres.add(genre)
+        response = self.sync(cursor)
+
+        self.assertEqual(response.data["changes"][0]["model"], "play")
+        self.assertEqual(response.data["changes"][0]["data"]["genres"], [genre.id])
+
+    def test_limit_pages_through_log(self):
+        for index in range(3):
+            Genre.objects.create(name=f"Genre{index}")
+
+        first = self.sync(limit=2)
+        second = self.sync(first.data["cursor"], limit=2)
+
+        self.assertTrue(first.data["has_more"])
+        self.assertEqual(len(first.data["changes"]), 2)
+        self.assertFalse(second.data["has_more"])
+        self.assertEqual(len(second.data["changes"]), 1)
+
+    def test_entries_of_long_transaction_are_not_skipped(self):
+        # A long import takes its log ids first and commits last. Its
+        # entries are left out until then, as other connections see it.
+        Genre.objects.create(name="Imported")
+        in_flight = list(ChangeLogEntry.objects.values())
+        ChangeLogEntry.objects.all().delete()
+        Genre.objects.create(name="Drama")
+        cursor = self.sync().data["cursor"]
+
+        ChangeLogEntry.objects.bulk_create(
+            ChangeLogEntry(**entry) for entry in in_flight
+        )
+        response = self.sync(cursor)
+
+        self.assertEqual(
+            [change["data"]["name"] for change in response.data["changes"]],
+            ["Imported"],
+        )
+        self.assertGreater(response.data["cursor"], cursor)
+
+    def test_invalid_cursor(self):
+        response = self.sync("abc")
+
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
@@ -0,0 +1,97 @@
+import json
+
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.test import TestCase
+from django.urls import reverse
+from rest_framework.renderers import JSONRenderer
+from rest_framework.test import APIClient
+
+from theatre.models import (
+    Genre,
+    Actor,
+    Play,
+    TheatreHall,
+    Performance,
+    Reservation,
+    Ticket,
+)
+from theatre.serializers import PlayListSerializer, PerformanceListSerializer
+
+PLAY_URL = reverse("theatre:play-list")
+PERFORMANCE_URL = reverse("theatre:performance-list")
+
+
+def serialized(serializer_class, queryset, request):
+    data = serializer_class(
+        queryset, many=True, context={"request": request}
+    ).data
+    return json.loads(JSONRenderer().render(data))
+
+
+class FastListParityTests(TestCase):
+    def setUp(self) -> None:
+        cache.clear()
+        self.client = APIClient()
+        self.user = get_user_model().objects.create_user(
+            "test@test.com",
+            "testpassword",
+        )
+        self.client.force_authenticate(self.user)
+
+        drama = Genre.objects.create(name="Drama")
+        comedy = Genre.objects.create(name="Comedy")
+        olivier = Actor.objects.create(first_name="Laurence", last_name="Olivier")
+        kerr = Actor.objects.create(first_name="Deborah", last_name="Kerr")
+
+        hamlet = Play.objects.create(title="Hamlet", description="Prince")
+        hamlet.genres.add(drama, comedy)
+        hamlet.actors.add(olivier, kerr)
+        Play.objects.filter(id=hamlet.id).update(
+            image="uploads/plays/hamlet.jpg"
+        )
+        Play.objects.create(title="Arcadia")
+
+        hall = TheatreHall.objects.create(name="Main", rows=10, seats_in_row=12)
+        for show_time in ("2024-06-02 19:00:00+00:00", "2024-06-03 19:00:00"):
+            performance = Performance.objects.create(
+                play=hamlet, theatre_hall=hall, show_time=show_time
+            )
+        Ticket.objects.create(
+            row=1,
+            seat=1,
+            performance=performance,
+            reservation=Reservation.objects.create(user=self.user),
+        )
+
+    def test_play_list_matches_serializer(self):
+        response = self.client.get(PLAY_URL)
+
+        expected = serialized(
+            PlayListSerializer,
+            Play.objects.order_by("title", "id"),
+            response.wsgi_request,
+        )
+        self.assertEqual(json.loads(response.content)["results"], expected)
+
+    def test_performance_list_matches_serializer(self):
+        response = self.client.get(PERFORMANCE_URL)
+
+        expected = serialized(
+            PerformanceListSerializer,
+            Performance.objects.with_tickets_available().order_by(
+                "-show_time", "-id"
+            ),
+            response.wsgi_request,
+        )
+        self.assertEqual(json.loads(response.content)["results"], expected)
+
+    def test_filtered_play_list_matches_serializer(self):
+        response = self.client.get(PLAY_URL, {"search": "prince"})
+
+        expected = serialized(
+            PlayListSerializer,
+            Play.objects.filter(title="Hamlet"),
+            response.wsgi_request,
+        )
+        self.assertEqual(json.loads(response.content)["results"], expected)
@@ -1,10 +1,16 @@
+from unittest import mock
+
 from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.core.cache.backends.locmem import LocMemCache
+from django.db import connection
 from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
 from django.urls import reverse
 from rest_framework import status
 from rest_framework.test import APIClient
 
-from theatre.models import Genre
+from theatre.models import Genre, Play
 from theatre.serializers import GenreSerializer
 
 
@@ -48,7 +54,7 @@ class AuthenticatedGenreApiTests(TestCase):
         serializer = GenreSerializer(genres, many=True)
 
         self.assertEqual(response.status_code, status.HTTP_200_OK)
-        self.assertEqual(response.data, serializer.data)
+        self.assertEqual(response.data["results"], serializer.data)
 
     def test_create_genre_forbidden(self):
         payload = {
@@ -77,7 +83,7 @@ class AdminGenreApiTests(TestCase):
         serializer = GenreSerializer(genres, many=True)
 
         self.assertEqual(response.status_code, status.HTTP_200_OK)
-        self.assertEqual(response.data, serializer.data)
+        self.assertEqual(response.data["results"], serializer.data)
 
     def test_create_genre_permitted(self):
         payload = {
@@ -85,3 +91,124 @@ class AdminGenreApiTests(TestCase):
         }
         response = self.client.post(GENRE_URL, payload)
         self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+
+
+class GenrePaginationApiTests(TestCase):
+    def setUp(self) -> None:
+        self.client = APIClient()
+        self.user = get_user_model().objects.create_user(
+            "test@test.com",
+            "testpassword",
+        )
+        self.client.force_authenticate(self.user)
+
+    def test_cursor_pages_cover_all_genres_once(self):
+        for index in range(7):
+            sample_genre(name=f"Genre{index}")
+
+        names = []
+        url = f"{GENRE_URL}?page_size=3"
+        while url:
+            response = self.client.get(url)
+            names += [genre["name"] for genre in response.data["results"]]
+            url = response.data["next"]
+
+        self.assertEqual(names, [f"Genre{index}" for index in range(7)])
+
+    def test_page_size_is_bounded(self):
+        response = self.client.get(GENRE_URL, {"page_size": 1000})
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertNotIn("count", response.data)
+
+
+class GenreResponseCacheTests(TestCase):
+    def setUp(self) -> None:
+        cache.clear()
+        self.client = APIClient()
+        self.user = get_user_model().objects.create_user(
+            "test@test.com",
+            "testpassword",
+        )
+        self.client.force_authenticate(self.user)
+
+    def test_repeated_list_is_served_from_cache(self):
+        sample_genre(name="Genre1")
+        first = self.client.get(GENRE_URL)
+
+        with CaptureQueriesContext(connection) as queries:
+            second = self.client.get(GENRE_URL)
+
+        self.assertEqual(second.data, first.data)
+        self.assertFalse(
+            any('"theatre_genre"' in query["sql"] for query in queries)
+        )
+
+    def test_write_invalidates_cached_list(self):
+        genre = sample_genre(name="Genre1")
+        self.client.get(GENRE_URL)
+
+        genre.name = "Renamed"
+        genre.save()
+        sample_genre(name="Genre2")
+        response = self.client.get(GENRE_URL)
+
+        self.assertEqual(
+            [result["name"] for result in response.data["results"]],
+            ["Genre2", "Renamed"],
+        )
+
+    def test_write_in_another_worker_invalidates_cached_list(self):
+        sample_genre(name="Genre1")
+        self.client.get(GENRE_URL)
+
+        # The other worker process has a cache of its own
+        with mock.patch(
+            "theatre.response_cache.cache", LocMemCache("other-worker", {})
+        ):
+            sample_genre(name="Genre2")
+        response = self.client.get(GENRE_URL)
+
+        self.assertEqual(
+            [result["name"] for result in response.data["results"]],
+            ["Genre1", "Genre2"],
+        )
+
+    def test_genre_changes_invalidate_cached_plays(self):
+        play = Play.objects.create(title="Play")
+        genre = sample_genre(name="Genre1")
+        play_url = reverse("theatre:play-detail", args=[play.id])
+        self.client.get(play_url)
+
+        play.genres.add(genre)
+        added = self.client.get(play_url)
+        genre.name = "Renamed"
+        genre.save()
+        renamed = self.client.get(play_url)
+
+        self.assertEqual(added.data["genres"][0]["name"], "Genre1")
+        self.assertEqual(renamed.data["genres"][0]["name"], "Renamed")
+
+    def test_matching_etag_returns_not_modified(self):
+        sample_genre(name="Genre1")
+        etag = self.client.get(GENRE_URL)["ETag"]
+
+        unchanged = self.client.get(GENRE_URL, HTTP_IF_NONE_MATCH=etag)
+        sample_genre(name="Genre2")
+        changed = self.client.get(GENRE_URL, HTTP_IF_NONE_MATCH=etag)
+
+        self.assertEqual(unchanged.status_code, status.HTTP_304_NOT_MODIFIED)
+        self.assertEqual(changed.status_code, status.HTTP_200_OK)
+
+    def test_write_in_another_worker_changes_etag(self):
+        sample_genre(name="Genre1")
+        etag = self.client.get(GENRE_URL)["ETag"]
+
+        with mock.patch(
+            "theatre.response_cache.cache", LocMemCache("other-worker", {})
+        ):
+            Genre.objects.get().delete()
+        response = self.client.get(GENRE_URL, HTTP_IF_NONE_MATCH=etag)
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data["results"], [])
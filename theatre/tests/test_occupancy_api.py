@@ -0,0 +1,220 @@
+from io import StringIO
+
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.core.management import call_command
+from django.db import connection
+from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from rest_framework import status
+from rest_framework.test import APIClient
+
+from theatre.models import (
+    Play,
+    TheatreHall,
+    Performance,
+    Reservation,
+    Ticket,
+    OccupancyRollup,
+)
+from theatre.seat_map import get_seat_map
+
+OCCUPANCY_URL = reverse("theatre:occupancy-list")
+RESERVATION_URL = reverse("theatre:reservation-list")
+
+
+class OccupancyApiTests(TestCase):
+    def setUp(self) -> None:
+        self.client = APIClient()
+        self.admin = get_user_model().objects.create_superuser(
+            "admin@test.com",
+            "testpassword",
+        )
+        self.client.force_authenticate(self.admin)
+
+        self.hall = TheatreHall.objects.create(
+            name="Main", rows=10, seats_in_row=10
+        )
+        self.hamlet = Play.objects.create(title="Hamlet")
+        self.arcadia = Play.objects.create(title="Arcadia")
+        self.first = Performance.objects.create(
+            play=self.hamlet,
+            theatre_hall=self.hall,
+            show_time="2024-06-01T19:00:00+03:00",
+        )
+        self.second = Performance.objects.create(
+            play=self.hamlet,
+            theatre_hall=self.hall,
+            show_time="2024-06-02T19:00:00+03:00",
+        )
+        self.third = Performance.objects.create(
+            play=self.arcadia,
+            theatre_hall=self.hall,
+            show_time="2024-06-02T14:00:00+03:00",
+        )
+        self.reservation = Reservation.objects.create(user=self.admin)
+
+    def sell(self, performance, seats):
+        for seat in seats:
+            Ticket.objects.create(
+                row=1,
+                seat=seat,
+                performance=performance,
+                reservation=self.reservation,
+            )
+
+    def rollup(self, performance):
+        return OccupancyRollup.objects.get(
+            day=performance.show_time.date(),
+            play=performance.play,
+            theatre_hall=performance.theatre_hall,
+        )
+
+    def test_rollups_follow_ticket_sales(self):
+        self.sell(self.first, [1, 2, 3])
+        self.client.post(
+            RESERVATION_URL,
+            {
+                "tickets": [
+                    {"row": 2, "seat": seat, "performance": self.first.id}
+                    for seat in (1, 2)
+                ]
+            },
+            format="json",
+        )
+        Ticket.objects.filter(seat=3).get().delete()
+
+        rollup = self.rollup(self.first)
+        self.assertEqual(rollup.tickets_sold, 4)
+        self.assertEqual(rollup.performances, 1)
+        self.assertEqual(rollup.capacity, 100)
+
+    def test_rollups_follow_performance_changes(self):
+        self.sell(self.first, [1, 2])
+        self.first.refresh_from_db()
+
+        self.first.show_time = "2024-06-02T12:00:00+03:00"
+        self.first.save()
+        self.hall.rows = 20
+        self.hall.save()
+
+        self.assertFalse(
+            OccupancyRollup.objects.filter(day="2024-06-01").exists()
+        )
+        rollup = self.rollup(self.second)
+        self.assertEqual(rollup.performances, 2)
+        self.assertEqual(rollup.capacity, 400)
+        self.assertEqual(rollup.tickets_sold, 2)
+
+    def test_ticket_moved_to_another_performance(self):
+        cache.clear()
+        self.sell(self.first, [1])
+        ticket = Ticket.objects.get()
+        get_seat_map(self.first)
+        get_seat_map(self.third)
+
+        ticket.performance = self.third
+        with self.captureOnCommitCallbacks(execute=True):
+            ticket.save()
+
+        self.first.refresh_from_db()
+        self.third.refresh_from_db()
+        self.assertEqual(self.first.tickets_sold, 0)
+        self.assertEqual(self.third.tickets_sold, 1)
+        self.assertEqual(self.rollup(self.first).tickets_sold, 0)
+        self.assertEqual(self.rollup(self.third).tickets_sold, 1)
+        self.assertFalse(get_seat_map(self.first).is_taken(1, 1))
+        self.assertTrue(get_seat_map(self.third).is_taken(1, 1))
+
+    def test_group_by_play(self):
+        self.sell(self.first, [1, 2, 3])
+        self.sell(self.third, [1])
+
+        response = self.client.get(OCCUPANCY_URL, {"group_by": "play"})
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(
+            response.data,
+            [
+                {
+                    "play": self.arcadia.id,
+                    "play_title": "Arcadia",
+                    "performances": 1,
+                    "capacity": 100,
+                    "tickets_sold": 1,
+                    "occupancy": 0.01,
+                },
+                {
+                    "play": self.hamlet.id,
+                    "play_title": "Hamlet",
+                    "performances": 2,
+                    "capacity": 200,
+                    "tickets_sold": 3,
+                    "occupancy": 0.015,
+                },
+            ],
+        )
+
+    def test_group_by_day_within_range(self):
+        response = self.client.get(
+            OCCUPANCY_URL,
+            {
+                "group_by": "day,theatre_hall",
+                "date_from": "2024-06-02",
+                "date_to": "2024-06-30",
+            },
+        )
+
+        self.assertEqual(len(response.data), 1)
+        self.assertEqual(str(response.data[0]["day"]), "2024-06-02")
+        self.assertEqual(response.data[0]["theatre_hall_name"], "Main")
+        self.assertEqual(response.data[0]["performances"], 2)
+
+    def test_reads_only_rollups(self):
+        self.sell(self.first, [1])
+
+        with CaptureQueriesContext(connection) as queries:
+            self.client.get(OCCUPANCY_URL, {"group_by": "play,day"})
+
+        self.assertEqual(len(queries), 1)
+        self.assertNotIn("theatre_ticket", queries[0]["sql"])
+        self.assertNotIn("theatre_performance", queries[0]["sql"])
+
+    def test_rebuild_command_matches_incremental_rollups(self):
+        self.sell(self.first, [1, 2])
+        self.sell(self.third, [5])
+        incremental = list(
+            OccupancyRollup.objects.order_by("day", "play").values(
+                "day", "play", "theatre_hall", "performances", "capacity",
+                "tickets_sold",
+            )
+        )
+
+        call_command("rebuild_occupancy_rollups", stdout=StringIO())
+
+        self.assertEqual(
+            list(
+                OccupancyRollup.objects.order_by("day", "play").values(
+                    "day", "play", "theatre_hall", "performances",
+                    "capacity", "tickets_sold",
+                )
+            ),
+            incremental,
+        )
+
+    def test_invalid_group_by(self):
+        response = self.client.get(OCCUPANCY_URL, {"group_by": "user"})
+
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+    def test_admin_required(self):
+        self.client.force_authenticate(
+            get_user_model().objects.create_user(
+                "test@test.com", "testpassword"
+            )
+        )
+
+        response = self.client.get(OCCUPANCY_URL)
+
+        self.assertEqual(response.status_code, status.HTTP_403_FORBIDDEN)
@@ -6,17 +6,36 @@
 
 
 
+import base64
+from datetime import timedelta
+from io import StringIO
+from unittest import mock
+
 from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.core.cache.backends.locmem import LocMemCache
+from django.core.management import call_command
+from django.db import connection
 from django.db.models import F, Count
 from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
 from django.urls import reverse
 from rest_framework import status
 from rest_framework.test import APIClient
 
-from theatre.models import Play, Genre, Actor, TheatreHall, Performance
+from theatre.models import (
+    Play,
+    Genre,
+    Actor,
+    TheatreHall,
+    Performance,
+    Reservation,
+    Ticket,
+)
 from theatre.serializers import PerformanceSerializer, PerformanceListSerializer, PerformanceDetailSerializer
 
 PERFORMANCE_URL = reverse("theatre:performance-list")
+SCHEDULE_URL = reverse("theatre:performance-schedule")
 
 
 def sample_play(**params):
@@ -82,11 +101,11 @@ class AuthenticatedPlayApiTests(TestCase):
 
         response = self.client.get(PERFORMANCE_URL)
 
-        performances = get_performances()
+        performances = get_performances().order_by("-show_time", "-id")
         serializer = PerformanceListSerializer(performances, many=True)
 
         self.assertEqual(response.status_code, status.HTTP_200_OK)
-        self.assertEqual(response.data, serializer.data)
+        self.assertEqual(response.data["results"], serializer.data)
 
     def test_filter_performances_by_play(self):
         play1 = sample_play(title="Play1")
@@ -105,9 +124,9 @@ class AuthenticatedPlayApiTests(TestCase):
         serializer2 = serializer.data[1]
         serializer3 = serializer.data[2]
 
-        self.assertIn(serializer1, response.data)
-        self.assertIn(serializer2, response.data)
-        self.assertNotIn(serializer3, response.data)
+        self.assertIn(serializer1, response.data["results"])
+        self.assertIn(serializer2, response.data["results"])
+        self.assertNotIn(serializer3, response.data["results"])
 
     def test_filter_plays_by_date(self):
         sample_performance()
@@ -122,9 +141,40 @@ class AuthenticatedPlayApiTests(TestCase):
         serializer2 = serializer.data[1]
         serializer3 = serializer.data[2]
 
-        self.assertIn(serializer1, response.data)
-        self.assertIn(serializer2, response.data)
-        self.assertNotIn(serializer3, response.data)
+        self.assertIn(serializer1, response.data["results"])
+        self.assertIn(serializer2, response.data["results"])
+        self.assertNotIn(serializer3, response.data["results"])
+
+    def test_filter_performances_by_date_range(self):
+        sample_performance(show_time="2022-06-01 19:00:00+03:00")
+        inside_first = sample_performance(show_time="2022-06-02 00:00+03:00")
+        inside_last = sample_performance(show_time="2022-06-04 23:59+03:00")
+        sample_performance(show_time="2022-06-05 00:00:00+03:00")
+
+        response = self.client.get(
+            PERFORMANCE_URL,
+            {"date_from": "2022-06-02", "date_to": "2022-06-04"},
+        )
+
+        self.assertEqual(
+            [performance["id"] for performance in response.data["results"]],
+            [inside_last.id, inside_first.id],
+        )
+
+    def test_filter_performances_by_date_uses_local_day(self):
+        late_show = sample_performance(show_time="2022-06-02 22:30:00+00:00")
+
+        response = self.client.get(PERFORMANCE_URL, {"date": "2022-06-03"})
+
+        self.assertEqual(
+            [performance["id"] for performance in response.data["results"]],
+            [late_show.id],
+        )
+
+    def test_filter_performances_by_invalid_date(self):
+        response = self.client.get(PERFORMANCE_URL, {"date_from": "06/02"})
+
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
 
     def test_create_play_forbidden(self):
         payload = {
@@ -151,11 +201,11 @@ class AdminPerformanceApiTests(TestCase):
 
         response = self.client.get(PERFORMANCE_URL)
 
-        performances = get_performances()
+        performances = get_performances().order_by("-show_time", "-id")
         serializer = PerformanceListSerializer(performances, many=True)
 
         self.assertEqual(response.status_code, status.HTTP_200_OK)
-        self.assertEqual(response.data, serializer.data)
+        self.assertEqual(response.data["results"], serializer.data)
 
     def test_create_performance_permitted(self):
         play = sample_play()
@@ -169,3 +219,372 @@ class AdminPerformanceApiTests(TestCase):
         }
         response = self.client.post(PERFORMANCE_URL, payload)
         self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        self.assertEqual(
+            response.data["end_time"], "2022-06-02T02:00:00+03:00"
+        )
+
+    def test_create_overlapping_performance_rejected(self):
+        performance = sample_performance(show_time="2022-06-02 19:00")
+        payload = {
+            "play": performance.play_id,
+            "theatre_hall": performance.theatre_hall_id,
+            "show_time": "2022-06-02 20:30",
+        }
+
+        response = self.client.post(PERFORMANCE_URL, payload)
+
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertIn("show_time", response.data)
+
+    def test_play_duration_change_moves_end_times(self):
+        performance = sample_performance(show_time="2022-06-02 19:00")
+
+        response = self.client.patch(
+            reverse("theatre:play-detail", args=[performance.play_id]),
+            {"duration": "03:00:00"},
+        )
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        performance.refresh_from_db()
+        self.assertEqual(
+            performance.end_time - performance.show_time,
+            timedelta(hours=3),
+        )
+
+    def test_play_duration_overlapping_next_performance_rejected(self):
+        performance = sample_performance(show_time="2022-06-02 19:00")
+        Performance.objects.create(
+            play=sample_play(),
+            theatre_hall=performance.theatre_hall,
+            show_time="2022-06-02 22:00",
+        )
+
+        response = self.client.patch(
+            reverse("theatre:play-detail", args=[performance.play_id]),
+            {"duration": "04:00:00"},
+        )
+
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertIn("duration", response.data)
+        performance.refresh_from_db()
+        self.assertEqual(
+            performance.end_time - performance.show_time,
+            timedelta(hours=2),
+        )
+
+
+class PerformanceScheduleApiTests(TestCase):
+    def setUp(self) -> None:
+        self.client = APIClient()
+        self.user = get_user_model().objects.create_superuser(
+            "admin@test.com",
+            "testpassword",
+        )
+        self.client.force_authenticate(self.user)
+        self.play = sample_play()
+        self.theatre_hall = TheatreHall.objects.create(
+            name="Test theatre", rows=20, seats_in_row=20
+        )
+
+    def schedule(self, **params):
+        payload = {
+            "play": self.play.id,
+            "theatre_hall": self.theatre_hall.id,
+            "date_from": "2024-09-01",
+            "date_to": "2024-09-14",
+            "times": ["19:00"],
+            "weekdays": ["fri", "sat"],
+            **params,
+        }
+        return self.client.post(SCHEDULE_URL, payload, format="json")
+
+    def test_weekly_schedule_creates_performances(self):
+        response = self.schedule()
+
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        self.assertEqual(
+            [
+                performance["show_time"]
+                for performance in response.data["created"]
+            ],
+            [
+                "2024-09-06T19:00:00+03:00",
+                "2024-09-07T19:00:00+03:00",
+                "2024-09-13T19:00:00+03:00",
+                "2024-09-14T19:00:00+03:00",
+            ],
+        )
+        self.assertEqual(response.data["conflicts"], [])
+        self.assertEqual(
+            Performance.objects.filter(play=self.play).count(), 4
+        )
+
+    def test_booked_show_times_are_skipped(self):
+        booked = Performance.objects.create(
+            play=sample_play(title="Matinee"),
+            theatre_hall=self.theatre_hall,
+            show_time="2024-09-07T17:30:00+03:00",
+        )
+
+        response = self.schedule()
+
+        self.assertEqual(len(response.data["created"]), 3)
+        self.assertEqual(
+            response.data["conflicts"],
+            [
+                {
+                    "show_time": "2024-09-07T19:00:00+03:00",
+                    "end_time": "2024-09-07T21:00:00+03:00",
+                    "performance": booked.id,
+                }
+            ],
+        )
+
+    def test_overlapping_times_of_schedule_conflict(self):
+        response = self.schedule(
+            date_to="2024-09-01", frequency="daily", times=["13:00", "14:00"]
+        )
+
+        self.assertEqual(len(response.data["created"]), 1)
+        self.assertEqual(response.data["conflicts"][0]["performance"], None)
+
+    def test_dry_run_creates_nothing(self):
+        response = self.schedule(dry_run=True)
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(len(response.data["created"]), 4)
+        self.assertFalse(Performance.objects.exists())
+
+    def test_schedule_too_long_rejected(self):
+        response = self.schedule(
+            date_to="2030-01-01", frequency="daily", times=["10:00", "19:00"]
+        )
+
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertFalse(Performance.objects.exists())
+
+    def test_schedule_requires_admin(self):
+        self.client.force_authenticate(
+            get_user_model().objects.create_user(
+                "test@test.com", "testpassword"
+            )
+        )
+
+        response = self.schedule()
+
+        self.assertEqual(response.status_code, status.HTTP_403_FORBIDDEN)
+
+
+class PerformanceSeatMapTests(TestCase):
+    def setUp(self) -> None:
+        cache.clear()
+        self.client = APIClient()
+        self.user = get_user_model().objects.create_user(
+            "test@test.com",
+            "testpassword",
+        )
+        self.client.force_authenticate(self.user)
+        self.performance = sample_performance()
+        self.reservation = Reservation.objects.create(user=self.user)
+        for row, seat in [(1, 1), (1, 2), (3, 20)]:
+            Ticket.objects.create(
+                row=row,
+                seat=seat,
+                performance=self.performance,
+                reservation=self.reservation,
+            )
+
+    def test_taken_places_list(self):
+        response = self.client.get(detail_url(self.performance.id))
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(
+            response.data["taken_places"],
+            [
+                {"row": 1, "seat": 1},
+                {"row": 1, "seat": 2},
+                {"row": 3, "seat": 20},
+            ],
+        )
+
+    def test_taken_places_bitmap(self):
+        response = self.client.get(
+            detail_url(self.performance.id), {"seat_format": "bitmap"}
+        )
+
+        bitmap = base64.b64decode(response.data["taken_places"]["bitmap"])
+        self.assertEqual(len(bitmap), 20 * 20 // 8)
+        self.assertEqual(bitmap[0], 0b11000000)
+        self.assertEqual(bitmap[(2 * 20 + 19) // 8], 0b00010000)
+
+    def test_taken_places_rle(self):
+        response = self.client.get(
+            detail_url(self.performance.id), {"seat_format": "rle"}
+        )
+
+        self.assertEqual(
+            response.data["taken_places"]["runs"], [0, 2, 57, 1, 340]
+        )
+
+    def test_invalid_seat_format(self):
+        response = self.client.get(
+            detail_url(self.performance.id), {"seat_format": "xml"}
+        )
+
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+    def test_cached_seat_map_skips_ticket_table(self):
+        self.client.get(detail_url(self.performance.id))
+
+        with CaptureQueriesContext(connection) as queries:
+            self.client.get(detail_url(self.performance.id))
+
+        self.assertFalse(
+            any('FROM "theatre_ticket"' in query["sql"] for query in queries)
+        )
+
+    def test_seat_map_updated_on_ticket_delete(self):
+        self.client.get(detail_url(self.performance.id))
+
+        with self.captureOnCommitCallbacks(execute=True):
+            Ticket.objects.get(row=1, seat=2).delete()
+        response = self.client.get(detail_url(self.performance.id))
+
+        self.assertNotIn({"row": 1, "seat": 2}, response.data["taken_places"])
+
+
+class PerformanceTicketsSoldTests(TestCase):
+    def setUp(self) -> None:
+        self.client = APIClient()
+        self.user = get_user_model().objects.create_user(
+            "test@test.com",
+            "testpassword",
+        )
+        self.client.force_authenticate(self.user)
+        self.performance = sample_performance()
+
+    def test_reservation_increments_tickets_sold(self):
+        self.client.post(
+            reverse("theatre:reservation-list"),
+            {
+                "tickets": [
+                    {"row": 1, "seat": seat, "performance": self.performance.id}
+                    for seat in (1, 2, 3)
+                ]
+            },
+            format="json",
+        )
+        self.performance.refresh_from_db()
+
+        response = self.client.get(PERFORMANCE_URL)
+
+        self.assertEqual(self.performance.tickets_sold, 3)
+        self.assertEqual(response.data["results"][0]["tickets_available"], 400 - 3)
+
+    def test_reservation_delete_decrements_tickets_sold(self):
+        reservation = Reservation.objects.create(user=self.user)
+        Ticket.objects.create(
+            row=1, seat=1, performance=self.performance, reservation=reservation
+        )
+        Ticket.objects.create(
+            row=1, seat=2, performance=self.performance, reservation=reservation
+        )
+
+        reservation.delete()
+        self.performance.refresh_from_db()
+
+        self.assertEqual(self.performance.tickets_sold, 0)
+
+    def test_reconcile_tickets_sold_command(self):
+        reservation = Reservation.objects.create(user=self.user)
+        Ticket.objects.create(
+            row=1, seat=1, performance=self.performance, reservation=reservation
+        )
+        Performance.objects.update(tickets_sold=7)
+
+        call_command("reconcile_tickets_sold", stdout=StringIO())
+        self.performance.refresh_from_db()
+
+        self.assertEqual(self.performance.tickets_sold, 1)
+
+
+class PerformanceConditionalGetTests(TestCase):
+    def setUp(self) -> None:
+        cache.clear()
+        self.client = APIClient()
+        self.user = get_user_model().objects.create_user(
+            "test@test.com",
+            "testpassword",
+        )
+        self.client.force_authenticate(self.user)
+        self.performance = sample_performance()
+
+    def test_matching_etag_returns_not_modified(self):
+        etag = self.client.get(PERFORMANCE_URL)["ETag"]
+
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(
+                PERFORMANCE_URL, HTTP_IF_NONE_MATCH=etag
+            )
+
+        self.assertEqual(response.status_code, status.HTTP_304_NOT_MODIFIED)
+        self.assertEqual(response["ETag"], etag)
+        self.assertFalse(
+            any("theatre_theatrehall" in query["sql"] for query in queries)
+        )
+
+    def test_etag_changes_on_ticket_sale(self):
+        list_etag = self.client.get(PERFORMANCE_URL)["ETag"]
+        detail_etag = self.client.get(detail_url(self.performance.id))["ETag"]
+
+        Ticket.objects.create(
+            row=1,
+            seat=1,
+            performance=self.performance,
+            reservation=Reservation.objects.create(user=self.user),
+        )
+        list_response = self.client.get(
+            PERFORMANCE_URL, HTTP_IF_NONE_MATCH=list_etag
+        )
+        detail_response = self.client.get(
+            detail_url(self.performance.id), HTTP_IF_NONE_MATCH=detail_etag
+        )
+
+        self.assertEqual(list_response.status_code, status.HTTP_200_OK)
+        self.assertEqual(detail_response.status_code, status.HTTP_200_OK)
+        self.assertNotEqual(list_response["ETag"], list_etag)
+
+    def test_etag_changes_on_play_rename(self):
+        etag = self.client.get(PERFORMANCE_URL)["ETag"]
+
+        self.performance.play.title = "Renamed"
+        self.performance.play.save()
+        response = self.client.get(PERFORMANCE_URL, HTTP_IF_NONE_MATCH=etag)
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data["results"][0]["play_title"], "Renamed")
+
+    def test_hall_change_in_another_worker_changes_etag(self):
+        etag = self.client.get(PERFORMANCE_URL)["ETag"]
+
+        # The other worker process has a cache of its own
+        with mock.patch(
+            "theatre.response_cache.cache", LocMemCache("other-worker", {})
+        ):
+            self.performance.theatre_hall.name = "Renamed"
+            self.performance.theatre_hall.save()
+        response = self.client.get(PERFORMANCE_URL, HTTP_IF_NONE_MATCH=etag)
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(
+            response.data["results"][0]["theatre_hall_name"], "Renamed"
+        )
+
+    def test_etag_depends_on_filters(self):
+        etag = self.client.get(PERFORMANCE_URL)["ETag"]
+
+        response = self.client.get(
+            PERFORMANCE_URL, {"play": "other"}, HTTP_IF_NONE_MATCH=etag
+        )
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
@@ -3,13 +3,17 @@ import tempfile
 
 from PIL import Image
 from django.contrib.auth import get_user_model
+from django.db import connection
 from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
 from django.urls import reverse
 from rest_framework import status
-from rest_framework.test import APIClient
+from rest_framework.request import Request
+from rest_framework.test import APIClient, APIRequestFactory
 
 from theatre.models import Play, Genre, Actor, TheatreHall, Performance
 from theatre.serializers import PlayListSerializer, PlayDetailSerializer
+from theatre.views import PlayViewSet
 
 PLAY_URL = reverse("theatre:play-list")
 PERFORMANCE_URL = reverse("theatre:performance-list")
@@ -143,7 +147,7 @@ class PlayImageUploadTests(TestCase):
             self.client.post(url, {"image": ntf}, format="multipart")
         res = self.client.get(PLAY_URL)
 
-        self.assertIn("image", res.data[0].keys())
+        self.assertIn("image", res.data["results"][0].keys())
 
     def test_image_url_is_shown_on_performance_detail(self):
         url = image_upload_url(self.play.id)
@@ -154,7 +158,7 @@ class PlayImageUploadTests(TestCase):
             self.client.post(url, {"image": ntf}, format="multipart")
         res = self.client.get(PERFORMANCE_URL)
 
-        self.assertIn("play_image", res.data[0].keys())
+        self.assertIn("play_image", res.data["results"][0].keys())
 
     def test_create_play_permitted(self):
         payload = {
@@ -189,11 +193,19 @@ class AuthenticatedPlayApiTests(TestCase):
 
         response = self.client.get(PLAY_URL)
 
-        plays = Play.objects.all()
+        plays = Play.objects.order_by("title", "id")
         serializer = PlayListSerializer(plays, many=True)
 
         self.assertEqual(response.status_code, status.HTTP_200_OK)
-        self.assertEqual(response.data, serializer.data)
+        self.assertEqual(response.data["results"], serializer.data)
+
+    def test_unfiltered_queryset_is_not_shared(self):
+        view = PlayViewSet(
+            request=Request(APIRequestFactory().get(PLAY_URL)),
+            format_kwarg=None,
+        )
+
+        self.assertIsNot(view.get_queryset(), PlayViewSet.queryset)
 
     def test_filter_plays_by_title(self):
         play1 = sample_play(title="Play1")
@@ -206,9 +218,9 @@ class AuthenticatedPlayApiTests(TestCase):
         serializer2 = PlayListSerializer(play2)
         serializer3 = PlayListSerializer(play3)
 
-        self.assertIn(serializer1.data, response.data)
-        self.assertIn(serializer2.data, response.data)
-        self.assertNotIn(serializer3.data, response.data)
+        self.assertIn(serializer1.data, response.data["results"])
+        self.assertIn(serializer2.data, response.data["results"])
+        self.assertNotIn(serializer3.data, response.data["results"])
 
     def test_filter_plays_by_genres(self):
         play1 = sample_play(title="Play1")
@@ -229,9 +241,9 @@ class AuthenticatedPlayApiTests(TestCase):
         serializer2 = PlayListSerializer(play2)
         serializer3 = PlayListSerializer(play3)
 
-        self.assertIn(serializer1.data, response.data)
-        self.assertIn(serializer2.data, response.data)
-        self.assertNotIn(serializer3.data, response.data)
+        self.assertIn(serializer1.data, response.data["results"])
+        self.assertIn(serializer2.data, response.data["results"])
+        self.assertNotIn(serializer3.data, response.data["results"])
 
     def test_filter_plays_by_actors(self):
         play1 = sample_play(title="Play")
@@ -250,9 +262,124 @@ class AuthenticatedPlayApiTests(TestCase):
         serializer2 = PlayListSerializer(play2)
         serializer3 = PlayListSerializer(play3)
 
-        self.assertIn(serializer1.data, res.data)
-        self.assertIn(serializer2.data, res.data)
-        self.assertNotIn(serializer3.data, res.data)
+        self.assertIn(serializer1.data, res.data["results"])
+        self.assertIn(serializer2.data, res.data["results"])
+        self.assertNotIn(serializer3.data, res.data["results"])
+
+    def test_filter_plays_by_genres_returns_each_play_once(self):
+        play = sample_play(title="Play1")
+        genre1 = sample_genre(name="genre1")
+        genre2 = sample_genre(name="genre2")
+        play.genres.add(genre1, genre2)
+
+        response = self.client.get(PLAY_URL, {
+            "genres": f"{genre1.id},{genre2.id}"
+        })
+
+        self.assertEqual(
+            [result["id"] for result in response.data["results"]], [play.id]
+        )
+
+    def test_filter_plays_matching_all_genres(self):
+        play1 = sample_play(title="Play1")
+        play2 = sample_play(title="Play2")
+        genre1 = sample_genre(name="genre1")
+        genre2 = sample_genre(name="genre2")
+        play1.genres.add(genre1, genre2)
+        play2.genres.add(genre1)
+
+        response = self.client.get(PLAY_URL, {
+            "genres": f"{genre1.id},{genre2.id}",
+            "match": "all",
+        })
+
+        self.assertEqual(
+            [result["id"] for result in response.data["results"]], [play1.id]
+        )
+
+    def test_filter_plays_with_invalid_match(self):
+        response = self.client.get(PLAY_URL, {"genres": "1", "match": "some"})
+
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+    def test_search_plays_ranks_title_matches_first(self):
+        described = sample_play(
+            title="Arcadia", description="A comedy about Hamlet fans"
+        )
+        titled = sample_play(title="Hamlet")
+        sample_play(title="Othello")
+
+        response = self.client.get(PLAY_URL, {"search": "hamlet"})
+
+        self.assertEqual(
+            [play["id"] for play in response.data["results"]],
+            [titled.id, described.id],
+        )
+
+    def test_search_pages_cover_equally_ranked_plays_once(self):
+        plays = [sample_play(title=f"Hamlet {number}") for number in range(5)]
+
+        ids = []
+        url, params = PLAY_URL, {"search": "hamlet", "page_size": 2}
+        while url:
+            response = self.client.get(url, params)
+            ids += [play["id"] for play in response.data["results"]]
+            url, params = response.data["next"], None
+
+        self.assertEqual(ids, [play.id for play in plays])
+
+    def test_search_plays_by_actor_name(self):
+        play = sample_play(title="Play")
+        sample_play(title="Play without actors")
+        actor = sample_actor(first_name="Laurence", last_name="Olivier")
+        play.actors.add(actor)
+
+        response = self.client.get(PLAY_URL, {"search": "olivier"})
+
+        self.assertEqual(
+            [result["id"] for result in response.data["results"]], [play.id]
+        )
+
+    def test_search_document_follows_actor_changes(self):
+        play = sample_play(title="Play")
+        actor = sample_actor(first_name="Laurence", last_name="Olivier")
+        play.actors.add(actor)
+
+        actor.last_name = "Kerr"
+        actor.save()
+        renamed = self.client.get(PLAY_URL, {"search": "kerr"})
+        actor.delete()
+        deleted = self.client.get(PLAY_URL, {"search": "kerr"})
+
+        self.assertEqual(len(renamed.data["results"]), 1)
+        self.assertEqual(deleted.data["results"], [])
+
+    def test_sparse_fields_on_play_list(self):
+        play = sample_play(title="Play1")
+        play.genres.add(sample_genre())
+
+        response = self.client.get(PLAY_URL, {"fields": "id,title"})
+
+        self.assertEqual(
+            response.data["results"], [{"id": play.id, "title": "Play1"}]
+        )
+
+    def test_sparse_fields_skip_unused_prefetches(self):
+        play = sample_play(title="Play1")
+        play.genres.add(sample_genre())
+        play.actors.add(sample_actor())
+
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(
+                detail_url(play.id), {"fields": "title,genres.name"}
+            )
+
+        self.assertEqual(
+            response.data, {"title": "Play1", "genres": [{"name": "Test genre"}]}
+        )
+        self.assertFalse(
+            any("theatre_actor" in query["sql"] for query in queries)
+        )
 
     def test_retrieve_play_detail(self):
         play1 = sample_play(title="play11")
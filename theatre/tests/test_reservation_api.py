@@ -0,0 +1,370 @@
+import csv
+import gzip
+import io
+import json
+import tempfile
+from unittest import mock
+
+from django.contrib.auth import get_user_model
+from django.core.management import call_command
+from django.db import connection, IntegrityError
+from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from rest_framework import status
+from rest_framework.test import APIClient
+
+from theatre.models import (
+    IdempotencyKey,
+    Play,
+    TheatreHall,
+    Performance,
+    Reservation,
+    Ticket,
+)
+
+RESERVATION_URL = reverse("theatre:reservation-list")
+EXPORT_URL = reverse("theatre:reservation-export")
+
+
+def sample_performance(**params):
+    play = Play.objects.create(title="Sample play")
+    theatre_hall = TheatreHall.objects.create(
+        name="Test theatre", rows=20, seats_in_row=20
+    )
+
+    defaults = {
+        "play": play,
+        "theatre_hall": theatre_hall,
+        "show_time": "2022-06-02 14:00:00+00:00",
+    }
+    defaults.update(params)
+
+    return Performance.objects.create(**defaults)
+
+
+def tickets_payload(performance, seats, row=1):
+    return {
+        "tickets": [
+            {"row": row, "seat": seat, "performance": performance.id}
+            for seat in seats
+        ]
+    }
+
+
+class UnauthenticatedReservationApiTests(TestCase):
+    def setUp(self) -> None:
+        self.client = APIClient()
+
+    def test_auth_required(self):
+        response = self.client.get(RESERVATION_URL)
+        self.assertEqual(response.status_code, status.HTTP_401_UNAUTHORIZED)
+
+
+class AuthenticatedReservationApiTests(TestCase):
+    def setUp(self) -> None:
+        self.client = APIClient()
+        self.user = get_user_model().objects.create_user(
+            "test@test.com",
+            "testpassword",
+        )
+        self.client.force_authenticate(self.user)
+        self.performance = sample_performance()
+
+    def test_create_reservation(self):
+        payload = tickets_payload(self.performance, [1, 2, 3])
+
+        response = self.client.post(RESERVATION_URL, payload, format="json")
+
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        reservation = Reservation.objects.get(id=response.data["id"])
+        self.assertEqual(reservation.user, self.user)
+        self.assertEqual(reservation.tickets.count(), 3)
+
+    def test_reservation_query_count_does_not_grow_with_seats(self):
+        with CaptureQueriesContext(connection) as single_seat:
+            self.client.post(
+                RESERVATION_URL,
+                tickets_payload(self.performance, [1]),
+                format="json",
+            )
+        with CaptureQueriesContext(connection) as many_seats:
+            self.client.post(
+                RESERVATION_URL,
+                tickets_payload(self.performance, range(1, 11), row=2),
+                format="json",
+            )
+
+        self.assertEqual(Ticket.objects.count(), 11)
+        self.assertEqual(len(single_seat), len(many_seats))
+
+    def test_taken_seat_returns_conflict(self):
+        self.client.post(
+            RESERVATION_URL,
+            tickets_payload(self.performance, [5]),
+            format="json",
+        )
+
+        response = self.client.post(
+            RESERVATION_URL,
+            tickets_payload(self.performance, [4, 5]),
+            format="json",
+        )
+
+        self.assertEqual(response.status_code, status.HTTP_409_CONFLICT)
+        self.assertEqual(
+            response.data["taken_seats"],
+            [{"performance": self.performance.id, "row": 1, "seat": 5}],
+        )
+        self.assertEqual(Reservation.objects.count(), 1)
+        self.assertEqual(Ticket.objects.count(), 1)
+
+    def test_reservation_list_query_count_is_constant(self):
+        def list_queries():
+            with CaptureQueriesContext(connection) as queries:
+                response = self.client.get(RESERVATION_URL)
+            return response, len(queries)
+
+        self.client.post(
+            RESERVATION_URL,
+            tickets_payload(self.performance, [1, 2]),
+            format="json",
+        )
+        _, single = list_queries()
+        for index in range(3):
+            performance = sample_performance()
+            self.client.post(
+                RESERVATION_URL,
+                tickets_payload(performance, [1, 2, 3]),
+                format="json",
+            )
+        response, many = list_queries()
+
+        self.assertEqual(single, many)
+        self.assertEqual(len(response.data["results"]), 4)
+
+    def test_reservation_list_nests_performance_availability(self):
+        self.client.post(
+            RESERVATION_URL,
+            tickets_payload(self.performance, [1, 2]),
+            format="json",
+        )
+
+        response = self.client.get(RESERVATION_URL)
+
+        tickets = response.data["results"][0]["tickets"]
+        self.assertEqual(tickets[0]["performance"]["tickets_available"], 398)
+        self.assertEqual(tickets[0]["performance"], tickets[1]["performance"])
+
+    def test_sparse_fields_skip_performance_prefetch(self):
+        self.client.post(
+            RESERVATION_URL,
+            tickets_payload(self.performance, [1, 2]),
+            format="json",
+        )
+
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(
+                RESERVATION_URL, {"fields": "id,tickets.row,tickets.seat"}
+            )
+
+        self.assertEqual(
+            response.data["results"][0]["tickets"],
+            [{"row": 1, "seat": 1}, {"row": 1, "seat": 2}],
+        )
+        self.assertFalse(
+            any("theatre_performance" in query["sql"] for query in queries)
+        )
+
+    def test_expand_ticket_performance_on_detail(self):
+        created = self.client.post(
+            RESERVATION_URL,
+            tickets_payload(self.performance, [1]),
+            format="json",
+        )
+        url = reverse("theatre:reservation-detail", args=[created.data["id"]])
+
+        collapsed = self.client.get(url)
+        expanded = self.client.get(
+            url,
+            {"expand": "tickets.performance",
+             "fields": "tickets.performance.play_title"},
+        )
+
+        self.assertEqual(
+            collapsed.data["tickets"][0]["performance"], self.performance.id
+        )
+        self.assertEqual(
+            expanded.data,
+            {"tickets": [{"performance": {"play_title": "Sample play"}}]},
+        )
+
+    def test_duplicate_seats_in_payload_rejected(self):
+        response = self.client.post(
+            RESERVATION_URL,
+            tickets_payload(self.performance, [3, 3]),
+            format="json",
+        )
+
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+    def test_seat_out_of_hall_range_rejected(self):
+        response = self.client.post(
+            RESERVATION_URL,
+            tickets_payload(self.performance, [21]),
+            format="json",
+        )
+
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertFalse(Ticket.objects.exists())
+
+    def test_partial_update_without_tickets(self):
+        reservation = Reservation.objects.create(user=self.user)
+
+        response = self.client.patch(
+            reverse("theatre:reservation-detail", args=[reservation.id]),
+            {},
+            format="json",
+        )
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+
+
+class IdempotentReservationApiTests(TestCase):
+    def setUp(self) -> None:
+        self.client = APIClient()
+        self.user = get_user_model().objects.create_user(
+            "test@test.com",
+            "testpassword",
+        )
+        self.client.force_authenticate(self.user)
+        self.performance = sample_performance()
+
+    def post(self, seats, key):
+        return self.client.post(
+            RESERVATION_URL,
+            tickets_payload(self.performance, seats),
+            format="json",
+            HTTP_IDEMPOTENCY_KEY=key,
+        )
+
+    def test_retry_replays_stored_response(self):
+        first = self.post([1, 2], "retry-key")
+
+        with CaptureQueriesContext(connection) as queries:
+            second = self.post([1, 2], "retry-key")
+
+        self.assertEqual(first.status_code, status.HTTP_201_CREATED)
+        self.assertEqual(second.status_code, status.HTTP_201_CREATED)
+        self.assertEqual(second.data, first.data)
+        self.assertEqual(second["Idempotent-Replayed"], "true")
+        self.assertEqual(Reservation.objects.count(), 1)
+        self.assertFalse(
+            any('"theatre_ticket"' in query["sql"] for query in queries)
+        )
+
+    def test_key_reused_with_different_payload(self):
+        self.post([1], "retry-key")
+
+        response = self.post([2], "retry-key")
+
+        self.assertEqual(
+            response.status_code, status.HTTP_422_UNPROCESSABLE_ENTITY
+        )
+        self.assertEqual(Reservation.objects.count(), 1)
+
+    def test_different_keys_create_separate_reservations(self):
+        self.post([1], "first-key")
+        self.post([2], "second-key")
+
+        self.assertEqual(Reservation.objects.count(), 2)
+
+    def test_failed_request_is_not_stored(self):
+        self.post([1], "first-key")
+        conflict = self.post([1], "second-key")
+
+        Ticket.objects.all().delete()
+        retry = self.post([1], "second-key")
+
+        self.assertEqual(conflict.status_code, status.HTTP_409_CONFLICT)
+        self.assertEqual(retry.status_code, status.HTTP_201_CREATED)
+
+    def test_competing_request_rolled_back(self):
+        # The key insert collided, but the other row is gone by now
+        with mock.patch.object(
+            IdempotencyKey.objects, "create", side_effect=IntegrityError
+        ):
+            response = self.post([1], "retry-key")
+
+        self.assertEqual(response.status_code, status.HTTP_409_CONFLICT)
+        self.assertFalse(Reservation.objects.exists())
+
+
+class ReservationExportApiTests(TestCase):
+    def setUp(self) -> None:
+        self.client = APIClient()
+        self.admin = get_user_model().objects.create_superuser(
+            "admin@test.com",
+            "testpassword",
+        )
+        self.user = get_user_model().objects.create_user(
+            "test@test.com",
+            "testpassword",
+        )
+        self.client.force_authenticate(self.admin)
+        self.performance = sample_performance()
+        reservation = Reservation.objects.create(user=self.user)
+        for seat in (1, 2):
+            Ticket.objects.create(
+                row=3,
+                seat=seat,
+                performance=self.performance,
+                reservation=reservation,
+            )
+
+    def test_export_requires_admin(self):
+        self.client.force_authenticate(self.user)
+
+        response = self.client.get(EXPORT_URL)
+
+        self.assertEqual(response.status_code, status.HTTP_403_FORBIDDEN)
+
+    def test_export_csv(self):
+        response = self.client.get(EXPORT_URL)
+
+        self.assertTrue(response.streaming)
+        rows = list(
+            csv.DictReader(io.StringIO(b"".join(response).decode()))
+        )
+        self.assertEqual(len(rows), 2)
+        self.assertEqual(rows[0]["user"], "test@test.com")
+        self.assertEqual(rows[0]["play"], "Sample play")
+        self.assertEqual((rows[1]["row"], rows[1]["seat"]), ("3", "2"))
+
+    def test_export_gzipped_ndjson(self):
+        response = self.client.get(
+            EXPORT_URL, {"output": "ndjson", "compression": "gzip"}
+        )
+
+        lines = gzip.decompress(b"".join(response)).splitlines()
+        self.assertEqual(response["Content-Type"], "application/gzip")
+        self.assertEqual(len(lines), 2)
+        self.assertEqual(json.loads(lines[0])["seat"], 1)
+
+    def test_export_filters_by_performance_date(self):
+        response = self.client.get(EXPORT_URL, {"date_from": "2022-06-03"})
+
+        self.assertEqual(b"".join(response).decode().count("\n"), 1)
+
+    def test_export_command(self):
+        with tempfile.NamedTemporaryFile(suffix=".ndjson.gz") as export_file:
+            call_command(
+                "export_reservations",
+                export_file.name,
+                "--output=ndjson",
+                "--gzip",
+                "--chunk-size=1",
+            )
+            lines = gzip.decompress(export_file.read()).splitlines()
+
+        self.assertEqual(len(lines), 2)
@@ -0,0 +1,316 @@
+from datetime import timedelta
+from io import StringIO
+
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.core.management import call_command
+from django.test import TestCase
+from django.urls import reverse
+from django.utils import timezone
+from rest_framework import status
+from rest_framework.test import APIClient
+
+from theatre.models import (
+    Play,
+    TheatreHall,
+    Performance,
+    Reservation,
+    SeatHold,
+    HeldSeat,
+    Ticket,
+)
+from theatre.seat_map import get_seat_map
+
+SEAT_HOLD_URL = reverse("theatre:seathold-list")
+RESERVATION_URL = reverse("theatre:reservation-list")
+PERFORMANCE_URL = reverse("theatre:performance-list")
+
+
+def sample_performance(**params):
+    play = Play.objects.create(title="Sample play")
+    theatre_hall = TheatreHall.objects.create(
+        name="Test theatre", rows=10, seats_in_row=10
+    )
+
+    defaults = {
+        "play": play,
+        "theatre_hall": theatre_hall,
+        "show_time": "2022-06-02 14:00:00+00:00",
+    }
+    defaults.update(params)
+
+    return Performance.objects.create(**defaults)
+
+
+def confirm_url(hold_id):
+    return reverse("theatre:seathold-confirm", args=[hold_id])
+
+
+def hold_payload(performance, seats, row=1):
+    return {
+        "performance": performance.id,
+        "seats": [{"row": row, "seat": seat} for seat in seats],
+    }
+
+
+def sell_past_seat_map(performance, user, seats):
+    """Sell seats after the seat map is cached, without updating it"""
+    get_seat_map(performance)
+    reservation = Reservation.objects.create(user=user)
+    Ticket.objects.bulk_create(
+        Ticket(
+            reservation=reservation,
+            performance=performance,
+            row=row,
+            seat=seat,
+        )
+        for row, seat in seats
+    )
+
+
+class UnauthenticatedSeatHoldApiTests(TestCase):
+    def setUp(self) -> None:
+        self.client = APIClient()
+
+    def test_auth_required(self):
+        response = self.client.get(SEAT_HOLD_URL)
+        self.assertEqual(response.status_code, status.HTTP_401_UNAUTHORIZED)
+
+
+class AuthenticatedSeatHoldApiTests(TestCase):
+    def setUp(self) -> None:
+        cache.clear()
+        self.client = APIClient()
+        self.user = get_user_model().objects.create_user(
+            "test@test.com",
+            "testpassword",
+        )
+        self.other_client = APIClient()
+        self.other_client.force_authenticate(
+            get_user_model().objects.create_user(
+                "other@test.com",
+                "testpassword",
+            )
+        )
+        self.client.force_authenticate(self.user)
+        self.performance = sample_performance()
+
+    def test_create_hold(self):
+        response = self.client.post(
+            SEAT_HOLD_URL,
+            hold_payload(self.performance, [1, 2]),
+            format="json",
+        )
+
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        self.assertEqual(
+            HeldSeat.objects.filter(hold_id=response.data["id"]).count(), 2
+        )
+        self.assertIsNotNone(response.data["expires_at"])
+
+    def test_held_seats_reduce_availability(self):
+        self.client.post(
+            SEAT_HOLD_URL,
+            hold_payload(self.performance, [1, 2]),
+            format="json",
+        )
+
+        list_response = self.client.get(PERFORMANCE_URL)
+        detail_response = self.client.get(
+            reverse("theatre:performance-detail", args=[self.performance.id])
+        )
+
+        self.assertEqual(list_response.data["results"][0]["tickets_available"], 98)
+        self.assertEqual(
+            detail_response.data["taken_places"],
+            [{"row": 1, "seat": 1}, {"row": 1, "seat": 2}],
+        )
+
+    def test_held_seat_conflicts_for_other_user(self):
+        self.client.post(
+            SEAT_HOLD_URL,
+            hold_payload(self.performance, [1, 2]),
+            format="json",
+        )
+
+        hold_response = self.other_client.post(
+            SEAT_HOLD_URL,
+            hold_payload(self.performance, [2, 3]),
+            format="json",
+        )
+        reservation_response = self.other_client.post(
+            RESERVATION_URL,
+            {
+                "tickets": [
+                    {"row": 1, "seat": 1, "performance": self.performance.id}
+                ]
+            },
+            format="json",
+        )
+
+        self.assertEqual(hold_response.status_code, status.HTTP_409_CONFLICT)
+        self.assertEqual(
+            hold_response.data["taken_seats"],
+            [{"performance": self.performance.id, "row": 1, "seat": 2}],
+        )
+        self.assertEqual(
+            reservation_response.status_code, status.HTTP_409_CONFLICT
+        )
+
+    def test_sold_seat_missing_from_cached_map_conflicts(self):
+        sell_past_seat_map(self.performance, self.user, [(1, 2)])
+
+        response = self.other_client.post(
+            SEAT_HOLD_URL,
+            hold_payload(self.performance, [2, 3]),
+            format="json",
+        )
+
+        self.assertEqual(response.status_code, status.HTTP_409_CONFLICT)
+        self.assertEqual(
+            response.data["taken_seats"],
+            [{"performance": self.performance.id, "row": 1, "seat": 2}],
+        )
+        self.assertFalse(HeldSeat.objects.exists())
+
+    def test_expired_hold_does_not_block(self):
+        self.client.post(
+            SEAT_HOLD_URL,
+            hold_payload(self.performance, [1]),
+            format="json",
+        )
+        expired = timezone.now() - timedelta(minutes=1)
+        SeatHold.objects.update(expires_at=expired)
+        HeldSeat.objects.update(expires_at=expired)
+
+        response = self.other_client.post(
+            SEAT_HOLD_URL,
+            hold_payload(self.performance, [1]),
+            format="json",
+        )
+
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+
+    def test_confirm_hold_creates_reservation(self):
+        hold_response = self.client.post(
+            SEAT_HOLD_URL,
+            hold_payload(self.performance, [4, 5]),
+            format="json",
+        )
+
+        response = self.client.post(confirm_url(hold_response.data["id"]))
+        self.performance.refresh_from_db()
+
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        reservation = Reservation.objects.get(id=response.data["id"])
+        self.assertEqual(reservation.tickets.count(), 2)
+        self.assertFalse(SeatHold.objects.exists())
+        self.assertFalse(HeldSeat.objects.exists())
+        self.assertEqual(self.performance.tickets_sold, 2)
+
+    def test_cannot_confirm_other_user_hold(self):
+        hold_response = self.client.post(
+            SEAT_HOLD_URL,
+            hold_payload(self.performance, [4]),
+            format="json",
+        )
+
+        response = self.other_client.post(
+            confirm_url(hold_response.data["id"])
+        )
+
+        self.assertEqual(response.status_code, status.HTTP_404_NOT_FOUND)
+
+    def test_expire_seat_holds_command(self):
+        self.client.post(
+            SEAT_HOLD_URL,
+            hold_payload(self.performance, [1]),
+            format="json",
+        )
+        SeatHold.objects.update(expires_at=timezone.now())
+
+        call_command("expire_seat_holds", stdout=StringIO())
+
+        self.assertFalse(SeatHold.objects.exists())
+        self.assertFalse(HeldSeat.objects.exists())
+
+
+class SeatAllocationApiTests(TestCase):
+    def setUp(self) -> None:
+        cache.clear()
+        self.client = APIClient()
+        self.user = get_user_model().objects.create_user(
+            "test@test.com",
+            "testpassword",
+        )
+        self.client.force_authenticate(self.user)
+        self.performance = sample_performance()
+        self.url = reverse(
+            "theatre:performance-allocate", args=[self.performance.id]
+        )
+
+    def held_seats(self, hold_id):
+        return list(
+            HeldSeat.objects.filter(hold_id=hold_id).values_list("row", "seat")
+        )
+
+    def test_allocate_adjacent_seats_in_centre(self):
+        response = self.client.post(self.url, {"seats": 4}, format="json")
+
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        self.assertEqual(
+            self.held_seats(response.data["id"]),
+            [(5, 4), (5, 5), (5, 6), (5, 7)],
+        )
+
+    def test_allocation_skips_seats_missing_from_cached_map(self):
+        sell_past_seat_map(self.performance, self.user, [(5, 5)])
+
+        response = self.client.post(self.url, {"seats": 4}, format="json")
+
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        self.assertNotIn((5, 5), self.held_seats(response.data["id"]))
+
+    def test_allocation_after_hall_shrank_below_tickets(self):
+        Ticket.objects.create(
+            row=5,
+            seat=5,
+            performance=self.performance,
+            reservation=Reservation.objects.create(user=self.user),
+        )
+        hall = self.performance.theatre_hall
+        hall.rows = 2
+        hall.save()
+
+        detail = self.client.get(
+            reverse("theatre:performance-detail", args=[self.performance.id])
+        )
+        response = self.client.post(self.url, {"seats": 4}, format="json")
+
+        self.assertEqual(detail.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+
+    def test_allocations_do_not_overlap(self):
+        first = self.client.post(self.url, {"seats": 6}, format="json")
+        second = self.client.post(self.url, {"seats": 6}, format="json")
+
+        first_seats = set(self.held_seats(first.data["id"]))
+        second_seats = set(self.held_seats(second.data["id"]))
+        self.assertEqual(len(second_seats), 6)
+        self.assertFalse(first_seats & second_seats)
+        self.assertEqual(len({row for row, _ in second_seats}), 1)
+
+    def test_allocate_within_row_range(self):
+        response = self.client.post(
+            self.url, {"seats": 2, "row_from": 1, "row_to": 2}, format="json"
+        )
+
+        self.assertEqual(
+            {row for row, _ in self.held_seats(response.data["id"])}, {2}
+        )
+
+    def test_allocate_without_long_enough_run(self):
+        response = self.client.post(self.url, {"seats": 11}, format="json")
+
+        self.assertEqual(response.status_code, status.HTTP_409_CONFLICT)
+        self.assertFalse(SeatHold.objects.exists())
@@ -46,7 +46,7 @@ class AuthenticatedTheatreHallsApiTests(TestCase):
         serializer = TheatreHallSerializer(theatre_halls, many=True)
 
         self.assertEqual(response.status_code, status.HTTP_200_OK)
-        self.assertEqual(response.data, serializer.data)
+        self.assertEqual(response.data["results"], serializer.data)
 
     def test_create_theatre_hall_forbidden(self):
         payload = {
@@ -77,7 +77,7 @@ class AdminTheatreHallApiTests(TestCase):
         serializer = TheatreHallSerializer(theatre_halls, many=True)
 
         self.assertEqual(response.status_code, status.HTTP_200_OK)
-        self.assertEqual(response.data, serializer.data)
+        self.assertEqual(response.data["results"], serializer.data)
 
     def test_create_theatre_hall_permitted(self):
         payload = {"name": "Test hall", "rows": 15, "seats_in_row": 20}
@@ -7,6 +7,10 @@ from theatre.views import (
     TheatreHallViewSet,
     PerformanceViewSet,
     ReservationViewSet,
+    SeatHoldViewSet,
+    ChangeLogViewSet,
+    CatalogImportViewSet,
+    OccupancyViewSet,
 )
 
 router = routers.DefaultRouter()
@@ -16,6 +20,12 @@ router.register("plays", PlayViewSet)
 router.register("theatre_halls", TheatreHallViewSet)
 router.register("performances", PerformanceViewSet)
 router.register("reservations", ReservationViewSet)
+router.register("seat_holds", SeatHoldViewSet)
+router.register("changes", ChangeLogViewSet)
+router.register("import", CatalogImportViewSet, basename="catalog-import")
+router.register(
+    "analytics/occupancy", OccupancyViewSet, basename="occupancy"
+)
 
 urlpatterns = router.urls
 
@@ -1,11 +1,23 @@
-from datetime import datetime
-
-from django.db.models import F, Count
+import hashlib
+import json
+from collections import defaultdict
+from datetime import datetime, time, timedelta
+
+from django.conf import settings
+from django.db import transaction, IntegrityError
+from django.db.models import Count, Max, Prefetch, Sum
+from django.http import StreamingHttpResponse
+from django.utils import timezone
+from drf_spectacular.types import OpenApiTypes
 from drf_spectacular.utils import extend_schema
 
-from rest_framework import viewsets, status
+from rest_framework import mixins, viewsets, status
 from rest_framework.decorators import action
-from rest_framework.pagination import PageNumberPagination
+from rest_framework.exceptions import ValidationError
+from rest_framework.pagination import (
+    CursorPagination,
+    PageNumberPagination,
+)
 from rest_framework.permissions import IsAdminUser, IsAuthenticated
 from rest_framework.response import Response
 
@@ -16,6 +28,11 @@ from theatre.models import (
     TheatreHall,
     Performance,
     Reservation,
+    SeatHold,
+    HeldSeat,
+    IdempotencyKey,
+    ChangeLogEntry,
+    OccupancyRollup,
 )
 from theatre.permissions import IsAdminOrIfAuthenticatedReadOnly
 from theatre.serializers import (
@@ -31,60 +48,192 @@ from theatre.serializers import (
     ReservationSerializer,
     ReservationListSerializer,
     PlayImageSerializer,
+    SeatHoldSerializer,
+    SeatAllocationSerializer,
+    PerformanceScheduleSerializer,
+    PerformanceScheduleResultSerializer,
+    ChangeLogEntrySerializer,
+)
+from theatre.exceptions import SeatConflict, NoAdjacentSeats
+from theatre.exports import EXPORT_FORMATS, CONTENT_TYPES, export_chunks
+from theatre.imports import CatalogImport
+from theatre.parsers import NDJSONParser
+from theatre.fast_lists import (
+    FastListMixin,
+    PlayListValuesSerializer,
+    PerformanceListValuesSerializer,
 )
+from theatre.response_cache import CachedResponseMixin, ConditionalGetMixin
+from theatre.sparse_fields import SparseFieldsViewMixin
+from theatre.search import filter_by_title, search_plays
+from theatre.scheduling import schedule_performances
+from theatre.seat_map import get_occupancy_map, find_adjacent_seats
 
 from theatre.documentation import (
     play_doc_params,
     play_doc_examples,
     performance_doc_parameters,
     performance_doc_examples,
+    performance_detail_doc_parameters,
+    performance_schedule_doc_examples,
+    change_feed_doc_parameters,
+    reservation_export_doc_parameters,
+    catalog_import_doc_examples,
+    occupancy_doc_parameters,
 )
 
 
-class GenreViewSet(viewsets.ModelViewSet):
+def parse_day(param_name, value):
+    try:
+        return datetime.strptime(value, "%Y-%m-%d").date()
+    except ValueError:
+        raise ValidationError({param_name: "Use the YYYY-MM-DD format."})
+
+
+def local_midnight(param_name, value, days=0):
+    """Start of the given day in the project time zone (Europe/Kiev)"""
+    day = parse_day(param_name, value)
+    return timezone.make_aware(
+        datetime.combine(day + timedelta(days=days), time.min)
+    )
+
+
+class KeysetPagination(CursorPagination):
+    """
+    Cursor pagination keyed on the queryset's explicit ordering or the
+    model's Meta.ordering, with the primary key as a tie-breaker, so deep
+    pages cost the same as the first one.
+    """
+
+    page_size = 20
+    page_size_query_param = "page_size"
+    max_page_size = 100
+
+    def get_ordering(self, request, queryset, view):
+        ordering = list(
+            queryset.query.order_by or queryset.model._meta.ordering
+        )
+        if not ordering:
+            return ("id",)
+        tie_breaker = "-id" if ordering[0].startswith("-") else "id"
+        return tuple(ordering + [tie_breaker])
+
+
+class ReservationPagination(KeysetPagination):
+    page_size = 10
+
+
+class RankedSearchPagination(PageNumberPagination):
+    """
+    Numbered pages for search results. A cursor holds only the first
+    ordering value, and float ranks are neither unique nor exact, so
+    cursor pages over them could skip or repeat plays.
+    """
+
+    page_size = KeysetPagination.page_size
+    page_size_query_param = KeysetPagination.page_size_query_param
+    max_page_size = KeysetPagination.max_page_size
+
+
+class GenreViewSet(
+    ConditionalGetMixin,
+    CachedResponseMixin,
+    SparseFieldsViewMixin,
+    viewsets.ModelViewSet,
+):
     queryset = Genre.objects.all()
     serializer_class = GenreSerializer
+    pagination_class = KeysetPagination
     permission_classes = (IsAdminOrIfAuthenticatedReadOnly,)
+    cache_dependencies = (Genre,)
+    replica_reads = True
 
 
-class ActorViewSet(viewsets.ModelViewSet):
+class ActorViewSet(
+    ConditionalGetMixin,
+    CachedResponseMixin,
+    SparseFieldsViewMixin,
+    viewsets.ModelViewSet,
+):
     queryset = Actor.objects.all()
     serializer_class = ActorSerializer
+    pagination_class = KeysetPagination
     permission_classes = (IsAdminOrIfAuthenticatedReadOnly,)
+    cache_dependencies = (Actor,)
+    replica_reads = True
 
 
-class TheatreHallViewSet(viewsets.ModelViewSet):
+class TheatreHallViewSet(
+    ConditionalGetMixin,
+    CachedResponseMixin,
+    SparseFieldsViewMixin,
+    viewsets.ModelViewSet,
+):
     queryset = TheatreHall.objects.all()
     serializer_class = TheatreHallSerializer
+    pagination_class = KeysetPagination
     permission_classes = (IsAdminOrIfAuthenticatedReadOnly,)
+    cache_dependencies = (TheatreHall,)
+    replica_reads = True
 
 
-class PlayViewSet(viewsets.ModelViewSet):
+class PlayViewSet(
+    ConditionalGetMixin,
+    CachedResponseMixin,
+    FastListMixin,
+    SparseFieldsViewMixin,
+    viewsets.ModelViewSet,
+):
     queryset = Play.objects.all().prefetch_related("genres", "actors")
     serializer_class = PlaySerializer
+    fast_list_serializer = PlayListValuesSerializer
+    prefetch_related_fields = {"genres": ("genres",), "actors": ("actors",)}
+    pagination_class = KeysetPagination
     permission_classes = (IsAdminOrIfAuthenticatedReadOnly,)
+    cache_dependencies = (Play, Genre, Actor)
+    replica_reads = True
+    match_modes = ("any", "all")
 
     @staticmethod
     def _params_to_ints(qs):
         return [int(str_id) for str_id in qs.split(",")]
 
+    @property
+    def paginator(self):
+        if not hasattr(self, "_paginator"):
+            if self.request.query_params.get("search"):
+                self._paginator = RankedSearchPagination()
+            else:
+                self._paginator = self.pagination_class()
+        return self._paginator
+
     def get_queryset(self):
         title = self.request.query_params.get("title")
+        search = self.request.query_params.get("search")
         genres = self.request.query_params.get("genres")
         actors = self.request.query_params.get("actors")
+        match = self.request.query_params.get("match", "any")
+
+        if match not in self.match_modes:
+            raise ValidationError(
+                {"match": f"Must be one of: {', '.join(self.match_modes)}."}
+            )
+        match_all = match == "all"
 
-        queryset = self.queryset
+        queryset = super().get_queryset()
 
         if title:
-            queryset = queryset.filter(title__icontains=title)
+            queryset = filter_by_title(queryset, title)
+        if search:
+            queryset = search_plays(queryset, search)
         if genres:
             genres_id = self._params_to_ints(genres)
-            queryset = queryset.filter(genres__id__in=genres_id)
+            queryset = queryset.with_genres(genres_id, match_all)
         if actors:
             actors_id = self._params_to_ints(actors)
-            queryset = queryset.filter(actors__id__in=actors_id)
+            queryset = queryset.with_actors(actors_id, match_all)
 
-        return queryset.distinct()
+        return queryset
 
     def get_serializer_class(self):
         if self.action == "list":
@@ -116,30 +265,73 @@ class PlayViewSet(viewsets.ModelViewSet):
         return super().list(request, *args, **kwargs)
 
 
-class PerformanceViewSet(viewsets.ModelViewSet):
-    queryset = (
-        Performance.objects.select_related("play", "theatre_hall")
-        .annotate(tickets_available=(
-            F("theatre_hall__rows") * F("theatre_hall__seats_in_row")
-            - Count("tickets"))
-        )
-    )
+class PerformanceViewSet(
+    ConditionalGetMixin,
+    FastListMixin,
+    SparseFieldsViewMixin,
+    viewsets.ModelViewSet,
+):
+    queryset = Performance.objects.select_related(
+        "play", "theatre_hall"
+    ).with_tickets_available()
     serializer_class = PerformanceSerializer
+    fast_list_serializer = PerformanceListValuesSerializer
+    select_related_fields = {
+        "play": ("play",),
+        "play_title": ("play",),
+        "play_image": ("play",),
+        "theatre_hall": ("theatre_hall",),
+        "theatre_hall_name": ("theatre_hall",),
+        "theatre_hall_capacity": ("theatre_hall",),
+        "taken_places": ("theatre_hall",),
+    }
+    pagination_class = KeysetPagination
     permission_classes = (IsAdminOrIfAuthenticatedReadOnly,)
+    cache_dependencies = (Play, TheatreHall)
+    replica_reads = True
+    allocation_attempts = 3
 
-    def get_queryset(self):
+    def _filter_performances(self, queryset):
         date = self.request.query_params.get("date")
+        date_from = self.request.query_params.get("date_from", date)
+        date_to = self.request.query_params.get("date_to", date)
         play = self.request.query_params.get("play")
 
-        queryset = self.queryset
-        if date:
-            date = datetime.strptime(date, "%Y-%m-%d").date()
-            queryset = queryset.filter(show_time__date=date)
+        # Half-open show_time ranges keep the column bare for the index,
+        # unlike show_time__date which casts it per row
+        if date_from:
+            queryset = queryset.filter(
+                show_time__gte=local_midnight("date_from", date_from)
+            )
+        if date_to:
+            queryset = queryset.filter(
+                show_time__lt=local_midnight("date_to", date_to, days=1)
+            )
         if play:
-            queryset = queryset.filter(play__title__icontains=play)
+            queryset = filter_by_title(queryset, play, field="play__title")
 
         return queryset
 
+    def get_queryset(self):
+        return self._filter_performances(super().get_queryset())
+
+    def get_etag_queryset(self):
+        # Skips the availability annotation, the fingerprint needs no joins
+        return self._filter_performances(Performance.objects.all())
+
+    def get_etag_parts(self):
+        # Seats on hold count against availability and expire on their own
+        holds = HeldSeat.objects.active()
+        if self.action == "retrieve":
+            holds = holds.filter(performance_id=self.kwargs["pk"])
+        changes = holds.aggregate(
+            latest=Max("expires_at"), count=Count("id")
+        )
+        return super().get_etag_parts() + [
+            changes["latest"],
+            changes["count"],
+        ]
+
     def get_serializer_class(self):
         if self.action == "list":
             return PerformanceListSerializer
@@ -147,8 +339,106 @@ class PerformanceViewSet(viewsets.ModelViewSet):
         if self.action == "retrieve":
             return PerformanceDetailSerializer
 
+        if self.action == "allocate":
+            return SeatAllocationSerializer
+
+        if self.action == "schedule":
+            return PerformanceScheduleSerializer
+
         return PerformanceSerializer
 
+    @extend_schema(responses={201: SeatHoldSerializer})
+    @action(
+        methods=["POST"],
+        detail=True,
+        url_path="allocate",
+        permission_classes=[IsAuthenticated],
+    )
+    def allocate(self, request, pk=None):
+        """Hold the best available block of adjacent seats"""
+        performance = self.get_object()
+        serializer = self.get_serializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        count = serializer.validated_data["seats"]
+        row_from = serializer.validated_data.get("row_from", 1)
+        row_to = serializer.validated_data.get("row_to")
+
+        seat_map = get_occupancy_map(performance)
+        for _ in range(self.allocation_attempts):
+            seats = find_adjacent_seats(seat_map, count, row_from, row_to)
+            if seats is None:
+                raise NoAdjacentSeats()
+
+            hold_serializer = SeatHoldSerializer(
+                data={
+                    "performance": performance.id,
+                    "seats": [
+                        {"row": row, "seat": seat} for row, seat in seats
+                    ],
+                },
+                context=self.get_serializer_context(),
+            )
+            hold_serializer.is_valid(raise_exception=True)
+            try:
+                hold_serializer.save(user_id=request.user.id)
+            except SeatConflict as conflict:
+                # Another request took some of these seats in the meantime
+                for taken in conflict.detail["taken_seats"]:
+                    seat_map.take(taken["row"], taken["seat"])
+                continue
+            return Response(hold_serializer.data,
+                            status=status.HTTP_201_CREATED)
+
+        raise NoAdjacentSeats()
+
+    @extend_schema(
+        responses={201: PerformanceScheduleResultSerializer},
+        examples=performance_schedule_doc_examples,
+    )
+    @action(
+        methods=["POST"],
+        detail=False,
+        url_path="schedule",
+        permission_classes=[IsAdminUser],
+    )
+    def schedule(self, request):
+        """
+        Create the performances of a recurrence rule in one go, skipping
+        show times at which the theatre hall is already booked
+        """
+        serializer = self.get_serializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        data = serializer.validated_data
+
+        performances, conflicts = schedule_performances(
+            data["play"],
+            data["theatre_hall"],
+            data["show_times"],
+            dry_run=data["dry_run"],
+        )
+        result = PerformanceScheduleResultSerializer(
+            {
+                "created": performances,
+                "conflicts": [
+                    {
+                        "show_time": show_time,
+                        "end_time": end_time,
+                        "performance": performance_id,
+                    }
+                    for (show_time, end_time), performance_id in conflicts
+                ],
+            },
+            context=self.get_serializer_context(),
+        )
+        return Response(
+            result.data,
+            status=(
+                status.HTTP_200_OK
+                if data["dry_run"]
+                else status.HTTP_201_CREATED
+            ),
+        )
+
     @extend_schema(
         parameters=performance_doc_parameters,
         examples=performance_doc_examples,
@@ -156,23 +446,107 @@ class PerformanceViewSet(viewsets.ModelViewSet):
     def list(self, request, *args, **kwargs):
         return super().list(request, *args, **kwargs)
 
+    @extend_schema(parameters=performance_detail_doc_parameters)
+    def retrieve(self, request, *args, **kwargs):
+        return super().retrieve(request, *args, **kwargs)
 
-class ReservationPagination(PageNumberPagination):
-    page_size = 10
-    max_page_size = 100
 
+class IdempotentCreateMixin:
+    """
+    Replay the stored response of a create request repeated with the same
+    Idempotency-Key header instead of running it again.
+    """
+
+    idempotency_header = "Idempotency-Key"
+
+    @staticmethod
+    def _replay(record, request_hash):
+        if record.request_hash != request_hash:
+            return Response(
+                {"detail": "Idempotency-Key was already used "
+                           "with a different request."},
+                status=status.HTTP_422_UNPROCESSABLE_ENTITY,
+            )
+        return Response(
+            record.response_body,
+            status=record.response_status,
+            headers={"Idempotent-Replayed": "true"},
+        )
 
-class ReservationViewSet(viewsets.ModelViewSet):
-    queryset = Reservation.objects.prefetch_related(
-        "tickets__performance__play",
-        "tickets__performance__theatre_hall",
+    def create(self, request, *args, **kwargs):
+        key = request.headers.get(self.idempotency_header)
+        if not key:
+            return super().create(request, *args, **kwargs)
+        if len(key) > IdempotencyKey._meta.get_field("key").max_length:
+            return Response(
+                {"detail": f"{self.idempotency_header} is too long."},
+                status=status.HTTP_400_BAD_REQUEST,
+            )
+
+        request_hash = hashlib.sha256(
+            json.dumps(request.data, sort_keys=True, default=str).encode()
+        ).hexdigest()
+        records = IdempotencyKey.objects.filter(
+            user_id=request.user.id, key=key
+        )
+        record = records.active().first()
+        if record is not None:
+            return self._replay(record, request_hash)
+
+        now = timezone.now()
+        try:
+            with transaction.atomic():
+                records.filter(expires_at__lte=now).delete()
+                # Concurrent retries block on the unique (user, key) index
+                # until this transaction finishes.
+                record = IdempotencyKey.objects.create(
+                    user_id=request.user.id,
+                    key=key,
+                    request_hash=request_hash,
+                    expires_at=now + timedelta(
+                        hours=settings.IDEMPOTENCY_KEY_TTL_HOURS
+                    ),
+                )
+                response = super().create(request, *args, **kwargs)
+                record.reservation_id = response.data.get("id")
+                record.response_status = response.status_code
+                record.response_body = response.data
+                record.save()
+        except IntegrityError:
+            # The competing request may have rolled back in the meantime
+            record = records.active().first()
+            if record is None:
+                return Response(
+                    {"detail": "A request with this Idempotency-Key "
+                               "did not complete, retry it."},
+                    status=status.HTTP_409_CONFLICT,
+                )
+            return self._replay(record, request_hash)
+        return response
+
+
+class ReservationViewSet(
+    IdempotentCreateMixin, SparseFieldsViewMixin, viewsets.ModelViewSet
+):
+    # Each distinct performance of a page is loaded once, with its play,
+    # hall and availability, and shared by all of its tickets
+    performances = Prefetch(
+        "tickets__performance",
+        queryset=Performance.objects.select_related(
+            "play", "theatre_hall"
+        ).with_tickets_available(),
     )
+    queryset = Reservation.objects.prefetch_related(performances)
     serializer_class = ReservationSerializer
+    prefetch_related_fields = {
+        "tickets": ("tickets",),
+        "tickets.performance": (performances,),
+    }
     pagination_class = ReservationPagination
     permission_classes = (IsAuthenticated, )
 
     def get_queryset(self):
-        return super().get_queryset().filter(user=self.request.user)
+        return super().get_queryset().filter(user_id=self.request.user.id)
 
     def get_serializer_class(self):
         if self.action == "list":
@@ -181,4 +555,267 @@ class ReservationViewSet(viewsets.ModelViewSet):
         return ReservationSerializer
 
     def perform_create(self, serializer):
-        serializer.save(user=self.request.user)
+        serializer.save(user_id=self.request.user.id)
+
+    @extend_schema(
+        parameters=reservation_export_doc_parameters,
+        responses={(200, "text/csv"): OpenApiTypes.BINARY},
+    )
+    @action(
+        methods=["GET"],
+        detail=False,
+        url_path="export",
+        permission_classes=[IsAdminUser],
+    )
+    def export(self, request):
+        """Stream the tickets of all users' reservations as CSV or NDJSON"""
+        output = request.query_params.get("output", "csv")
+        compression = request.query_params.get("compression", "none")
+        date_from = request.query_params.get("date_from")
+        date_to = request.query_params.get("date_to")
+        if output not in EXPORT_FORMATS:
+            raise ValidationError(
+                {"output": f"Must be one of: {', '.join(EXPORT_FORMATS)}."}
+            )
+        if compression not in ("none", "gzip"):
+            raise ValidationError({"compression": "Must be none or gzip."})
+
+        compress = compression == "gzip"
+        chunks = export_chunks(
+            output,
+            compress,
+            show_time_from=(
+                local_midnight("date_from", date_from) if date_from else None
+            ),
+            show_time_to=(
+                local_midnight("date_to", date_to, days=1)
+                if date_to
+                else None
+            ),
+        )
+        filename = f"reservations.{output}" + (".gz" if compress else "")
+        response = StreamingHttpResponse(
+            chunks,
+            content_type=(
+                "application/gzip" if compress else CONTENT_TYPES[output]
+            ),
+        )
+        response["Content-Disposition"] = f'attachment; filename="{filename}"'
+        return response
+
+
+class SeatHoldViewSet(
+    mixins.CreateModelMixin,
+    mixins.RetrieveModelMixin,
+    mixins.ListModelMixin,
+    mixins.DestroyModelMixin,
+    SparseFieldsViewMixin,
+    viewsets.GenericViewSet,
+):
+    queryset = SeatHold.objects.active().prefetch_related("seats")
+    serializer_class = SeatHoldSerializer
+    prefetch_related_fields = {"seats": ("seats",)}
+    expand_related_fields = {"performance": ("performance",)}
+    permission_classes = (IsAuthenticated, )
+
+    def get_queryset(self):
+        return super().get_queryset().filter(user_id=self.request.user.id)
+
+    def get_serializer_class(self):
+        if self.action == "confirm":
+            return ReservationSerializer
+
+        return SeatHoldSerializer
+
+    def perform_create(self, serializer):
+        serializer.save(user_id=self.request.user.id)
+
+    @action(methods=["POST"], detail=True, url_path="confirm")
+    def confirm(self, request, pk=None):
+        """Convert an active hold into a reservation of its seats"""
+        hold = self.get_object()
+        serializer = self.get_serializer(
+            data={
+                "tickets": [
+                    {
+                        "row": held_seat.row,
+                        "seat": held_seat.seat,
+                        "performance": hold.performance_id,
+                    }
+                    for held_seat in hold.seats.all()
+                ]
+            }
+        )
+        serializer.is_valid(raise_exception=True)
+        with transaction.atomic():
+            serializer.save(user_id=request.user.id)
+            hold.delete()
+        return Response(serializer.data, status=status.HTTP_201_CREATED)
+
+
+class ChangeLogViewSet(mixins.ListModelMixin, viewsets.GenericViewSet):
+    """
+    Catalog changes after the `since` cursor, in commit order. Repeated
+    changes of a record within one page collapse into the latest one and
+    deletions come back as tombstones without data.
+    """
+
+    queryset = ChangeLogEntry.objects.all()
+    serializer_class = ChangeLogEntrySerializer
+    permission_classes = (IsAuthenticated,)
+    page_size = 500
+    max_page_size = 1000
+    feed_querysets = {
+        "genre": Genre.objects.all(),
+        "actor": Actor.objects.all(),
+        "play": Play.objects.prefetch_related("genres", "actors"),
+        "theatrehall": TheatreHall.objects.all(),
+        "performance": Performance.objects.all(),
+    }
+
+    def _int_param(self, name, default):
+        value = self.request.query_params.get(name, default)
+        try:
+            value = int(value)
+        except (TypeError, ValueError):
+            value = -1
+        if value < 0:
+            raise ValidationError({name: "Must be a non-negative integer."})
+        return value
+
+    @extend_schema(parameters=change_feed_doc_parameters)
+    def list(self, request, *args, **kwargs):
+        since = self._int_param("since", 0)
+        limit = min(self._int_param("limit", self.page_size) or 1,
+                    self.max_page_size)
+        ChangeLogEntry.objects.assign_positions()
+
+        entries = list(
+            self.get_queryset()
+            .filter(position__gt=since)
+            .order_by("position")[: limit + 1]
+        )
+        has_more = len(entries) > limit
+        entries = entries[:limit]
+
+        latest = {}
+        for entry in entries:
+            key = (entry.model, entry.object_id)
+            latest.pop(key, None)
+            latest[key] = entry
+
+        ids_by_model = defaultdict(list)
+        for entry in latest.values():
+            if entry.action != ChangeLogEntry.Action.DELETED:
+                ids_by_model[entry.model].append(entry.object_id)
+        instances = {
+            model: self.feed_querysets[model].in_bulk(ids)
+            for model, ids in ids_by_model.items()
+        }
+        for entry in latest.values():
+            entry.instance = instances.get(entry.model, {}).get(
+                entry.object_id
+            )
+            if entry.instance is None:
+                # Deleted after this entry was written
+                entry.action = ChangeLogEntry.Action.DELETED
+
+        serializer = self.get_serializer(latest.values(), many=True)
+        return Response(
+            {
+                "cursor": entries[-1].position if entries else since,
+                "has_more": has_more,
+                "changes": serializer.data,
+            }
+        )
+
+
+class CatalogImportViewSet(viewsets.ViewSet):
+    """
+    Upsert genres, actors, plays and performances in bulk from an NDJSON
+    body, one {"type": ...} record per line
+    """
+
+    parser_classes = (NDJSONParser,)
+    permission_classes = (IsAdminUser,)
+
+    @extend_schema(
+        request={NDJSONParser.media_type: OpenApiTypes.BINARY},
+        responses={200: OpenApiTypes.OBJECT},
+        examples=catalog_import_doc_examples,
+    )
+    def create(self, request):
+        return Response(CatalogImport().run(request.data))
+
+
+class OccupancyViewSet(viewsets.GenericViewSet):
+    """
+    Performances, seats, tickets sold and occupancy grouped by day, play
+    and/or theatre hall. Only the rollup table is read.
+    """
+
+    queryset = OccupancyRollup.objects.all()
+    permission_classes = (IsAdminUser,)
+    replica_reads = True
+    # Related names are returned as play_title and theatre_hall_name
+    group_by_columns = {
+        "day": ("day",),
+        "play": ("play", "play__title"),
+        "theatre_hall": ("theatre_hall", "theatre_hall__name"),
+    }
+
+    @extend_schema(
+        parameters=occupancy_doc_parameters,
+        responses={200: OpenApiTypes.OBJECT},
+    )
+    def list(self, request):
+        group_by = request.query_params.get("group_by", "day").split(",")
+        unknown = set(group_by) - self.group_by_columns.keys()
+        if unknown:
+            raise ValidationError(
+                {
+                    "group_by": "Must be a comma separated list of: "
+                    f"{', '.join(self.group_by_columns)}."
+                }
+            )
+        date_from = request.query_params.get("date_from")
+        date_to = request.query_params.get("date_to")
+
+        rollups = self.get_queryset()
+        if date_from:
+            rollups = rollups.filter(
+                day__gte=parse_day("date_from", date_from)
+            )
+        if date_to:
+            rollups = rollups.filter(day__lte=parse_day("date_to", date_to))
+
+        columns = [
+            column
+            for name in dict.fromkeys(group_by)
+            for column in self.group_by_columns[name]
+        ]
+        rows = (
+            rollups.values(*columns)
+            .annotate(
+                performances=Sum("performances"),
+                capacity=Sum("capacity"),
+                tickets_sold=Sum("tickets_sold"),
+            )
+            .order_by(*columns)
+        )
+        return Response(
+            [
+                {
+                    **{
+                        column.replace("__", "_"): value
+                        for column, value in row.items()
+                    },
+                    "occupancy": (
+                        round(row["tickets_sold"] / row["capacity"], 4)
+                        if row["capacity"]
+                        else 0
+                    ),
+                }
+                for row in rows
+            ]
+        )
@@ -0,0 +1,118 @@
+import threading
+import time
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.utils.functional import cached_property
+from django.utils.translation import gettext_lazy as _
+from rest_framework_simplejwt.authentication import JWTAuthentication
+from rest_framework_simplejwt.exceptions import (
+    AuthenticationFailed,
+    InvalidToken,
+)
+from rest_framework_simplejwt.models import TokenUser as BaseTokenUser
+from rest_framework_simplejwt.settings import api_settings
+
+TOKEN_VERSION_CLAIM = "token_version"
+
+# {user id: (expires at, token_version, is_active)}
+_token_states = {}
+_token_states_lock = threading.Lock()
+
+
+def get_token_state(user_id):
+    """
+    (token_version, is_active) of a user, or None if there is no such
+    user. Answers are kept in process for TOKEN_STATE_CACHE_SECONDS, which
+    bounds how long a revoked token keeps working in other processes.
+    """
+    now = time.monotonic()
+    with _token_states_lock:
+        cached = _token_states.get(user_id)
+    if cached is not None and cached[0] > now:
+        return cached[1:]
+
+    state = (
+        get_user_model()
+        .objects.filter(id=user_id)
+        .values_list("token_version", "is_active")
+        .first()
+    )
+    if state is not None:
+        with _token_states_lock:
+            if len(_token_states) >= settings.TOKEN_STATE_CACHE_SIZE:
+                _token_states.clear()
+            _token_states[user_id] = (
+                now + settings.TOKEN_STATE_CACHE_SECONDS, *state
+            )
+    return state
+
+
+def forget_token_state(user_id):
+    with _token_states_lock:
+        _token_states.pop(user_id, None)
+
+
+def check_token_version(validated_token, token_version):
+    # Tokens issued before versions existed count as version 0
+    if validated_token.get(TOKEN_VERSION_CLAIM, 0) != token_version:
+        raise InvalidToken(_("Token has been revoked"))
+
+
+class TokenUser(BaseTokenUser):
+    """User built from the id, email and is_staff claims of a token"""
+
+    @cached_property
+    def email(self):
+        return self.token.get("email", "")
+
+    def __str__(self):
+        return self.email
+
+
+class VersionedJWTAuthentication(JWTAuthentication):
+    """
+    JWTAuthentication loading the full User, for endpoints that read or
+    change the account itself
+    """
+
+    def get_user(self, validated_token):
+        user = super().get_user(validated_token)
+        check_token_version(validated_token, user.token_version)
+        return user
+
+
+class StatelessJWTAuthentication(JWTAuthentication):
+    """
+    Authenticate from the token claims without loading the User row.
+    Only the token version and active flag are checked, through the
+    short-lived cache of get_token_state().
+    """
+
+    def get_user(self, validated_token):
+        if TOKEN_VERSION_CLAIM not in validated_token:
+            # Issued before the user claims were added, is_staff can only
+            # come from the database until such tokens expire
+            user = super().get_user(validated_token)
+            check_token_version(validated_token, user.token_version)
+            return user
+
+        try:
+            user_id = validated_token[api_settings.USER_ID_CLAIM]
+        except KeyError:
+            raise InvalidToken(
+                _("Token contained no recognizable user identification")
+            )
+
+        state = get_token_state(user_id)
+        if state is None:
+            raise AuthenticationFailed(
+                _("User not found"), code="user_not_found"
+            )
+        token_version, is_active = state
+        if not is_active:
+            raise AuthenticationFailed(
+                _("User is inactive"), code="user_inactive"
+            )
+        check_token_version(validated_token, token_version)
+        return TokenUser(validated_token)
@@ -40,7 +40,13 @@ class UserManager(BaseUserManager):
 class User(AbstractUser):
     username = None
     email = models.EmailField(_("email_address"), unique=True)
+    # Carried by every token, bumping it revokes the tokens issued so far
+    token_version = models.PositiveIntegerField(default=0)
 
     USERNAME_FIELD = "email"
     REQUIRED_FIELDS = []
     objects = UserManager()
+
+    def revoke_tokens(self):
+        """Invalidate all tokens issued so far, takes effect on save()"""
+        self.token_version += 1
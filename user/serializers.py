@@ -1,6 +1,18 @@
 from django.contrib.auth import get_user_model, authenticate
 from rest_framework import serializers
 from django.utils.translation import gettext as _
+from rest_framework_simplejwt.exceptions import AuthenticationFailed
+from rest_framework_simplejwt.serializers import (
+    TokenObtainPairSerializer as BaseTokenObtainPairSerializer,
+    TokenRefreshSerializer as BaseTokenRefreshSerializer,
+)
+from rest_framework_simplejwt.settings import api_settings
+
+from user.authentication import (
+    TOKEN_VERSION_CLAIM,
+    check_token_version,
+    forget_token_state,
+)
 
 
 class UserSerializer(serializers.ModelSerializer):
@@ -21,7 +33,10 @@ class UserSerializer(serializers.ModelSerializer):
 
         if password:
             user.set_password(password)
+            # Tokens issued before the change stop working
+            user.revoke_tokens()
             user.save()
+            forget_token_state(user.id)
 
         return user
 
@@ -55,3 +70,52 @@ class AuthTokenSerializer(serializers.Serializer):
 
         attrs["user"] = user
         return attrs
+
+
+def add_user_claims(token, user):
+    """Claims StatelessJWTAuthentication builds request.user from"""
+    token["email"] = user.email
+    token["is_staff"] = user.is_staff
+    token["is_superuser"] = user.is_superuser
+    token[TOKEN_VERSION_CLAIM] = user.token_version
+
+
+class TokenObtainPairSerializer(BaseTokenObtainPairSerializer):
+    @classmethod
+    def get_token(cls, user):
+        token = super().get_token(user)
+        add_user_claims(token, user)
+        return token
+
+
+class TokenRefreshSerializer(BaseTokenRefreshSerializer):
+    def validate(self, attrs):
+        """
+        Issue the access token with the user's current claims, rejecting
+        revoked refresh tokens and inactive users
+        """
+        refresh = self.token_class(attrs["refresh"])
+        user = (
+            get_user_model()
+            .objects.filter(
+                **{api_settings.USER_ID_FIELD: refresh.get(
+                    api_settings.USER_ID_CLAIM
+                )}
+            )
+            .first()
+        )
+        if user is None or not user.is_active:
+            raise AuthenticationFailed(
+                _("No active account found for this token"),
+                code="no_active_account",
+            )
+        check_token_version(refresh, user.token_version)
+        add_user_claims(refresh, user)
+
+        data = {"access": str(refresh.access_token)}
+        if api_settings.ROTATE_REFRESH_TOKENS:
+            refresh.set_jti()
+            refresh.set_exp()
+            refresh.set_iat()
+            data["refresh"] = str(refresh)
+        return data
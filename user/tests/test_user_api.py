@@ -0,0 +1,104 @@
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.db import connection
+from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from rest_framework import status
+from rest_framework.test import APIClient
+from rest_framework_simplejwt.tokens import AccessToken
+
+from user import authentication
+
+TOKEN_URL = reverse("user:token_obtain_pair")
+REFRESH_URL = reverse("user:token_refresh")
+ME_URL = reverse("user:manage")
+REVOKE_URL = reverse("user:revoke_tokens")
+PLAY_URL = reverse("theatre:play-list")
+
+
+class TokenAuthenticationTests(TestCase):
+    def setUp(self) -> None:
+        cache.clear()
+        authentication._token_states.clear()
+        self.client = APIClient()
+        self.user = get_user_model().objects.create_user(
+            "test@test.com", "testpassword"
+        )
+        tokens = self.client.post(
+            TOKEN_URL, {"email": "test@test.com", "password": "testpassword"}
+        ).data
+        self.refresh = tokens["refresh"]
+        self.authorize(tokens["access"])
+
+    def authorize(self, access):
+        self.client.credentials(HTTP_AUTHORIZATION=f"Bearer {access}")
+
+    def test_catalog_requests_skip_user_query(self):
+        self.client.get(PLAY_URL)
+
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(PLAY_URL)
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertFalse(
+            any("user_user" in query["sql"] for query in queries)
+        )
+
+    def test_tokens_without_user_claims_still_accepted(self):
+        self.user.is_staff = True
+        self.user.save()
+        # A token as issued before the claims were added
+        self.authorize(str(AccessToken.for_user(self.user)))
+
+        response = self.client.post(PLAY_URL, {"title": "Hamlet"})
+
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+
+    def test_manage_user_loads_full_user(self):
+        response = self.client.get(ME_URL)
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data["email"], "test@test.com")
+
+    def test_password_change_revokes_tokens(self):
+        response = self.client.patch(ME_URL, {"password": "newpassword"})
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+
+        response = self.client.get(PLAY_URL)
+
+        self.assertEqual(response.status_code, status.HTTP_401_UNAUTHORIZED)
+
+    def test_revoked_tokens_are_rejected(self):
+        response = self.client.post(REVOKE_URL)
+        self.assertEqual(response.status_code, status.HTTP_204_NO_CONTENT)
+
+        self.assertEqual(
+            self.client.get(PLAY_URL).status_code,
+            status.HTTP_401_UNAUTHORIZED,
+        )
+        self.assertEqual(
+            self.client.post(REFRESH_URL, {"refresh": self.refresh}).status_code,
+            status.HTTP_401_UNAUTHORIZED,
+        )
+
+    def test_refresh_carries_current_claims(self):
+        self.user.is_staff = True
+        self.user.save()
+
+        access = self.client.post(REFRESH_URL, {"refresh": self.refresh}).data[
+            "access"
+        ]
+        self.authorize(access)
+        response = self.client.post(PLAY_URL, {"title": "Hamlet"})
+
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+
+    def test_inactive_user_rejected(self):
+        self.user.is_active = False
+        self.user.save()
+        authentication.forget_token_state(self.user.id)
+
+        response = self.client.get(PLAY_URL)
+
+        self.assertEqual(response.status_code, status.HTTP_401_UNAUTHORIZED)
@@ -1,9 +1,14 @@
-from rest_framework import generics
-from rest_framework.authentication import TokenAuthentication
+from drf_spectacular.utils import extend_schema
+from rest_framework import generics, status
 from rest_framework.authtoken.views import ObtainAuthToken
 from rest_framework.permissions import IsAuthenticated
+from rest_framework.response import Response
 from rest_framework.settings import api_settings
+from rest_framework_simplejwt.views import TokenObtainPairView
 
+from config.throttling import LoginRateThrottle
+
+from user.authentication import VersionedJWTAuthentication, forget_token_state
 from user.serializers import UserSerializer, AuthTokenSerializer
 
 
@@ -14,12 +19,35 @@ class CreateUserView(generics.CreateAPIView):
 class CreateTokenView(ObtainAuthToken):
     renderer_classes = api_settings.DEFAULT_RENDERER_CLASSES
     serializer_class = AuthTokenSerializer
+    throttle_classes = (LoginRateThrottle, )
+
+
+class LoginView(TokenObtainPairView):
+    """Obtain a token pair, password attempts are rate limited"""
+
+    throttle_classes = (LoginRateThrottle, )
 
 
 class ManageUserView(generics.RetrieveUpdateAPIView):
     serializer_class = UserSerializer
-    authentication_classes = (TokenAuthentication, )
+    # Reads and changes the account itself, so the full User is loaded
+    authentication_classes = (VersionedJWTAuthentication, )
     permission_classes = (IsAuthenticated, )
 
     def get_object(self):
         return self.request.user
+
+
+class RevokeTokensView(generics.GenericAPIView):
+    """Sign out everywhere: invalidate every token issued to the user"""
+
+    authentication_classes = (VersionedJWTAuthentication, )
+    permission_classes = (IsAuthenticated, )
+
+    @extend_schema(request=None, responses={204: None})
+    def post(self, request):
+        user = request.user
+        user.revoke_tokens()
+        user.save(update_fields=["token_version"])
+        forget_token_state(user.id)
+        return Response(status=status.HTTP_204_NO_CONTENT)